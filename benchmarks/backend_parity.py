@@ -0,0 +1,95 @@
+"""
+Parity check: the NumPy matrix backend against the pure-Python scoring functions.
+
+For every policy in the corpus, synthetic predictions are scored pair by pair with compute_token_f1 and
+check_containment, and the resulting scores must equal the matrix backend's exactly. Evaluator Hit/Miss
+tags and AIEvaluator CORRECT_* decisions must also be identical between the "index" and "matrix"
+backends (the judge is stubbed, so no API calls are made).
+
+Usage: python benchmarks/backend_parity.py [--data ./data] [--limit N]
+The pairwise reference scoring is slow; the full corpus takes ~10 minutes, --limit 40 about a minute.
+"""
+import argparse
+import copy
+import hashlib
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ai_evaluator import AIEvaluator, check_containment
+from src.evaluator import Evaluator, compute_token_f1
+from src.gt_index import GroundTruthIndex
+from src.utils import clean_tokens, normalize_text, load_c3pa_dataset
+from benchmarks.synthetic import synthetic_predictions
+
+
+class StubJudgeEvaluator(AIEvaluator):
+    """AIEvaluator with a deterministic, offline judge."""
+
+    def __init__(self, backend: str):
+        super().__init__(client=None, backend=backend)
+
+    def _geval_judge(self, pred_text, gt_text, label):
+        digest = int(hashlib.md5(f"{pred_text}|{gt_text}|{label}".encode("utf-8")).hexdigest(), 16)
+        return digest % 2 == 0, 0.5, f"stub verdict {digest % 100}"
+
+
+def check_policy(ground_truth, preds) -> list:
+    errors = []
+    gt_index = GroundTruthIndex.from_annotations(ground_truth)
+    matrix = gt_index.overlap_matrix()
+
+    # 1. Raw scores: matrix backend vs pure-Python functions
+    f1 = matrix.token_f1([clean_tokens(p['text']) for p in preds])
+    p_norms = [normalize_text(p['text']) for p in preds]
+    recall, precision = matrix.containment(p_norms, [n.split() for n in p_norms])
+
+    for i, pred in enumerate(preds):
+        for j, gt in enumerate(ground_truth):
+            if f1[i, j] != compute_token_f1(pred['text'], gt['text']):
+                errors.append(f"token_f1 mismatch at pred {i}, gt {j}")
+            if recall[i, j] != check_containment(pred['text'], gt['text']):
+                errors.append(f"containment mismatch at pred {i}, gt {j}")
+            if precision[i, j] != check_containment(gt['text'], pred['text']):
+                errors.append(f"reverse containment mismatch at pred {i}, gt {j}")
+
+    # 2. Decisions: index backend vs matrix backend
+    index_preds, matrix_preds = copy.deepcopy(preds), copy.deepcopy(preds)
+    if Evaluator(backend="index").compare_annotations(ground_truth, index_preds) != \
+            Evaluator(backend="matrix").compare_annotations(ground_truth, matrix_preds):
+        errors.append("Evaluator metrics differ")
+    if [p['_match_status'] for p in index_preds] != [p['_match_status'] for p in matrix_preds]:
+        errors.append("Evaluator Hit/Miss tags differ")
+
+    if StubJudgeEvaluator("index").evaluate_batch(ground_truth, copy.deepcopy(preds)) != \
+            StubJudgeEvaluator("matrix").evaluate_batch(ground_truth, copy.deepcopy(preds)):
+        errors.append("AIEvaluator decisions differ")
+
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="./data")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    policies = [p for p in load_c3pa_dataset(args.data) if p['ground_truth']][:args.limit]
+
+    failed = 0
+    for pol in policies:
+        errors = check_policy(pol['ground_truth'], synthetic_predictions(pol['ground_truth'], rng))
+        if errors:
+            failed += 1
+            print(f"{pol['id']}: {len(errors)} mismatches, e.g. {errors[0]}")
+
+    print(f"Checked {len(policies)} policies: {len(policies) - failed} identical, {failed} with mismatches.")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Benchmarks the pipeline's local hot paths over the real corpus (all DB + WS policies):
+
+    load_c3pa_dataset, clean_tokens, compute_token_f1, check_containment,
+    Evaluator.compare_annotations, AIEvaluator.evaluate_batch (offline judge), HTMLVisualizer.generate_report
+
+The scoring stages run on synthetic prediction sets of growing size (--sizes, as multiples of each policy's
+ground-truth count). Every stage reports its median/min wall time over --repeat runs and, from one extra run
+under tracemalloc, the peak and retained (still referenced at the end) Python allocations.
+
+Baselines:
+    python benchmarks/bench_pipeline.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_pipeline.py --compare benchmarks/baseline.json [--tolerance 0.25]
+--compare exits with status 1 if any stage got slower or allocates more than the tolerance allows.
+Timings only compare on the same machine; the full run takes a few minutes, --limit 40 well under one.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Per-policy judge progress bars would swamp the timing table
+os.environ.setdefault("TQDM_DISABLE", "1")
+
+from src.ai_evaluator import AIEvaluator, check_containment
+from src.evaluator import Evaluator, compute_token_f1
+from src.llm_client import LLMClient
+from src.mock_provider import configure_mock
+from src.utils import clean_tokens, load_c3pa_dataset
+from src.visualizer import HTMLVisualizer
+from benchmarks.backend_parity import StubJudgeEvaluator
+from benchmarks.synthetic import synthetic_predictions
+
+# Pairs per policy scored by the pure-Python pairwise functions (they are O(preds x GT))
+PAIRS_PER_POLICY = 400
+
+# Stages whose memory is too small to compare meaningfully (MB) are checked on time only
+MIN_COMPARABLE_MB = 1.0
+
+
+def measure(fn, repeat: int) -> dict:
+    """
+    Median/min wall time over `repeat` untraced runs, then one tracemalloc run for peak and retained memory.
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    return {
+        "median_sec": round(statistics.median(times), 4),
+        "min_sec": round(min(times), 4),
+        "peak_mb": round(peak / 2**20, 2),
+        "retained_mb": round(retained / 2**20, 2),
+    }
+
+
+def build_judge(kind: str, backend: str) -> AIEvaluator:
+    if kind == "mock":
+        # The real batch-judge path (prompting, JSON parsing, verdict mapping) against the instant mock provider
+        configure_mock(latency=0.0, jitter=0.0, tokens_per_sec=0)
+        return AIEvaluator(LLMClient("mock:judge"), judge_mode="batch", backend=backend)
+    return StubJudgeEvaluator(backend)
+
+
+def run_suite(args) -> dict:
+    results = {}
+
+    def record(name, fn):
+        stats = measure(fn, args.repeat)
+        results[name] = stats
+        print(f"{name:<45} {stats['median_sec']:>9.3f}s  (min {stats['min_sec']:.3f}s)  "
+              f"peak {stats['peak_mb']:>8.2f} MB  retained {stats['retained_mb']:>8.2f} MB")
+
+    # 1. Dataset loading (always the full corpus)
+    record("load_c3pa_dataset", lambda: load_c3pa_dataset(args.data))
+    policies = [p for p in load_c3pa_dataset(args.data) if p['ground_truth']][:args.limit]
+    gt_total = sum(len(p['ground_truth']) for p in policies)
+    print(f"  {len(policies)} policies, {gt_total} ground-truth spans")
+
+    # 2. Tokenization
+    gt_texts = [gt['text'] for p in policies for gt in p['ground_truth']]
+    record("clean_tokens (all GT spans)", lambda: [clean_tokens(t) for t in gt_texts])
+
+    for factor in args.sizes:
+        rng = random.Random(args.seed)
+        pred_sets = [
+            synthetic_predictions(p['ground_truth'], rng, size=max(1, round(len(p['ground_truth']) * factor)))
+            for p in policies
+        ]
+        n_preds = sum(len(preds) for preds in pred_sets)
+        tag = f"x{factor:g}"
+        print(f"-- predictions {tag}: {n_preds}")
+
+        # 3. Pairwise scoring functions on a fixed sample of (pred, GT) pairs per policy
+        pairs = []
+        for pol, preds in zip(policies, pred_sets):
+            policy_pairs = [(p['text'], g['text']) for p in preds for g in pol['ground_truth']]
+            pairs.extend(random.Random(args.seed).sample(policy_pairs, min(PAIRS_PER_POLICY, len(policy_pairs))))
+        record(f"compute_token_f1 [{tag}]", lambda: [compute_token_f1(p, g) for p, g in pairs])
+        record(f"check_containment [{tag}]", lambda: [check_containment(p, g) for p, g in pairs])
+
+        # 4. Strict evaluator and AI evaluator (offline judge), per backend
+        for backend in args.backends:
+            evaluator = Evaluator(backend=backend)
+            record(f"Evaluator.compare_annotations {backend} [{tag}]", lambda: [
+                evaluator.compare_annotations(pol['ground_truth'], preds)
+                for pol, preds in zip(policies, pred_sets)
+            ])
+
+            judge = build_judge(args.judge, backend)
+            record(f"AIEvaluator.evaluate_batch {backend} [{tag}]", lambda: [
+                judge.evaluate_batch(pol['ground_truth'], preds)
+                for pol, preds in zip(policies, pred_sets)
+            ])
+
+        # 5. HTML reports, from the decisions of one evaluation pass
+        if args.reports:
+            judge = build_judge(args.judge, args.backends[-1])
+            evaluations = [judge.evaluate_batch(pol['ground_truth'], preds) for pol, preds in zip(policies, pred_sets)]
+            visualizer = HTMLVisualizer()
+            with tempfile.TemporaryDirectory() as out_dir:
+                def render():
+                    for pol, preds, (metrics, decisions, missed) in zip(policies, pred_sets, evaluations):
+                        visualizer.generate_report(
+                            policy_id=pol['id'],
+                            full_text=pol['text'],
+                            human_anns=pol['ground_truth'],
+                            llm_anns=preds,
+                            filename=os.path.join(out_dir, f"{pol['id']}.html"),
+                            ai_decisions=decisions,
+                            missed_gts=missed,
+                            metrics=metrics,
+                        )
+                record(f"HTMLVisualizer.generate_report [{tag}]", render)
+
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Stages that are slower (median) or allocate more (peak) than the baseline by more than `tolerance`.
+    """
+    regressions = []
+    for name, base in baseline.get("results", {}).items():
+        current = results.get(name)
+        if current is None:
+            print(f"  {name}: missing from this run")
+            continue
+        time_ratio = current["median_sec"] / base["median_sec"] if base["median_sec"] else 1.0
+        mem_ratio = current["peak_mb"] / base["peak_mb"] if base["peak_mb"] >= MIN_COMPARABLE_MB else 1.0
+        flags = []
+        if time_ratio > 1 + tolerance:
+            flags.append(f"time x{time_ratio:.2f}")
+        if mem_ratio > 1 + tolerance:
+            flags.append(f"peak memory x{mem_ratio:.2f}")
+        status = "REGRESSION " + ", ".join(flags) if flags else "ok"
+        print(f"  {name:<45} time x{time_ratio:.2f}  peak x{mem_ratio:.2f}  {status}")
+        if flags:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="./data")
+    parser.add_argument("--limit", type=int, default=None, help="Only the first N policies for the scoring stages")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[0.5, 1, 2, 4],
+                        help="Prediction set sizes, as multiples of each policy's ground-truth count")
+    parser.add_argument("--backends", nargs="+", default=["index", "matrix"], choices=["index", "matrix"])
+    parser.add_argument("--judge", default="stub", choices=["stub", "mock"],
+                        help="stub: hash-based verdicts (scoring only); mock: batch judge via the mock provider")
+    parser.add_argument("--no-reports", dest="reports", action="store_false")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--compare", metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = run_suite(args)
+
+    if args.save_baseline:
+        baseline = {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("save_baseline", "compare")},
+            "results": results,
+        }
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"Comparing against {args.compare} ({baseline.get('created')}, tolerance {args.tolerance:.0%}):")
+        for key in ("data", "limit", "judge", "seed"):
+            if key in baseline.get("args", {}) and baseline["args"][key] != getattr(args, key):
+                print(f"  Warning: baseline was run with --{key} {baseline['args'][key]}, this run with {getattr(args, key)}")
+        regressions = compare(results, baseline, args.tolerance)
+        print(f"{len(regressions)} regression(s).")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Synthetic prediction sets derived from C3PA ground truth, for benchmarks and parity checks.
+"""
+import random
+from typing import Dict, List
+
+
+def synthetic_predictions(ground_truth: List[Dict], rng: random.Random, size: int = None) -> List[Dict]:
+    """
+    Builds `size` predictions (default: one per GT item) that exercise every matching path:
+    exact copies, sub-spans, merged blocks, shuffled word subsets, short fragments and unrelated spans,
+    with a share of wrong labels.
+    """
+    if not ground_truth:
+        return []
+
+    labels = sorted({g['label'] for g in ground_truth})
+    fragments = ["data", "ta in", "metadata info", "email", "we", "right to delete"]
+    size = len(ground_truth) if size is None else size
+
+    preds = []
+    for n in range(size):
+        gt = ground_truth[n % len(ground_truth)]
+        words = gt['text'].split()
+        r = rng.random()
+
+        if r < 0.2:
+            text = gt['text']
+        elif r < 0.4 and len(words) > 3:
+            start = rng.randrange(len(words))
+            end = rng.randrange(start, len(words)) + 1
+            text = " ".join(words[start:end])
+        elif r < 0.55:
+            text = gt['text'] + " " + rng.choice(ground_truth)['text']
+        elif r < 0.7 and words:
+            text = " ".join(rng.sample(words, max(1, len(words) // 2)))
+        elif r < 0.8:
+            text = rng.choice(fragments)
+        else:
+            text = rng.choice(ground_truth)['text']
+
+        label = gt['label'] if rng.random() < 0.75 else rng.choice(labels)
+        preds.append({"label": label, "text": text, "reasoning": "synthetic"})
+
+    return preds
@@ -1,10 +1,13 @@
-import pandas as pd
 import os
 import sys
 
+from src.report_build import ReportBuilder
+from src.results_store import ResultsStore
+from src.visualizer import report_filename
+
 # --- Configuration ---
-# The path to your benchmark results CSV file.
-CSV_FILE_PATH = '/Users/aleksey/PycharmProjects/FullPPClassification/benchmark_full_results.csv'
+# The path to your benchmark results store (main.py RESULTS_DB); the latest finished run is kept.
+RESULTS_DB_PATH = '/Users/aleksey/PycharmProjects/FullPPClassification/benchmark_results.sqlite'
 
 # The path to the directory containing your report files.
 # PLEASE VERIFY THIS PATH IS CORRECT.
@@ -14,57 +17,44 @@ REPORTS_DIR = '/Users/aleksey/PycharmProjects/FullPPClassification/reports/'
 # When True, the script will only print which files would be deleted.
 DRY_RUN = False
 
-def sanitize_model_name(model_name: str) -> str:
-    """Sanitizes the model name to be filesystem-friendly."""
-    return model_name.replace(':', '_').replace('/', '_')
-
-def get_valid_report_basenames(csv_path: str) -> set:
-    """Reads the benchmark CSV and returns a set of valid report basenames."""
-    try:
-        df = pd.read_csv(csv_path)
-    except FileNotFoundError:
-        print(f"Error: CSV file not found at {csv_path}", file=sys.stderr)
+def get_valid_report_names(db_path: str, reports_dir: str) -> set:
+    """Returns the report file names of the successful pairs in the latest run of the results store."""
+    if not os.path.exists(db_path):
+        print(f"Error: results store not found at {db_path}", file=sys.stderr)
         return set()
 
-    valid_basenames = set()
-    for _, row in df.iterrows():
-        policy_id = row['policy_id']
-        model = row['model']
-        sanitized_model = sanitize_model_name(model)
-        basename = f"{policy_id}_{sanitized_model}"
-        valid_basenames.add(basename)
-    return valid_basenames
-
-def clean_reports_directory(reports_dir: str, valid_basenames: set, dry_run: bool = True):
+    store = ResultsStore(db_path)
+    df = store.query(
+        "SELECT policy_id, model FROM pair_metrics WHERE run_id = ? AND error IS NULL", [store.latest_run_id()]
+    )
+    store.close()
+    return {
+        os.path.basename(report_filename(reports_dir, policy_id, model))
+        for policy_id, model in zip(df['policy_id'], df['model'])
+    }
+
+def clean_reports_directory(reports_dir: str, valid_names: set, dry_run: bool = True):
     """
-    Deletes files from the reports directory that are not in the
-    set of valid report basenames.
+    Deletes reports (and leftover temp files) that are not in the set of valid report
+    names and drops them from the report manifest. The index and the shared assets are kept.
     """
     if not os.path.isdir(reports_dir):
         print(f"Error: Reports directory not found at {reports_dir}", file=sys.stderr)
         return
 
     print(f"Scanning directory: {reports_dir}")
-    
-    for filename in os.listdir(reports_dir):
-        basename, _ = os.path.splitext(filename)
-        
-        if basename not in valid_basenames:
-            file_path = os.path.join(reports_dir, filename)
-            if dry_run:
-                print(f"[DRY RUN] Would delete: {file_path}")
-            else:
-                try:
-                    os.remove(file_path)
-                    print(f"Deleted: {file_path}")
-                except OSError as e:
-                    print(f"Error deleting file {file_path}: {e}", file=sys.stderr)
+    builder = ReportBuilder(reports_dir)
+    if dry_run:
+        pruned = builder.prune(valid_names, dry_run=True)
+    else:
+        pruned = builder.finish(keep=valid_names)["pruned"]
+    print(f"{pruned} orphaned report file(s).")
 
 if __name__ == '__main__':
-    valid_names = get_valid_report_basenames(CSV_FILE_PATH)
+    valid_names = get_valid_report_names(RESULTS_DB_PATH, REPORTS_DIR)
     if valid_names:
         clean_reports_directory(REPORTS_DIR, valid_names, dry_run=DRY_RUN)
     print("\nScript finished.")
     if DRY_RUN:
         print("This was a DRY RUN. No files were actually deleted.")
-        print("To delete files, set DRY_RUN = False in the script and run again.")
\ No newline at end of file
+        print("To delete files, set DRY_RUN = False in the script and run again.")
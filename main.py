@@ -1,6 +1,7 @@
 """
 Orchestrator script for Multi-Model Benchmarking with AI-based Evaluation and HTML Reporting.
 """
+import argparse
 import pandas as pd
 import time
 import os
@@ -9,14 +10,30 @@ from dotenv import load_dotenv
 # Local imports
 from src.annotator import PrivacyPolicyAnnotator
 from src.evaluator import Evaluator
-from src.ai_evaluator import AIEvaluator
-from src.llm_client import LLMClient
-from src.visualizer import HTMLVisualizer
-from src.utils import load_c3pa_dataset
+from src.evaluation_stage import EvaluationStage, stored_prediction_tasks, with_inference_stats
+from src.ai_evaluator import AIEvaluator, StreamingJudge
+from src.gt_index import GroundTruthIndex
+from src.llm_client import LLMClient, close_llm_clients, set_provider_concurrency
+from src.mock_provider import configure_mock, record_responses
+from src.rate_limiter import set_provider_rate_limits, set_retry_policy, rate_limiter_stats
+from src.scheduler import BenchmarkScheduler
+from src.cache import InferenceCache, JudgeCache
+from src.visualizer import HTMLVisualizer, report_filename
+from src.report_build import ReportBuilder
+from src.results_store import ResultsStore
+from src.significance import model_intervals, pairwise_tests, shared_policy_rows
+from src.corpus import iter_c3pa_dataset
+from src.journal import ResultsJournal
+from src.prefilter import RelevanceFilter, load_crawl_seed_terms
+from src.telemetry import JsonlTelemetrySink, TelemetryAggregator, set_telemetry_sinks, telemetry_context
 
 # --- CONFIGURATION ---
 DATASET_PATH = "./data"
+CORPUS_PATH = "./.cache/c3pa_corpus.bin"  # Rebuilt when missing or stale; build ahead with `python -m src.corpus`
 REPORTS_DIR = "./reports"
+RESULTS_DB = "./benchmark_results.sqlite"  # Runs, per-pair metrics, predictions, judge decisions, call telemetry
+RESULTS_CSV = "benchmark_full_results.csv"  # Flat export of the per-pair metrics
+JOURNAL_PATH = "./benchmark_journal.jsonl"  # Every finished (policy, model) row; `--resume` continues from it
 
 # 1. Models to Benchmark
 MODELS_TO_TEST = [
@@ -28,6 +45,39 @@ MODELS_TO_TEST = [
 
 # 2. Judge Configuration
 JUDGE_MODEL = "openai:gpt-4o-mini"
+JUDGE_MODE = "geval"        # "geval" (one GEval chain per pair) or "batch" (many pairs per call)
+JUDGE_BATCH_SIZE = 20
+
+# Chunked annotation: policies longer than CHUNK_TOKENS (estimated) are split on paragraph boundaries
+# and the chunks are annotated concurrently. None = one call per policy (the original protocol).
+CHUNK_TOKENS = None
+CHUNK_OVERLAP_TOKENS = 200
+CHUNK_WORKERS = 4
+
+# Relevance pre-filter: send only passages that can match a C3PA category (keywords + TF-IDF vs. taxonomy).
+# Token reduction and GT coverage are logged per policy; `python -m src.prefilter` measures the tradeoff
+# (these defaults: ~23% fewer prompt tokens at ~89% GT span coverage over the C3PA corpus).
+PREFILTER = False
+PREFILTER_MIN_SCORE = 0.28
+PREFILTER_CONTEXT = 1
+PREFILTER_MAX_GAP_TOKENS = 800
+
+# Streaming: spans are parsed as the model writes them and ambiguous pairs are judged while generation
+# continues (PREJUDGE_WORKERS background judge threads per pair being annotated).
+STREAM_ANNOTATIONS = False
+PREJUDGE_WORKERS = 4
+
+# Token-overlap scoring backend: "index" (per-pair, inverted index) or "matrix" (NumPy, same results)
+MATCHING_BACKEND = "matrix"
+
+# Matching rules: strict token-F1 threshold; AI evaluator containment for a direct match / for judging
+STRICT_MATCH_THRESHOLD = 0.3
+CONTAINMENT_THRESHOLD = 0.9
+JUDGE_THRESHOLD = 0.4
+
+# Evaluation-only stage (`--evaluate-only`): re-scores stored predictions (journal, else inference cache)
+# on EVAL_WORKERS processes, with judge verdicts from JUDGE_CACHE_DIR only (no model calls).
+EVAL_WORKERS = os.cpu_count()
 
 # 3. Policies to ignore (by ID)
 IGNORED_POLICIES = [
@@ -67,131 +117,489 @@ IGNORED_POLICIES = [
 TEST_LIMIT = 55
 GENERATE_REPORTS = True
 
+# 4. Concurrency
+MAX_WORKERS = 8
+PROVIDER_CONCURRENCY = {
+    "gemini": 4,
+    "openrouter": 4,
+    "openai": 4,
+}
+
+# Request/token budgets per provider (shared by all threads; providers without an entry are unthrottled).
+# A 429 pauses the provider for Retry-After and halves its rate, which then recovers on success.
+PROVIDER_RATE_LIMITS = {
+    "gemini": {"rpm": 1000, "tpm": 1_000_000},
+    "openrouter": {"rpm": 500},
+    "openai": {"rpm": 500, "tpm": 200_000},
+}
+MAX_RETRIES = 6
+
+# 5. Inference Cache (set CACHE_REFRESH = True to re-query models and overwrite stored responses)
+CACHE_PATH = "./.cache/inference.sqlite"
+CACHE_MAX_MB = 512
+CACHE_REFRESH = False
+JUDGE_CACHE_DIR = "./.cache/judge"
+
+# 6. Telemetry & Cost (USD per 1M tokens; keep in sync with the providers' price lists)
+TELEMETRY_PATH = "./.cache/telemetry.jsonl"
+MODEL_PRICING = {
+    "openrouter:x-ai/grok-4.1-fast": {"input": 0.20, "cached_input": 0.05, "output": 0.50},
+    "gemini:gemini-2.5-flash": {"input": 0.30, "cached_input": 0.03, "output": 2.50},
+    "openai:gpt-5-mini-2025-08-07": {"input": 0.25, "cached_input": 0.025, "output": 2.00},
+    "openrouter:meta-llama/llama-4-maverick": {"input": 0.15, "output": 0.60},
+    "gemini:gemini-3-flash-preview": {"input": 0.50, "cached_input": 0.05, "output": 3.00},
+    "openai:gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60},
+}
+
+# 7. Offline Mock Provider: "mock:<name>" models (and judge) run without API keys, replaying
+# RECORD_RESPONSES_PATH recordings or synthesizing spans from the ground truth (see src/mock_provider.py).
+MOCK_SETTINGS = {
+    "latency": 0.2,
+    "jitter": 0.1,
+    "tokens_per_sec": 500.0,
+    "error_rate": 0.0,
+    "rate_limit_rpm": None,
+    "recall": 0.8,
+    "replay_path": None,
+}
+RECORD_RESPONSES_PATH = None  # e.g. "./.cache/recorded_responses.jsonl" to record live responses for replay
+
+
+def run_pair(pol, annotator, strict_evaluator, ai_evaluator, reports, gt_index=None, telemetry=None):
+    """
+    Runs inference, evaluation and reporting for one (policy, model) pair.
+    Returns the result row and the console lines to print for it.
+    """
+    ground_truth = pol['ground_truth']
+    model_name = annotator.model_name
+    log_lines = []
+
+    try:
+        # A. Inference
+        t0 = time.time()
+        if STREAM_ANNOTATIONS:
+            llm_preds = []
+            with telemetry_context(policy_id=pol['id'], stage="judge"):
+                early_judge = StreamingJudge(ai_evaluator, ground_truth, gt_index, max_workers=PREJUDGE_WORKERS)
+            with early_judge, telemetry_context(policy_id=pol['id'], stage="annotate"):
+                for span in annotator.annotate_stream(pol.get('llm_text', pol['text'])):
+                    llm_preds.append(span)
+                    early_judge.add(span)
+                duration = time.time() - t0
+        else:
+            with telemetry_context(policy_id=pol['id'], stage="annotate"):
+                llm_preds = annotator.annotate(pol.get('llm_text', pol['text']))
+            duration = time.time() - t0
+        log_lines.append(f"   > Testing {model_name}... Done ({len(llm_preds)} preds in {duration:.1f}s)")
+
+        # B. Standard Metrics (Reference)
+        strict_metrics = strict_evaluator.compare_annotations(ground_truth, llm_preds, gt_index=gt_index)
+
+        # C. AI Judging (Returns Metrics AND Decision Map)
+        # This uses the logic: Filter by Label -> Filter by Overlap -> Ask LLM
+        with telemetry_context(policy_id=pol['id'], stage="judge"):
+            ai_metrics, ai_decisions, missed_gts, outcomes = ai_evaluator.evaluate_batch(
+                ground_truth, llm_preds, gt_index=gt_index, return_outcomes=True
+            )
+
+        # D. Combine & Save
+        row_data = strict_metrics.copy()
+        row_data.update({
+            "policy_id": pol['id'],
+            "model": model_name,
+            "duration_sec": round(duration, 2),
+            "ai_precision": ai_metrics["precision"],
+            "ai_recall": ai_metrics["recall"],
+            "ai_f1": ai_metrics["f1"],
+            # Kept in the journal so `--evaluate-only` can re-score without inference
+            "predictions": [{k: v for k, v in p.items() if not k.startswith("_")} for p in llm_preds],
+            "decisions": ai_decisions,
+            "gt_outcomes": outcomes,
+        })
+        if telemetry is not None:
+            # Provider-reported usage of this pair's annotation calls (zero on inference-cache hits)
+            usage = telemetry.totals(model=annotator.client.model_id, policy_id=pol['id'], stage="annotate")
+            row_data.update({
+                "llm_calls": usage["calls"],
+                "prompt_tokens": usage["prompt_tokens"],
+                "completion_tokens": usage["completion_tokens"],
+                "cached_tokens": usage["cached_tokens"],
+                "llm_latency_sec": round(usage["latency_sec"], 2),
+                "cost_usd": round(usage["cost_usd"], 6),
+            })
+        if 'prefilter' in pol:
+            row_data.update(pol['prefilter'])
+            row_data["llm_text_ranges"] = pol['llm_text_ranges']
+
+        log_lines.append(f"     > Strict F1: {strict_metrics['f1']:.2f}")
+        log_lines.append(f"     > AI Stats : P={ai_metrics['precision']} | R={ai_metrics['recall']} | F1={ai_metrics['f1']}")
+
+        # E. Visualization (skipped if an identical report already exists)
+        if GENERATE_REPORTS:
+            fname = report_filename(REPORTS_DIR, pol['id'], model_name)
+
+            reports.render(
+                policy_id=pol['id'],
+                full_text=pol['text'],
+                human_anns=ground_truth,
+                llm_anns=llm_preds,
+                filename=fname,
+                ai_decisions=ai_decisions, # Pass the detailed judge results for coloring
+                missed_gts=missed_gts
+            )
+
+    except Exception as e:
+        log_lines.append(f"   > Testing {model_name}... FAILED: {e}")
+        row_data = {"policy_id": pol['id'], "model": model_name, "error": str(e)}
+
+    return row_data, log_lines
+
+
+def apply_prefilter(pol, relevance_filter, verbose=True):
+    """
+    Adds the pre-filtered LLM input (llm_text) and its token/coverage stats (prefilter) to a policy.
+    """
+    filtered = relevance_filter.filter(pol['text'])
+    coverage = relevance_filter.gt_coverage(pol['text'], filtered["ranges"], pol['ground_truth'])
+    if verbose:
+        print(f"Policy ID: {pol['id']} - Pre-filter: {filtered['tokens_in']} -> {filtered['tokens_out']} tokens, "
+              f"GT coverage {coverage if coverage is None else round(coverage, 3)}")
+    # llm_text_ranges map offsets in llm_text back to pol['text'] (RelevanceFilter.to_original_offset)
+    return dict(pol, llm_text=filtered["text"], llm_text_ranges=filtered["ranges"], prefilter={
+        "prompt_tokens_in": filtered["tokens_in"],
+        "prompt_tokens_out": filtered["tokens_out"],
+        "prefilter_gt_coverage": coverage,
+    })
+
+
+def build_relevance_filter():
+    if not PREFILTER:
+        return None
+    return RelevanceFilter(
+        load_crawl_seed_terms(DATASET_PATH),
+        min_score=PREFILTER_MIN_SCORE,
+        context=PREFILTER_CONTEXT,
+        max_gap_tokens=PREFILTER_MAX_GAP_TOKENS
+    )
+
+
+def finish_reports(reports, results):
+    """
+    Prunes reports of pairs no longer in the results, saves the report manifest and rewrites the index.
+    """
+    keep = [report_filename(REPORTS_DIR, row["policy_id"], row["model"]) for row in results if not row.get("error")]
+    print(f"Reports: {reports.finish(keep)}")
+    print(f"Report index: {reports.visualizer.write_index(REPORTS_DIR, results)}")
+
+
+def run_config(mode):
+    """
+    The settings a run's results depend on, stored with the run in RESULTS_DB.
+    """
+    return {
+        "mode": mode,
+        "models": MODELS_TO_TEST,
+        "judge_model": JUDGE_MODEL,
+        "judge_mode": JUDGE_MODE,
+        "matching_backend": MATCHING_BACKEND,
+        "strict_match_threshold": STRICT_MATCH_THRESHOLD,
+        "containment_threshold": CONTAINMENT_THRESHOLD,
+        "judge_threshold": JUDGE_THRESHOLD,
+        "chunk_tokens": CHUNK_TOKENS,
+        "prefilter": PREFILTER,
+        "test_limit": TEST_LIMIT,
+        "ignored_policies": IGNORED_POLICIES,
+    }
+
+
+def evaluate_only(force_reports=False):
+    """
+    Re-scores the stored predictions of every (policy, model) pair on a process pool, without inference.
+    Rows keep their journaled inference stats (duration, tokens, cost); metrics are replaced.
+    """
+    print("--- C3PA Evaluation Only (stored predictions) ---")
+    store = ResultsStore(RESULTS_DB)
+    store.start_run("evaluate-only", run_config("evaluate-only"))
+    policies = iter_c3pa_dataset(
+        DATASET_PATH,
+        exclude_ids=IGNORED_POLICIES,
+        head=TEST_LIMIT,
+        corpus_path=CORPUS_PATH
+    )
+
+    # Reading only: resume=True keeps the journal in place
+    journal = ResultsJournal(JOURNAL_PATH, resume=True)
+    journal_rows = journal.rows()
+    journal.close()
+    by_pair = {(row["policy_id"], row["model"]): row for row in journal_rows}
+
+    # Cache fallback for pairs whose journal row has no predictions (never refreshing: nothing is re-queried)
+    inference_cache = InferenceCache(CACHE_PATH, max_size_mb=CACHE_MAX_MB)
+    annotators = {
+        model_name: PrivacyPolicyAnnotator(
+            model_name=model_name,
+            cache=inference_cache,
+            chunk_tokens=CHUNK_TOKENS,
+            chunk_overlap=CHUNK_OVERLAP_TOKENS
+        )
+        for model_name in MODELS_TO_TEST
+    }
+    relevance_filter = build_relevance_filter()
+    if relevance_filter is not None:
+        policies = (apply_prefilter(pol, relevance_filter, verbose=False) for pol in policies)
+
+    stage = EvaluationStage(
+        JUDGE_MODEL,
+        judge_cache_dir=JUDGE_CACHE_DIR,
+        backend=MATCHING_BACKEND,
+        match_threshold=STRICT_MATCH_THRESHOLD,
+        containment_threshold=CONTAINMENT_THRESHOLD,
+        judge_threshold=JUDGE_THRESHOLD,
+        reports_dir=REPORTS_DIR if GENERATE_REPORTS else None,
+        force_reports=force_reports,
+        max_workers=EVAL_WORKERS
+    )
+    print(f"Evaluating on {stage.max_workers} processes")
+
+    t0 = time.time()
+    results = []
+    last_policy = None
+    tasks = stored_prediction_tasks(policies, MODELS_TO_TEST, journal_rows, annotators)
+    reports = ReportBuilder(REPORTS_DIR) if GENERATE_REPORTS else None
+    for row_data, log_lines, report in stage.run(tasks):
+        if row_data["policy_id"] != last_policy:
+            last_policy = row_data["policy_id"]
+            print(f"\nPolicy ID: {last_policy}")
+        for line in log_lines:
+            print(line)
+        if report is not None:
+            reports.record(*report)
+        results.append(with_inference_stats(row_data, by_pair.get((row_data["policy_id"], row_data["model"]))))
+
+    unjudged = sum(row.get("unjudged_pairs", 0) for row in results)
+    print(f"\nEvaluated {len(results)} pairs in {time.time() - t0:.1f}s "
+          f"({unjudged} ambiguous pairs without a cached verdict counted as wrong)")
+    print(f"Inference cache: {inference_cache.stats()}")
+    if reports is not None:
+        finish_reports(reports, results)
+    save_results(results, store)
+
+
+def save_results(results, store):
+    """
+    Stores the run's rows in RESULTS_DB, exports RESULTS_CSV and prints the leaderboard.
+    """
+    if not results:
+        print("ERROR: No data found.")
+        store.close()
+        return
+
+    store.add_rows(results)
+    store.finish_run()
+    store.close()
+
+    df = pd.DataFrame(results).drop(columns=["predictions", "decisions", "gt_outcomes", "llm_text_ranges"], errors="ignore")
+
+    # Save Raw Data
+    df.to_csv(RESULTS_CSV, index=False)
+
+    if "ai_f1" in df.columns:
+        print("\n" + "="*60)
+        print("FINAL LEADERBOARD (Sorted by AI F1)")
+        print("="*60)
+
+        # Filter out rows with errors (where ai_f1 might be NaN)
+        valid_df = df[df["ai_f1"].notna()]
+        # Same policies for every model, so the means match their CIs and the paired tests
+        total_policies = valid_df["policy_id"].nunique()
+        valid_df = shared_policy_rows(valid_df, ["ai_f1"])
+        if valid_df["policy_id"].nunique() < total_policies:
+            print(f"Leaderboard over the {valid_df['policy_id'].nunique()} of {total_policies} policies "
+                  f"with results for every model")
+
+        if not valid_df.empty:
+            leaderboard = valid_df.groupby("model")[["f1", "ai_precision", "ai_recall", "ai_f1", "duration_sec"]].mean()
+            if "cost_usd" in valid_df.columns:
+                # Only pairs that actually called the model (inference-cache hits report no usage)
+                billed = valid_df[valid_df["llm_calls"] > 0].groupby("model")
+                leaderboard["tokens_per_sec"] = (billed["completion_tokens"].sum() / billed["llm_latency_sec"].sum()).round(1)
+                leaderboard["usd_per_policy"] = billed["cost_usd"].mean().round(4)
+            leaderboard = leaderboard.sort_values("ai_f1", ascending=False)
+            # 95% policy-bootstrap CI of the mean AI F1; overlapping models may differ only by noise
+            intervals = model_intervals(valid_df, ["ai_f1"], leaderboard.index.tolist())
+            leaderboard = leaderboard.join(intervals[["ai_f1_low", "ai_f1_high"]])
+            print(leaderboard)
+            comparisons = pairwise_tests(valid_df, "ai_f1", leaderboard.index.tolist())
+            if not comparisons.empty:
+                print(f"\nPaired permutation tests on AI F1 ({intervals['ci_policies'].iloc[0]} policies, Holm-corrected):")
+                print(comparisons.to_string(index=False))
+        else:
+            print("No valid results to calculate leaderboard.")
+
+    if "prompt_tokens_in" in df.columns:
+        per_policy = df.drop_duplicates("policy_id")
+        tokens_in, tokens_out = per_policy["prompt_tokens_in"].sum(), per_policy["prompt_tokens_out"].sum()
+        print(f"\nPre-filter: {tokens_in:.0f} -> {tokens_out:.0f} prompt tokens per model "
+              f"({1 - tokens_out / max(tokens_in, 1):.1%} reduction), "
+              f"mean GT coverage {per_policy['prefilter_gt_coverage'].mean():.2%}")
+
+    print(f"\nResults saved to '{RESULTS_DB}' (run {store.run_id}) and '{RESULTS_CSV}'")
+
+
 def main():
+    parser = argparse.ArgumentParser(description="C3PA AI-Judge Benchmark")
+    parser.add_argument("--resume", action="store_true",
+                        help=f"Skip (policy, model) pairs already completed in {JOURNAL_PATH}")
+    parser.add_argument("--evaluate-only", action="store_true",
+                        help="Re-score stored predictions on a process pool, without calling any model")
+    parser.add_argument("--force-reports", action="store_true",
+                        help="Re-render every report, even if its content hash is unchanged")
+    args = parser.parse_args()
+
     load_dotenv()
 
     # Ensure reports directory exists
     if GENERATE_REPORTS:
         os.makedirs(REPORTS_DIR, exist_ok=True)
 
+    if args.evaluate_only:
+        evaluate_only(force_reports=args.force_reports)
+        return
+
     print("--- C3PA AI-Judge Benchmark ---")
     print(f"Models: {MODELS_TO_TEST}")
     print(f"Judge: {JUDGE_MODEL}")
 
-    # 1. Load Data
-    policies = load_c3pa_dataset(DATASET_PATH)
-    if not policies:
-        print("ERROR: No data found.")
-        return
+    set_provider_concurrency(PROVIDER_CONCURRENCY)
+    set_provider_rate_limits(PROVIDER_RATE_LIMITS)
+    set_retry_policy(max_retries=MAX_RETRIES)
+    configure_mock(dataset_path=DATASET_PATH, corpus_path=CORPUS_PATH, **MOCK_SETTINGS)
+    record_responses(RECORD_RESPONSES_PATH)
+
+    store = ResultsStore(RESULTS_DB)
+    store.start_run("benchmark", run_config("benchmark"))
+
+    telemetry = TelemetryAggregator(MODEL_PRICING)
+    telemetry_sink = JsonlTelemetrySink(TELEMETRY_PATH)
+    set_telemetry_sinks([telemetry_sink, telemetry, store])
+
+    # 1. Select Data (policies are read lazily, one at a time, as they are scheduled)
+    policies = iter_c3pa_dataset(
+        DATASET_PATH,
+        exclude_ids=IGNORED_POLICIES,
+        head=TEST_LIMIT,
+        corpus_path=CORPUS_PATH
+    )
 
     # 2. Initialize Evaluators
-    strict_evaluator = Evaluator() # Standard F1/Exact Match
-    visualizer = HTMLVisualizer()
+    strict_evaluator = Evaluator(match_threshold=STRICT_MATCH_THRESHOLD, backend=MATCHING_BACKEND) # Standard F1/Exact Match
+    reports = ReportBuilder(REPORTS_DIR, HTMLVisualizer(), force=args.force_reports)
+    inference_cache = InferenceCache(CACHE_PATH, max_size_mb=CACHE_MAX_MB, refresh=CACHE_REFRESH)
 
     ai_evaluator = None
     try:
         judge_client = LLMClient(JUDGE_MODEL)
-        ai_evaluator = AIEvaluator(judge_client)
+        ai_evaluator = AIEvaluator(
+            judge_client,
+            judge_cache=JudgeCache(JUDGE_CACHE_DIR),
+            judge_mode=JUDGE_MODE,
+            batch_size=JUDGE_BATCH_SIZE,
+            backend=MATCHING_BACKEND,
+            containment_threshold=CONTAINMENT_THRESHOLD,
+            judge_threshold=JUDGE_THRESHOLD
+        )
         print("   > AI Judge initialized.")
     except Exception as e:
         print(f"CRITICAL: AI Judge init failed: {e}")
         return
 
-    results = []
+    # One annotator (client + system prompt) per model, shared by all policies
+    try:
+        annotators = {
+            model_name: PrivacyPolicyAnnotator(
+                model_name=model_name,
+                cache=inference_cache,
+                chunk_tokens=CHUNK_TOKENS,
+                chunk_overlap=CHUNK_OVERLAP_TOKENS,
+                chunk_workers=CHUNK_WORKERS
+            )
+            for model_name in MODELS_TO_TEST
+        }
+    except Exception as e:
+        print(f"CRITICAL: Annotator init failed: {e}")
+        return
 
-    # 3. Processing Loop
-    for i, pol in enumerate(policies):
-        if TEST_LIMIT and i >= TEST_LIMIT:
-            break
+    relevance_filter = build_relevance_filter()
 
-        # Skip ignored policies
-        if pol['id'] in IGNORED_POLICIES:
-            print(f"\n[{i + 1}/{len(policies)}] Policy ID: {pol['id']} - IGNORED")
-            continue
+    journal = ResultsJournal(JOURNAL_PATH, resume=args.resume)
+    completed = journal.completed_pairs() if args.resume else set()
+    if completed:
+        print(f"Resuming: {len(completed)} completed runs found in '{JOURNAL_PATH}'")
 
-        print(f"\n[{i + 1}/{len(policies)}] Policy ID: {pol['id']}")
+    # 3. Job generator (policy-major, model-minor: same order as a sequential run)
+    def generate_jobs():
+        for pol in policies:
+            if not pol.get('ground_truth'):
+                print(f"Policy ID: {pol['id']} - Skipping (No Ground Truth)")
+                continue
 
-        ground_truth = pol.get('ground_truth', [])
-        if not ground_truth:
-            print("   > Skipping (No Ground Truth)")
-            continue
+            pending_models = [m for m in MODELS_TO_TEST if (pol['id'], m) not in completed]
+            if not pending_models:
+                continue
 
-        for model_name in MODELS_TO_TEST:
-            print(f"   > Testing {model_name}...", end=" ", flush=True)
+            if relevance_filter is not None:
+                # Filter once per policy; reports still render against the full text
+                pol = apply_prefilter(pol, relevance_filter)
 
-            try:
-                # A. Inference
-                annotator = PrivacyPolicyAnnotator(model_name=model_name)
-                t0 = time.time()
-                llm_preds = annotator.annotate(pol['text'])
-                duration = time.time() - t0
-                print(f"Done ({len(llm_preds)} preds in {duration:.1f}s)")
-
-                # B. Standard Metrics (Reference)
-                strict_metrics = strict_evaluator.compare_annotations(ground_truth, llm_preds)
-
-                # C. AI Judging (Returns Metrics AND Decision Map)
-                # This uses the logic: Filter by Label -> Filter by Overlap -> Ask LLM
-                ai_metrics, ai_decisions, missed_gts = ai_evaluator.evaluate_batch(ground_truth, llm_preds)
-
-                # D. Combine & Save
-                row_data = strict_metrics.copy()
-                row_data.update({
-                    "policy_id": pol['id'],
-                    "model": model_name,
-                    "duration_sec": round(duration, 2),
-                    "ai_precision": ai_metrics["precision"],
-                    "ai_recall": ai_metrics["recall"],
-                    "ai_f1": ai_metrics["f1"]
-                })
-                results.append(row_data)
-
-                print(f"     > Strict F1: {strict_metrics['f1']:.2f}")
-                print(f"     > AI Stats : P={ai_metrics['precision']} | R={ai_metrics['recall']} | F1={ai_metrics['f1']}")
-
-                # E. Visualization
-                if GENERATE_REPORTS:
-                    # Sanitize filename
-                    safe_name = model_name.replace(":", "_").replace("/", "_")
-                    fname = os.path.join(REPORTS_DIR, f"{pol['id']}_{safe_name}.html")
-
-                    visualizer.generate_report(
-                        policy_id=pol['id'],
-                        full_text=pol['text'],
-                        human_anns=ground_truth,
-                        llm_anns=llm_preds,
-                        filename=fname,
-                        ai_decisions=ai_decisions, # Pass the detailed judge results for coloring
-                        missed_gts=missed_gts
-                    )
-
-            except Exception as e:
-                print(f"\n     > FAILED: {e}")
-                results.append({"model": model_name, "error": str(e)})
-
-    # 4. Final Leaderboard
-    if results:
-        df = pd.DataFrame(results)
-
-        # Save Raw Data
-        df.to_csv("benchmark_full_results.csv", index=False)
-
-        if "ai_f1" in df.columns:
-            print("\n" + "="*60)
-            print("FINAL LEADERBOARD (Sorted by AI F1)")
-            print("="*60)
-
-            # Filter out rows with errors (where ai_f1 might be NaN)
-            valid_df = df[df["ai_f1"].notna()]
-
-            if not valid_df.empty:
-                leaderboard = valid_df.groupby("model")[["f1", "ai_precision", "ai_recall", "ai_f1", "duration_sec"]].mean()
-                leaderboard = leaderboard.sort_values("ai_f1", ascending=False)
-                print(leaderboard)
-            else:
-                print("No valid results to calculate leaderboard.")
-
-        print("\nResults saved to 'benchmark_full_results.csv'")
+            # Tokenize the ground truth once and share it across all models
+            gt_index = GroundTruthIndex.from_annotations(pol['ground_truth'])
+            for model_name in pending_models:
+                yield run_pair, (pol, annotators[model_name], strict_evaluator, ai_evaluator, reports, gt_index, telemetry)
+
+    print(f"\nRunning on {MAX_WORKERS} workers (caps: {PROVIDER_CONCURRENCY})")
+
+    # 4. Processing Loop (concurrent, results consumed in job order)
+    scheduler = BenchmarkScheduler(max_workers=MAX_WORKERS)
+    last_policy = None
+    try:
+        for row_data, log_lines in scheduler.run(generate_jobs()):
+            if row_data["policy_id"] != last_policy:
+                last_policy = row_data["policy_id"]
+                print(f"\nPolicy ID: {last_policy}")
+            for line in log_lines:
+                print(line)
+            journal.append(row_data)
+    except KeyboardInterrupt:
+        print("\nInterrupted. Completed runs are saved; continue with `python main.py --resume`.")
+    finally:
+        journal.close()
+        telemetry_sink.close()
+        record_responses(None)
+        close_llm_clients()
+
+    # 5. Everything below is rebuilt from the journal (including rows from earlier, resumed runs)
+    results = journal.rows()
+    if not results:
+        print("ERROR: No data found.")
+        store.close()
+        return
+
+    print(f"\nInference cache: {inference_cache.stats()}")
+    print(f"Judge cache: {ai_evaluator.judge_cache.stats()}")
+    print(f"Judge calls ({JUDGE_MODE}): {ai_evaluator.judge_stats}")
+    for model_name, annotator in annotators.items():
+        print(f"Token usage {model_name}: {annotator.client.usage_stats()}")
+        print(f"Parsing {model_name}: {annotator.parse_stats}")
+    print(f"Token usage {JUDGE_MODEL} (judge): {judge_client.usage_stats()}")
+    print(f"Rate limiters: {rate_limiter_stats()}")
+    judge_usage = telemetry.totals(stage="judge")
+    print(f"Judge cost this run: ${judge_usage['cost_usd']:.4f} over {judge_usage['calls']} calls")
+
+    if GENERATE_REPORTS:
+        finish_reports(reports, results)
+
+    # 6. Final Leaderboard
+    save_results(results, store)
 
 if __name__ == "__main__":
     main()
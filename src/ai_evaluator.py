@@ -1,4 +1,7 @@
-import string
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 from deepeval.metrics import GEval
 from deepeval.models.base_model import DeepEvalBaseLLM
@@ -6,6 +9,32 @@ from deepeval.test_case import LLMTestCase, LLMTestCaseParams
 from tqdm import tqdm
 
 from src.llm_client import LLMClient
+from src.cache import JudgeCache
+from src.gt_index import GroundTruthIndex, containment_score
+from src.utils import normalize_text
+
+# Revised criteria to support one-to-many and containment
+GEVAL_CRITERIA = (
+    "Compare the Actual Output (AI Prediction) with the Expected Output (Ground Truth). "
+    "1. If the Actual Output contains the Expected Output (even if it has extra text), it is CORRECT. "
+    "2. If the Actual Output is a list/table and the Expected Output is one item from that list, it is CORRECT. "
+    "3. If the Actual Output is a substring of the Expected Output that preserves the main meaning, it is CORRECT."
+)
+
+# GEval generates evaluation steps and then scores the case: at least two LLM calls per pair
+GEVAL_CALLS_PER_PAIR = 2
+GEVAL_THRESHOLD = 0.6
+
+BATCH_JUDGE_PROMPT = (
+    "You are judging whether AI-extracted privacy policy spans match human-annotated ground truth spans.\n"
+    "Apply these criteria to every pair independently:\n"
+    f"{GEVAL_CRITERIA}\n\n"
+    "For each pair, give a score from 0 to 10 (10 = fully equivalent under the criteria) "
+    "and one sentence of reasoning.\n"
+    "Return a JSON object of the form:\n"
+    '{"verdicts": [{"id": 0, "score": 8, "reasoning": "..."}]}\n'
+    "Include exactly one verdict per pair id."
+)
 
 
 class CustomDeepEvalLLM(DeepEvalBaseLLM):
@@ -25,52 +54,61 @@ class CustomDeepEvalLLM(DeepEvalBaseLLM):
         return self.client.get_completion(messages)
 
     async def a_generate(self, prompt: str) -> str:
-        # For async calls, we just use the sync version for now
-        return self.generate(prompt)
+        messages = [{"role": "user", "content": prompt}]
+        return await self.client.aget_completion(messages)
 
     def get_model_name(self):
         return self.client.model
 
 
-def normalize_text(text: str) -> str:
-    """
-    Normalizes text for comparison: lowercases, removes punctuation, reduces whitespace.
-    Returns a clean string.
-    """
-    if not text: return ""
-    # Remove punctuation
-    translator = str.maketrans(string.punctuation, ' ' * len(string.punctuation))
-    text = text.translate(translator).lower()
-    # Remove extra whitespace
-    return " ".join(text.split())
-
-
 def check_containment(pred_text: str, gt_text: str) -> float:
     """
     Returns the percentage of GT tokens found in Pred text (Recall).
     """
     p_norm = normalize_text(pred_text)
     g_norm = normalize_text(gt_text)
+    return containment_score(p_norm, set(p_norm.split()), g_norm, g_norm.split())
 
-    if not g_norm: return 0.0
-    if g_norm in p_norm: return 1.0  # Exact substring match
-
-    # Token-based check for fuzzy containment
-    p_tokens = set(p_norm.split())
-    g_tokens = g_norm.split()
 
-    if not g_tokens: return 0.0
-
-    found = sum(1 for t in g_tokens if t in p_tokens)
-    return found / len(g_tokens)
+def gt_outcomes(true_labels: list, found_gt_indices: set) -> List[Dict[str, object]]:
+    """
+    One {"label", "found"} entry per GT item, in GT order (the per-label recall counterpart of the decision map).
+    """
+    return [{"label": gt.get("label", "") if isinstance(gt, dict) else "", "found": i in found_gt_indices}
+            for i, gt in enumerate(true_labels)]
 
 
 class AIEvaluator:
-    def __init__(self, client: LLMClient):
+    def __init__(self, client: LLMClient, judge_cache: Optional[JudgeCache] = None,
+                 judge_mode: str = "geval", batch_size: int = 20, backend: str = "index",
+                 containment_threshold: float = 0.9, judge_threshold: float = 0.4):
+        """
+        judge_mode: "geval" runs one DeepEval GEval chain per ambiguous pair.
+                    "batch" packs up to batch_size ambiguous pairs of a policy into one structured-output call.
+                    "cache" makes no LLM calls: verdicts come from the judge cache (either engine's), and
+                    pairs never judged before count as rejected (tallied in judge_stats["unjudged"]).
+        backend: "index" scores containment per candidate pair, "matrix" scores all pairs at once with NumPy.
+        containment_threshold: Containment (either direction) at which a pair matches without the judge.
+        judge_threshold: Containment above which a non-matching pair is sent to the judge.
+        """
+        if judge_mode not in ("geval", "batch", "cache"):
+            raise ValueError(f"Unknown judge_mode: {judge_mode}")
+        if backend not in ("index", "matrix"):
+            raise ValueError(f"Unknown backend: {backend}")
+
         self.client = client
+        self.judge_cache = judge_cache
+        self.judge_mode = judge_mode
+        self.batch_size = max(1, batch_size)
+        self.backend = backend
+        self.containment_threshold = containment_threshold
+        self.judge_threshold = judge_threshold
         self._cache = {}
         self.deepeval_model = CustomDeepEvalLLM(client)
 
+        self._stats_lock = threading.Lock()
+        self.judge_stats = {"pairs_judged": 0, "judge_calls": 0, "calls_saved": 0, "unjudged": 0}
+
     def _get_val(self, item, keys):
         if not isinstance(item, dict): return str(item)
         for k in keys:
@@ -86,71 +124,43 @@ class AIEvaluator:
             if l1 in l2 or l2 in l1: return True
         return False
 
-    def evaluate_batch(self, true_labels: list, pred_labels: list) -> tuple:
+    def evaluate_batch(self, true_labels: list, pred_labels: list, gt_index: Optional[GroundTruthIndex] = None,
+                       return_outcomes: bool = False) -> tuple:
         """
+        gt_index: Optional pre-built index over true_labels, so it can be shared across models.
+
         Returns:
             metrics (dict): {'precision': 0.8, ...}
             decision_map (list): List of dicts with detailed status for every prediction.
             missed_gts (list): List of GT items that were not matched.
+            gt_outcomes (list): Only with return_outcomes=True: gt_outcomes() of every GT item.
         """
-        if not pred_labels and not true_labels:
-            return {"precision": 1.0, "recall": 1.0, "f1": 1.0}, [], []
         if not pred_labels:
-            return {"precision": 0.0, "recall": 0.0, "f1": 0.0}, [], true_labels
+            metrics = {"precision": 1.0, "recall": 1.0, "f1": 1.0} if not true_labels else {"precision": 0.0, "recall": 0.0, "f1": 0.0}
+            result = (metrics, [], list(true_labels))
+            return result + (gt_outcomes(true_labels, set()),) if return_outcomes else result
 
         decision_map = []
         found_gt_indices = set()
         tp_preds = 0
 
-        # --- EVALUATION LOOP ---
-        for pred in tqdm(pred_labels, desc="Evaluating", unit="pred", leave=False):
-            p_text = self._get_val(pred, ['text', 'span', 'segment'])
-            p_label = self._get_val(pred, ['category', 'label', 'type'])
+        # --- PASS 1: DETERMINISTIC SCORING ---
+        scored_preds, judge_queue = self._score_predictions(true_labels, pred_labels, gt_index)
 
-            # Find all compatible GTs (Label Match)
-            potential_gts = []
-            for i, gt in enumerate(true_labels):
-                gt_label = self._get_val(gt, ['category', 'label', 'type'])
-                if self._are_labels_compatible(gt_label, p_label):
-                    potential_gts.append((i, gt))
+        # --- PASS 2: AI JUDGE ---
+        verdicts = self._judge_pairs(judge_queue)
 
+        # --- PASS 3: DECISION LOGIC ---
+        for p_text, p_label, candidates, best_match_score, closest_gt_text in scored_preds:
             matched_gts_for_this_pred = []
-            best_match_score = 0.0
-            closest_gt_text = None
 
             # Temp storage to capture reasoning if needed
             ai_reasoning_map = {}
             ai_rejection_reasons = []  # Store reasons why AI rejected matches
 
-            # CHECK AGAINST ALL CANDIDATES
-            for i, gt in potential_gts:
-                gt_text = self._get_val(gt, ['text', 'span', 'segment'])
-
-                # Check 1: Strict Containment (Recall focus)
-                # Does the Prediction contain the GT? (Fixes "Big Block" issue)
-                recall_score = check_containment(p_text, gt_text)
-
-                # Check 2: Reverse Containment (Precision focus)
-                # Is the Prediction a substring of the GT?
-                precision_score = check_containment(gt_text, p_text)
-
-                # Track closest match for reporting (debugging)
-                avg_score = (recall_score + precision_score) / 2
-                if avg_score > best_match_score:
-                    best_match_score = avg_score
-                    closest_gt_text = gt_text
-
-                match_type = None
-
-                # A. Direct Matches (Deterministic)
-                if recall_score >= 0.9:  # GT is fully inside Prediction
-                    match_type = "CORRECT_CONTAINMENT"
-                elif precision_score >= 0.9:  # Prediction is fully inside GT
-                    match_type = "CORRECT_SUBSTRING"
-
-                # B. AI Judge (Only if not a direct match, but close)
-                elif recall_score > 0.4 or precision_score > 0.4:
-                    is_ai_match, _, reasoning = self._geval_judge(p_text, gt_text, p_label)
+            for i, gt, gt_text, match_type in candidates:
+                if match_type == "JUDGE":
+                    is_ai_match, _, reasoning = verdicts[(p_text, gt_text, p_label)]
                     if is_ai_match:
                         match_type = "CORRECT_AI"
                         ai_reasoning_map[i] = reasoning
@@ -160,11 +170,10 @@ class AIEvaluator:
                             "gt_text": gt_text,
                             "reasoning": reasoning
                         })
+                        continue
 
-                if match_type:
-                    matched_gts_for_this_pred.append((i, gt, match_type))
+                matched_gts_for_this_pred.append((i, gt, match_type))
 
-            # --- DECISION LOGIC ---
             if matched_gts_for_this_pred:
                 tp_preds += 1
 
@@ -235,15 +244,296 @@ class AIEvaluator:
 
         missed_gts = [gt for i, gt in enumerate(true_labels) if i not in found_gt_indices]
 
+        if return_outcomes:
+            return metrics, decision_map, missed_gts, gt_outcomes(true_labels, found_gt_indices)
         return metrics, decision_map, missed_gts
 
+    def _score_predictions(self, true_labels: list, pred_labels: list,
+                           gt_index: Optional[GroundTruthIndex] = None) -> Tuple[list, List[Tuple[str, str, str]]]:
+        """
+        Deterministic pass: for every prediction, scores the label-compatible GTs and collects
+        the ambiguous (pred_text, gt_text, label) pairs that need the judge.
+        """
+        if gt_index is None:
+            gt_index = GroundTruthIndex.from_annotations(true_labels)
+
+        p_texts = [self._get_val(pred, ['text', 'span', 'segment']) for pred in pred_labels]
+        p_norms = [normalize_text(t) for t in p_texts]
+        p_token_lists = [n.split() for n in p_norms]
+
+        recall_matrix = precision_matrix = None
+        if self.backend == "matrix":
+            recall_matrix, precision_matrix = gt_index.overlap_matrix().containment(p_norms, p_token_lists)
+
+        scored_preds = []
+        judge_queue = []
+        for p_idx, pred in enumerate(pred_labels):
+            p_text = p_texts[p_idx]
+            p_label = self._get_val(pred, ['category', 'label', 'type'])
+
+            p_norm = p_norms[p_idx]
+            p_tokens = p_token_lists[p_idx]
+
+            # Find compatible GTs (Label Match) that share tokens with the prediction;
+            # all other GTs score 0 on both containment checks.
+            compatible = gt_index.compatible_indices(p_label, self._are_labels_compatible)
+
+            if recall_matrix is not None:
+                recall_row = recall_matrix[p_idx].tolist()
+                precision_row = precision_matrix[p_idx].tolist()
+                scored_gts = [
+                    (i, recall_row[i], precision_row[i]) for i in sorted(compatible)
+                    if recall_row[i] > 0 or precision_row[i] > 0
+                ]
+            else:
+                # Check 1: Strict Containment (Recall focus)
+                # Does the Prediction contain the GT? (Fixes "Big Block" issue)
+                # Check 2: Reverse Containment (Precision focus)
+                # Is the Prediction a substring of the GT?
+                p_token_set = set(p_tokens)
+                scored_gts = [
+                    (i,
+                     containment_score(p_norm, p_token_set, gt_index.norm_texts[i], gt_index.norm_tokens[i]),
+                     containment_score(gt_index.norm_texts[i], gt_index.norm_sets[i], p_norm, p_tokens))
+                    for i in gt_index.containment_candidates(compatible, p_tokens)
+                ]
+
+            best_match_score = 0.0
+            closest_gt_text = None
+            candidates = []
+
+            # CHECK AGAINST ALL CANDIDATES
+            for i, recall_score, precision_score in scored_gts:
+                gt = true_labels[i]
+                gt_text = gt_index.texts[i]
+
+                # Track closest match for reporting (debugging)
+                avg_score = (recall_score + precision_score) / 2
+                if avg_score > best_match_score:
+                    best_match_score = avg_score
+                    closest_gt_text = gt_text
+
+                match_type = None
+
+                # A. Direct Matches (Deterministic)
+                if recall_score >= self.containment_threshold:  # GT is fully inside Prediction
+                    match_type = "CORRECT_CONTAINMENT"
+                elif precision_score >= self.containment_threshold:  # Prediction is fully inside GT
+                    match_type = "CORRECT_SUBSTRING"
+
+                # B. AI Judge (Only if not a direct match, but close)
+                elif recall_score > self.judge_threshold or precision_score > self.judge_threshold:
+                    match_type = "JUDGE"
+                    judge_queue.append((p_text, gt_text, p_label))
+
+                if match_type:
+                    candidates.append((i, gt, gt_text, match_type))
+
+            scored_preds.append((p_text, p_label, candidates, best_match_score, closest_gt_text))
+
+        return scored_preds, judge_queue
+
+    def prejudge(self, true_labels: list, pred_labels: list, gt_index: Optional[GroundTruthIndex] = None) -> None:
+        """
+        Judges the ambiguous pairs of some predictions ahead of evaluate_batch (e.g. while the rest of the
+        output is still streaming). Verdicts land in the judge caches, so evaluate_batch reuses them.
+        """
+        if not pred_labels:
+            return
+        _, judge_queue = self._score_predictions(true_labels, pred_labels, gt_index)
+        self._judge_pairs(judge_queue)
+
+    def _judge_pairs(self, pairs: List[Tuple[str, str, str]]) -> Dict[Tuple[str, str, str], tuple]:
+        """
+        Judges (pred_text, gt_text, label) pairs with the configured engine.
+        Returns a dict mapping each pair to (is_match, score, reasoning).
+        """
+        unique_pairs = list(dict.fromkeys(pairs))
+        if not unique_pairs:
+            return {}
+
+        if self.judge_mode == "batch":
+            return self._batch_judge(unique_pairs)
+        if self.judge_mode == "cache":
+            return self._cached_verdicts(unique_pairs)
+
+        verdicts = {}
+        for pair in tqdm(unique_pairs, desc="Judging", unit="pair", leave=False):
+            verdicts[pair] = self._geval_judge(*pair)
+        return verdicts
+
+    def _batch_judge(self, pairs: List[Tuple[str, str, str]]) -> Dict[Tuple[str, str, str], tuple]:
+        """
+        Scores many pairs per LLM call. Cached verdicts are reused; the rest are sent in chunks of batch_size.
+        Pairs another thread is already judging are awaited after our own chunks instead of being sent twice.
+        """
+        verdicts = {}
+        pending = []
+        in_flight = {}
+        for pair in pairs:
+            cached = self._lookup_verdict(pair, BATCH_JUDGE_PROMPT)
+            if cached is not None:
+                verdicts[pair] = cached
+                continue
+            event = self._claim_verdict(pair, BATCH_JUDGE_PROMPT)
+            if event is not None:
+                in_flight[pair] = event
+                continue
+            # It may have been stored between our lookup and the claim
+            cached = self._lookup_verdict(pair, BATCH_JUDGE_PROMPT)
+            if cached is not None:
+                verdicts[pair] = cached
+                self._release_verdict(pair, BATCH_JUDGE_PROMPT)
+            else:
+                pending.append(pair)
+
+        try:
+            calls = self._send_batches(pending, verdicts)
+        finally:
+            for pair in pending:
+                self._release_verdict(pair, BATCH_JUDGE_PROMPT)
+
+        with self._stats_lock:
+            self.judge_stats["pairs_judged"] += len(pending)
+            self.judge_stats["judge_calls"] += calls
+            self.judge_stats["calls_saved"] += len(pending) * GEVAL_CALLS_PER_PAIR - calls
+
+        unresolved = []
+        for pair, event in in_flight.items():
+            event.wait()
+            cached = self._lookup_verdict(pair, BATCH_JUDGE_PROMPT)
+            if cached is not None:
+                verdicts[pair] = cached
+            else:
+                # The other thread got no verdict for it, so judge it ourselves
+                unresolved.append(pair)
+        if unresolved:
+            verdicts.update(self._batch_judge(unresolved))
+
+        return verdicts
+
+    def _send_batches(self, pending: List[Tuple[str, str, str]], verdicts: Dict[Tuple[str, str, str], tuple]) -> int:
+        """
+        Judges the pending pairs in chunks of batch_size, filling verdicts. Returns the number of LLM calls made.
+        """
+        calls = 0
+        for start in range(0, len(pending), self.batch_size):
+            chunk = pending[start:start + self.batch_size]
+            calls += 1
+
+            lines = []
+            for pair_id, (pred_text, gt_text, label) in enumerate(chunk):
+                lines.append(
+                    f"### Pair {pair_id}\n"
+                    f"Label: {label}\n"
+                    f"Actual Output: {pred_text}\n"
+                    f"Expected Output: {gt_text}\n"
+                )
+
+            raw_response = self.client.classify(
+                BATCH_JUDGE_PROMPT, "\n".join(lines), response_format={"type": "json_object"}
+            )
+            parsed = self.client.parse_json(raw_response) if raw_response else None
+            items = parsed.get("verdicts", []) if isinstance(parsed, dict) else (parsed or [])
+
+            by_id = {}
+            for item in items:
+                if not isinstance(item, dict): continue
+                try:
+                    by_id[int(item.get("id"))] = item
+                except (TypeError, ValueError):
+                    continue
+
+            for pair_id, pair in enumerate(chunk):
+                item = by_id.get(pair_id)
+                if item is None:
+                    # Not cached, so the pair is re-judged on the next run
+                    verdicts[pair] = (False, 0.0, "Error: no verdict returned by batch judge")
+                    continue
+                try:
+                    score = min(max(float(item.get("score", 0)) / 10.0, 0.0), 1.0)
+                except (TypeError, ValueError):
+                    score = 0.0
+                result = (score >= GEVAL_THRESHOLD, score, str(item.get("reasoning", "")))
+                verdicts[pair] = result
+                self._store_verdict(pair, BATCH_JUDGE_PROMPT, result)
+        return calls
+
+    def _cached_verdicts(self, pairs: List[Tuple[str, str, str]]) -> Dict[Tuple[str, str, str], tuple]:
+        """
+        Offline judging: stored GEval or batch verdicts only; unknown pairs are rejected without a call.
+        """
+        verdicts = {}
+        unjudged = 0
+        for pair in pairs:
+            verdict = self._lookup_verdict(pair, GEVAL_CRITERIA) or self._lookup_verdict(pair, BATCH_JUDGE_PROMPT)
+            if verdict is None:
+                unjudged += 1
+                verdict = (False, 0.0, "Unjudged: no cached verdict for this pair")
+            verdicts[pair] = verdict
+
+        with self._stats_lock:
+            self.judge_stats["unjudged"] += unjudged
+        return verdicts
+
+    def _verdict_key(self, pair: Tuple[str, str, str], criteria: str) -> str:
+        pred_text, gt_text, label = pair
+        return JudgeCache.make_key(self.client.model_id, criteria, label, normalize_text(pred_text), normalize_text(gt_text))
+
+    def _claim_verdict(self, pair: Tuple[str, str, str], criteria: str) -> Optional[threading.Event]:
+        """
+        Returns None if this thread should judge the pair, or the event to wait on while another thread does.
+        """
+        if self.judge_cache is None: return None
+        return self.judge_cache.claim(self._verdict_key(pair, criteria))
+
+    def _release_verdict(self, pair: Tuple[str, str, str], criteria: str) -> None:
+        if self.judge_cache is None: return
+        self.judge_cache.release(self._verdict_key(pair, criteria))
+
+    def _lookup_verdict(self, pair: Tuple[str, str, str], criteria: str) -> Optional[tuple]:
+        pred_text, gt_text, label = pair
+        key = (criteria, pred_text, gt_text, label)
+        if key in self._cache: return self._cache[key]
+        if self.judge_cache is None: return None
+
+        verdict = self.judge_cache.get(self._verdict_key(pair, criteria))
+        if verdict is None: return None
+        result = (verdict["is_match"], verdict["score"], verdict["reasoning"])
+        self._cache[key] = result
+        return result
+
+    def _store_verdict(self, pair: Tuple[str, str, str], criteria: str, result: tuple) -> None:
+        pred_text, gt_text, label = pair
+        self._cache[(criteria, pred_text, gt_text, label)] = result
+        if self.judge_cache is None: return
+
+        is_match, score, reasoning = result
+        self.judge_cache.put(
+            self._verdict_key(pair, criteria), {"is_match": is_match, "score": score, "reasoning": reasoning}
+        )
+
     def _geval_judge(self, pred_text: str, gt_text: str, label: str) -> tuple:
         """
         Uses DeepEval's GEval to determine if pred_text is equivalent to gt_text.
         Returns: (is_match: bool, score: float, reasoning: str)
         """
-        key = (pred_text, gt_text, label)
-        if key in self._cache: return self._cache[key]
+        pair = (pred_text, gt_text, label)
+        cached = self._lookup_verdict(pair, GEVAL_CRITERIA)
+        if cached is not None: return cached
+        while True:
+            event = self._claim_verdict(pair, GEVAL_CRITERIA)
+            if event is None: break
+            # Another thread is judging the same pair; reuse its verdict unless it failed
+            event.wait()
+            cached = self._lookup_verdict(pair, GEVAL_CRITERIA)
+            if cached is not None: return cached
+        # It may have been stored between our lookup and the claim
+        cached = self._lookup_verdict(pair, GEVAL_CRITERIA)
+        if cached is not None:
+            self._release_verdict(pair, GEVAL_CRITERIA)
+            return cached
+
         test_case = LLMTestCase(
             input=f"Extract text for label: {label}",
             actual_output=pred_text,
@@ -251,18 +541,12 @@ class AIEvaluator:
         )
 
         try:
-            # Revised criteria to support one-to-many and containment
             metric = GEval(
                 name="Legal Extraction Equivalence",
-                criteria=(
-                    "Compare the Actual Output (AI Prediction) with the Expected Output (Ground Truth). "
-                    "1. If the Actual Output contains the Expected Output (even if it has extra text), it is CORRECT. "
-                    "2. If the Actual Output is a list/table and the Expected Output is one item from that list, it is CORRECT. "
-                    "3. If the Actual Output is a substring of the Expected Output that preserves the main meaning, it is CORRECT."
-                ),
+                criteria=GEVAL_CRITERIA,
                 evaluation_params=[LLMTestCaseParams.INPUT, LLMTestCaseParams.ACTUAL_OUTPUT, LLMTestCaseParams.EXPECTED_OUTPUT],
                 model=self.deepeval_model,
-                threshold=0.6
+                threshold=GEVAL_THRESHOLD
             )
 
             metric.measure(test_case)
@@ -272,8 +556,78 @@ class AIEvaluator:
             is_match = metric.is_successful()
 
             result = (is_match, score, reasoning)
-            self._cache[key] = result
+            self._store_verdict(pair, GEVAL_CRITERIA, result)
+
+            with self._stats_lock:
+                self.judge_stats["pairs_judged"] += 1
+                self.judge_stats["judge_calls"] += GEVAL_CALLS_PER_PAIR
             return result
         except Exception as e:
             print(f"AI Judge Error: {e}")
-            return False, 0.0, f"Error: {str(e)}"
\ No newline at end of file
+            return False, 0.0, f"Error: {str(e)}"
+        finally:
+            self._release_verdict(pair, GEVAL_CRITERIA)
+
+
+class StreamingJudge:
+    """
+    Judges predictions in the background while the annotator is still streaming the rest:
+
+        judge = StreamingJudge(ai_evaluator, ground_truth, gt_index)
+        with judge:
+            for span in annotator.annotate_stream(text):
+                judge.add(span)
+        ai_evaluator.evaluate_batch(ground_truth, spans, gt_index)  # reuses the verdicts
+
+    In batch mode, predictions are grouped (group_size) so judge calls still carry several pairs.
+    Background calls run in a copy of the context the judge was created in (e.g. telemetry tags).
+    """
+
+    def __init__(self, evaluator: AIEvaluator, true_labels: list, gt_index: Optional[GroundTruthIndex] = None,
+                 max_workers: int = 4, group_size: Optional[int] = None):
+        self.evaluator = evaluator
+        self.true_labels = true_labels
+        self.gt_index = gt_index or GroundTruthIndex.from_annotations(true_labels)
+        if group_size is None:
+            group_size = 1 if evaluator.judge_mode == "geval" else max(1, evaluator.batch_size // 4)
+        self.group_size = group_size
+
+        self._context = contextvars.copy_context()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="prejudge")
+        self._pending = []
+        self._futures = []
+
+    def add(self, pred: dict) -> None:
+        self._pending.append(pred)
+        if len(self._pending) >= self.group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._pending: return
+        self._futures.append(self._pool.submit(
+            self._context.copy().run, self.evaluator.prejudge, self.true_labels, self._pending, self.gt_index
+        ))
+        self._pending = []
+
+    def close(self) -> None:
+        """Submits the remaining predictions and waits for all background judging to finish."""
+        self._flush()
+        for future in self._futures:
+            try:
+                future.result()
+            except Exception as e:
+                # evaluate_batch judges the pair again
+                print(f"Pre-judge Error: {e}")
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            for future in self._futures:
+                future.cancel()
+            self._pool.shutdown(wait=True)
+            return False
+        self.close()
+        return False
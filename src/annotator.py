@@ -1,12 +1,65 @@
-from typing import List, Dict
-from .llm_client import LLMClient
+import contextvars
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Iterator, Optional
+from .llm_client import LLMClient, STRUCTURED_OUTPUT_PROVIDERS
 from .config import LABEL_DESCRIPTIONS
-from .utils import parse_llm_json
+from .utils import StreamingJSONArrayParser
+from .schemas import ANNOTATION_RESPONSE_FORMAT, parse_annotations, validate_spans
+from .cache import InferenceCache
+from .chunking import estimate_tokens, split_into_chunks, merge_chunk_annotations
+
+
+USER_PROMPT_TEMPLATE = (
+    "### DOCUMENT START\n\n{text}\n\n### DOCUMENT END\n\n"
+    "Extract all relevant sections as JSON."
+)
+
+REASK_PROMPT = (
+    "Your previous reply could not be used ({error}). Reply again with ONLY the JSON, "
+    "a list of objects with the keys \"label\", \"text\" and \"reasoning\", and nothing else."
+)
+
+
+class AnnotationParseError(ValueError):
+    """The model's response held no usable annotations, even after one re-ask."""
 
 
 class PrivacyPolicyAnnotator:
-    def __init__(self, model_name: str = "openai:gpt-4o"):
+    """
+    Extracts C3PA provisions from a policy with one LLM.
+    Create one instance per model and reuse it (it is thread-safe): the client and the system prompt
+    are built once, and every request starts with the identical system block so that providers'
+    prompt-prefix caching can serve it. Only the user message (the document) varies between calls.
+
+    chunk_tokens:   If set, policies longer than this (estimated) token budget are split on paragraph
+                    boundaries and the chunks are annotated concurrently (None = one call per policy).
+    chunk_overlap:  Tokens shared between consecutive chunks, so provisions on a seam stay intact.
+    chunk_workers:  Max chunks in flight per policy (provider caps still apply).
+    structured_output: Request the provider-native JSON schema format where the provider supports it.
+
+    Responses are validated against schemas.SpanAnnotation. An unusable response is re-asked once;
+    if that fails too, AnnotationParseError is raised instead of returning an empty list.
+    """
+
+    def __init__(self, model_name: str = "openai:gpt-4o", cache: Optional[InferenceCache] = None,
+                 chunk_tokens: Optional[int] = None, chunk_overlap: int = 200, chunk_workers: int = 4,
+                 structured_output: bool = True):
+        self.model_name = model_name
         self.client = LLMClient(model=model_name)
+        self.cache = cache
+        self.system_prompt = self.build_system_prompt()
+
+        self.response_format = None
+        if structured_output and self.client.provider in STRUCTURED_OUTPUT_PROVIDERS:
+            self.response_format = ANNOTATION_RESPONSE_FORMAT
+
+        self._stats_lock = threading.Lock()
+        self.parse_stats = {"responses": 0, "repaired": 0, "reasked": 0, "failed": 0, "invalid_items": 0}
+        self.chunk_tokens = chunk_tokens
+        self.chunk_overlap = chunk_overlap
+        self.chunk_workers = max(1, chunk_workers)
 
     def build_system_prompt(self) -> str:
         prompt = (
@@ -41,12 +94,139 @@ class PrivacyPolicyAnnotator:
         return prompt
 
     def annotate(self, full_policy_text: str) -> List[Dict[str, str]]:
-        system_message = self.build_system_prompt()
+        if not self.chunk_tokens or estimate_tokens(full_policy_text) <= self.chunk_tokens:
+            return self._annotate_text(full_policy_text)
+
+        chunks = split_into_chunks(full_policy_text, self.chunk_tokens, self.chunk_overlap)
+        workers = min(self.chunk_workers, len(chunks))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chunk") as pool:
+            # Each chunk runs in a copy of the caller's context so telemetry tags follow it
+            futures = [pool.submit(contextvars.copy_context().run, self._annotate_text, c["text"]) for c in chunks]
+            chunk_annotations = [f.result() for f in futures]
+
+        return merge_chunk_annotations(chunks, chunk_annotations)
+
+    def annotate_stream(self, full_policy_text: str) -> Iterator[Dict[str, str]]:
+        """
+        Yields each extracted span as soon as the model has finished writing it, so evaluation can start
+        while generation continues. Chunked policies and cache hits are yielded once complete.
+        """
+        if self.chunk_tokens and estimate_tokens(full_policy_text) > self.chunk_tokens:
+            yield from self.annotate(full_policy_text)
+            return
 
-        user_message = (
-            f"### DOCUMENT START\n\n{full_policy_text}\n\n### DOCUMENT END\n\n"
-            "Extract all relevant sections as JSON."
+        cache_key = self._cache_key(full_policy_text)
+        raw_response = self.cache.get(cache_key) if cache_key else None
+        if raw_response is not None:
+            yield from self._parse_response(full_policy_text, raw_response, cache_key=None)
+            return
+
+        user_message = USER_PROMPT_TEMPLATE.format(text=full_policy_text)
+        parser = StreamingJSONArrayParser()
+        parts = []
+        streamed = []
+        invalid = 0
+        for delta in self.client.stream_classify(self.system_prompt, user_message, self.response_format):
+            parts.append(delta)
+            spans, dropped = validate_spans(parser.feed(delta))
+            streamed.extend(spans)
+            invalid += dropped
+            yield from spans
+
+        raw_response = "".join(parts).strip()
+        if streamed:
+            # Validate the whole response like the non-stream path: only cache it if a cache hit would
+            # replay exactly the spans streamed now (not a truncated or malformed response)
+            parsed = parse_annotations(raw_response)
+            self._count(responses=1, repaired=int(parsed["repaired"]), invalid_items=invalid)
+            if cache_key and not parsed["error"] and parsed["spans"] == streamed:
+                self.cache.put(cache_key, self.client.model_id, raw_response)
+            return
+
+        # Nothing could be streamed: parse the whole response (re-asking once if needed)
+        yield from self._parse_response(full_policy_text, raw_response, cache_key)
+
+    def cached_annotations(self, full_policy_text: str) -> Optional[List[Dict[str, str]]]:
+        """
+        The annotations a previous run stored for this text (chunked like annotate()), without calling the
+        model. None if the response, or any chunk's response, is not in the cache.
+        """
+        if self.chunk_tokens and estimate_tokens(full_policy_text) > self.chunk_tokens:
+            chunks = split_into_chunks(full_policy_text, self.chunk_tokens, self.chunk_overlap)
+        else:
+            chunks = [{"index": 0, "start": 0, "end": len(full_policy_text), "text": full_policy_text}]
+
+        chunk_annotations = []
+        for chunk in chunks:
+            cache_key = self._cache_key(chunk["text"])
+            raw_response = self.cache.get(cache_key) if cache_key else None
+            if raw_response is None:
+                return None
+            parsed = parse_annotations(raw_response)
+            if parsed["error"]:
+                return None
+            chunk_annotations.append(parsed["spans"])
+
+        return chunk_annotations[0] if len(chunks) == 1 else merge_chunk_annotations(chunks, chunk_annotations)
+
+    def _cache_key(self, full_policy_text: str) -> Optional[str]:
+        if self.cache is None:
+            return None
+        prompt = self.system_prompt + USER_PROMPT_TEMPLATE
+        if self.response_format:
+            prompt += json.dumps(self.response_format, sort_keys=True)
+        return InferenceCache.make_key(
+            self.client.model_id,
+            prompt,
+            full_policy_text,
+            self.client.temperature
         )
 
-        raw_response = self.client.classify(system_message, user_message)
-        return parse_llm_json(raw_response)
\ No newline at end of file
+    def _count(self, **deltas: int) -> None:
+        with self._stats_lock:
+            for key, value in deltas.items():
+                self.parse_stats[key] += value
+
+    def _annotate_text(self, full_policy_text: str) -> List[Dict[str, str]]:
+        """
+        One (cached) LLM call over a whole policy or a single chunk of it.
+        """
+        cache_key = self._cache_key(full_policy_text)
+        raw_response = self.cache.get(cache_key) if cache_key else None
+
+        if raw_response is None:
+            user_message = USER_PROMPT_TEMPLATE.format(text=full_policy_text)
+            raw_response = self.client.classify(self.system_prompt, user_message, self.response_format)
+            return self._parse_response(full_policy_text, raw_response, cache_key)
+
+        return self._parse_response(full_policy_text, raw_response, cache_key=None)
+
+    def _parse_response(self, full_policy_text: str, raw_response: str, cache_key: Optional[str]) -> List[Dict[str, str]]:
+        """
+        Validates a response, re-asking the model once if it holds no usable annotations.
+        Only usable responses are written to the cache (under cache_key, if given).
+        """
+        parsed = parse_annotations(raw_response)
+        reasked = 0
+        if parsed["error"] and raw_response:
+            # A formatting problem, not a failed call: show the model its reply and ask again
+            reasked = 1
+            messages = [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": USER_PROMPT_TEMPLATE.format(text=full_policy_text)},
+                {"role": "assistant", "content": raw_response},
+                {"role": "user", "content": REASK_PROMPT.format(error=parsed["error"])},
+            ]
+            raw_response = self.client.get_completion(messages, self.response_format)
+            parsed = parse_annotations(raw_response)
+            cache_key = cache_key or self._cache_key(full_policy_text)
+
+        failed = 1 if parsed["error"] else 0
+        self._count(responses=1, repaired=int(parsed["repaired"]), reasked=reasked, failed=failed,
+                    invalid_items=parsed["invalid"])
+        if failed:
+            raise AnnotationParseError(f"{self.model_name}: {parsed['error']}")
+
+        if cache_key:
+            self.cache.put(cache_key, self.client.model_id, raw_response)
+        return parsed["spans"]
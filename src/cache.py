@@ -0,0 +1,229 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict
+
+
+def sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class InferenceCache:
+    """
+    Content-addressed on-disk cache for raw LLM responses, backed by SQLite.
+
+    Entries are keyed on (model, prompt hash, policy text hash, temperature), so a rerun with the
+    same inputs costs no API calls. The least recently used entries are evicted once the stored
+    responses exceed max_size_mb. In refresh mode lookups always miss and new responses overwrite
+    the stored ones.
+    """
+
+    def __init__(self, path: str = "./.cache/inference.sqlite", max_size_mb: float = 512, refresh: bool = False):
+        self.path = path
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.refresh = refresh
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT NOT NULL,"
+            " response TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, prompt: str, policy_text: str, temperature: float) -> str:
+        payload = json.dumps({
+            "model": model,
+            "prompt": sha256_text(prompt),
+            "text": sha256_text(policy_text),
+            "temperature": temperature,
+        }, sort_keys=True)
+        return sha256_text(payload)
+
+    def get(self, key: str) -> Optional[str]:
+        if self.refresh:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return row[0]
+
+    def put(self, key: str, model: str, response: str) -> None:
+        # Empty responses mean the call failed; never cache those
+        if not response:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, len(response.encode("utf-8")), now, now)
+            )
+            self.writes += 1
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_size_bytes:
+            return
+
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed ASC").fetchall()
+        for key, size in rows:
+            if total <= self.max_size_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "size_mb": round(self.size_bytes() / (1024 * 1024), 2),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JudgeCache:
+    """
+    Durable store for AI judge verdicts, shared across runs and models.
+
+    Each verdict lives in its own JSON file, sharded by key prefix (<root>/ab/abcdef....json).
+    Files are written to a temp file and atomically renamed into place, so concurrent worker
+    processes can share the directory without any locking: the same key always maps to the same
+    verdict, and the last writer simply wins.
+
+    Within a process, claim() de-duplicates in-flight judgements: the first thread to miss a key judges
+    it, and the others wait for its put() (or release(), if it failed) instead of paying for the same call.
+    """
+
+    def __init__(self, root: str = "./.cache/judge"):
+        self.root = root
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.waits = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, threading.Event] = {}
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def make_key(judge_model: str, criteria: str, label: str, pred_text: str, gt_text: str) -> str:
+        """
+        pred_text and gt_text should already be normalized, so cosmetic differences between
+        models' spans (case, punctuation, whitespace) map to the same verdict.
+        """
+        payload = json.dumps({
+            "judge": judge_model,
+            "criteria": sha256_text(criteria),
+            "label": label.lower().strip(),
+            "pred": pred_text,
+            "gt": gt_text,
+        }, sort_keys=True)
+        return sha256_text(payload)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                verdict = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return verdict
+
+    def claim(self, key: str) -> Optional[threading.Event]:
+        """
+        Marks key as being judged by the caller. Returns None if the caller now owns it (and must put() or
+        release() it), or the Event that is set once another thread's in-flight judgement of key ends;
+        get() the key again after waiting on it.
+        """
+        with self._lock:
+            event = self._inflight.get(key)
+            if event is None:
+                self._inflight[key] = threading.Event()
+            else:
+                self.waits += 1
+            return event
+
+    def release(self, key: str) -> None:
+        """Ends the caller's claim on key without a verdict (waiters then judge it themselves)."""
+        with self._lock:
+            event = self._inflight.pop(key, None)
+        if event is not None:
+            event.set()
+
+    def put(self, key: str, verdict: Dict) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(verdict, f)
+            os.replace(tmp_path, path)
+            with self._lock:
+                self.writes += 1
+        except OSError as e:
+            print(f"Judge cache write failed: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        finally:
+            self.release(key)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            hits, misses, writes, waits = self.hits, self.misses, self.writes, self.waits
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "writes": writes,
+            "waits": waits,
+        }
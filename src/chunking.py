@@ -0,0 +1,159 @@
+import re
+from typing import List, Dict, Any, Optional, Tuple
+
+# Rough token estimate for English prose (OpenAI's rule of thumb: ~4 characters per token)
+CHARS_PER_TOKEN = 4
+
+_LINE_BREAKS = re.compile(r"\n+")
+_SENTENCE_END = re.compile(r"(?<=[.!?;])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def segment_offsets(text: str, max_chars: int) -> List[Tuple[int, int]]:
+    """
+    Splits text into (start, end) segments on line/paragraph breaks. Segments longer than max_chars
+    are split on sentence ends, and as a last resort cut hard at max_chars.
+    """
+    segments = []
+    start = 0
+    boundaries = [m.end() for m in _LINE_BREAKS.finditer(text)] + [len(text)]
+    for end in boundaries:
+        if end <= start: continue
+        if end - start <= max_chars:
+            segments.append((start, end))
+        else:
+            sentence_start = start
+            for m in _SENTENCE_END.finditer(text, start, end):
+                if m.end() - sentence_start > max_chars:
+                    segments.extend(_hard_cut(sentence_start, m.end(), max_chars))
+                else:
+                    segments.append((sentence_start, m.end()))
+                sentence_start = m.end()
+            if sentence_start < end:
+                segments.extend(_hard_cut(sentence_start, end, max_chars))
+        start = end
+    return segments
+
+
+def _hard_cut(start: int, end: int, max_chars: int) -> List[Tuple[int, int]]:
+    return [(s, min(s + max_chars, end)) for s in range(start, end, max_chars)]
+
+
+def split_into_chunks(text: str, max_tokens: int = 4000, overlap_tokens: int = 200) -> List[Dict[str, Any]]:
+    """
+    Splits a policy into chunks of at most ~max_tokens on section/paragraph boundaries.
+    Consecutive chunks share up to ~overlap_tokens of whole segments, so a provision cut by one
+    chunk seam is seen complete by the neighbouring chunk.
+    Returns [{"index", "start", "end", "text"}] with character offsets into `text`.
+    """
+    max_chars = max(1, max_tokens * CHARS_PER_TOKEN)
+    overlap_chars = min(overlap_tokens * CHARS_PER_TOKEN, max_chars // 2)
+
+    segments = segment_offsets(text, max_chars)
+    if not segments:
+        return []
+
+    chunks = []
+    first = 0      # First segment of the current chunk
+    fresh = 0      # First segment not covered by the previous chunk
+    while fresh < len(segments):
+        # The overlap counts against the budget: drop leading overlap segments until the first new one fits
+        # (a single segment never exceeds max_chars, so every chunk makes progress)
+        while first < fresh and segments[fresh][1] - segments[first][0] > max_chars:
+            first += 1
+
+        size = 0
+        i = first
+        while i < len(segments) and (i == first or size + (segments[i][1] - segments[i][0]) <= max_chars):
+            size += segments[i][1] - segments[i][0]
+            i += 1
+
+        start, end = segments[first][0], segments[i - 1][1]
+        chunks.append({"index": len(chunks), "start": start, "end": end, "text": text[start:end]})
+
+        # Step back over trailing segments to build the overlap for the next chunk
+        next_first = i
+        overlap = 0
+        while next_first - 1 > first and overlap + (segments[next_first - 1][1] - segments[next_first - 1][0]) <= overlap_chars:
+            next_first -= 1
+            overlap += segments[next_first][1] - segments[next_first][0]
+
+        first, fresh = next_first, i
+    return chunks
+
+
+def _locate(chunk: Dict[str, Any], span_text: str, taken: set) -> Optional[Tuple[int, int]]:
+    """
+    Absolute (start, end) of span_text in the chunk (whitespace and case insensitive), skipping
+    occurrences already claimed by an earlier span of the same chunk. None if it cannot be found.
+    """
+    words = span_text.split()
+    if not words:
+        return None
+    pattern = re.compile(r"\s+".join(re.escape(w) for w in words), re.IGNORECASE)
+    for m in pattern.finditer(chunk["text"]):
+        if m.start() not in taken:
+            taken.add(m.start())
+            return chunk["start"] + m.start(), chunk["start"] + m.end()
+    return None
+
+
+def merge_chunk_annotations(chunks: List[Dict[str, Any]], chunk_annotations: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Merges the spans extracted from each chunk (as returned by split_into_chunks), in chunk order.
+
+    Only the seams are de-duplicated: a span from chunk k is merged with a same-label span from chunk k+1
+    when both were located in the policy text, one span's range lies within the other's, and the shorter
+    one touches the characters the two chunks share. The longer span is kept (replacing every truncated
+    piece it covers, at the position of the first). All other repeats, within a chunk or between chunks
+    further apart, are kept as in a single call.
+    """
+    merged: List[Optional[Dict[str, Any]]] = []
+    # (chunk, label, absolute range or None) per merged span
+    origins: List[Tuple[int, str, Optional[Tuple[int, int]]]] = []
+
+    for chunk_idx, (chunk, annotations) in enumerate(zip(chunks, chunk_annotations)):
+        taken: set = set()
+        # Characters shared with the previous chunk
+        seam = (chunk["start"], chunks[chunk_idx - 1]["end"]) if chunk_idx > 0 else None
+
+        for ann in annotations:
+            if not isinstance(ann, dict):
+                continue
+            label = str(ann.get("label", "")).lower().strip()
+            span = _locate(chunk, str(ann.get("text", "")), taken)
+
+            covered = []       # Truncated spans of the previous chunk that this span contains
+            duplicate = False
+            if span is not None and seam is not None and seam[0] < seam[1]:
+                for pos, (other_chunk, other_label, other_span) in enumerate(origins):
+                    if merged[pos] is None or other_chunk != chunk_idx - 1 or other_label != label or other_span is None:
+                        continue
+                    if _within(span, other_span) and _overlaps(span, seam):
+                        duplicate = True
+                        break
+                    if _within(other_span, span) and _overlaps(other_span, seam):
+                        covered.append(pos)
+
+            if duplicate:
+                continue
+            if covered:
+                merged[covered[0]] = ann
+                origins[covered[0]] = (chunk_idx, label, span)
+                for pos in covered[1:]:
+                    merged[pos] = None
+            else:
+                merged.append(ann)
+                origins.append((chunk_idx, label, span))
+    return [ann for ann in merged if ann is not None]
+
+
+def _within(inner: Tuple[int, int], outer: Tuple[int, int]) -> bool:
+    return outer[0] <= inner[0] and inner[1] <= outer[1]
+
+
+def _overlaps(span: Tuple[int, int], seam: Tuple[int, int]) -> bool:
+    return span[0] < seam[1] and seam[0] < span[1]
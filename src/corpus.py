@@ -0,0 +1,261 @@
+import json
+import mmap
+import os
+import struct
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .utils import list_c3pa_sources, read_c3pa_policy
+
+CORPUS_MAGIC = b"C3PACORP"
+CORPUS_VERSION = 1
+DEFAULT_CORPUS_PATH = "./.cache/c3pa_corpus.bin"
+
+_HEADER_LEN = struct.Struct("<Q")
+
+
+def _source_manifest(root_path: str, sources) -> Dict[str, List[int]]:
+    """
+    (mtime_ns, size) of every source file, keyed by path relative to the dataset root.
+    """
+    manifest = {}
+    for _, csv_path, txt_path in sources:
+        for path in (csv_path, txt_path):
+            st = os.stat(path)
+            manifest[os.path.relpath(path, root_path)] = [st.st_mtime_ns, st.st_size]
+    return manifest
+
+
+def compile_corpus(root_path: str, corpus_path: str = DEFAULT_CORPUS_PATH) -> None:
+    """
+    Reads every policy once (selecting the most complete annotator) and writes a single binary corpus file:
+
+        b"C3PACORP" | u64 header length | JSON header | policy records
+
+    The header holds the format version, the source manifest used for staleness checks and, per policy,
+    its id plus the byte offset/length of its record. Each record is compact JSON with the text and the
+    ground truth stored column-wise ({"text", "labels", "spans"}), so a single policy can be decoded
+    from a memory map without touching the others.
+    """
+    sources = list_c3pa_sources(root_path)
+
+    records = []
+    for policy_id, csv_path, txt_path in sources:
+        try:
+            policy = read_c3pa_policy(csv_path, txt_path)
+            if policy is None: continue
+        except Exception as e:
+            print(f"Error processing {os.path.basename(csv_path)}: {e}")
+            continue
+
+        full_text, ground_truth = policy
+        record = {
+            "text": full_text,
+            "labels": [gt["label"] for gt in ground_truth],
+            "spans": [gt["text"] for gt in ground_truth],
+        }
+        records.append((policy_id, json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")))
+
+    index = []
+    offset = 0
+    for policy_id, blob in records:
+        index.append({"id": policy_id, "offset": offset, "length": len(blob)})
+        offset += len(blob)
+
+    header = json.dumps({
+        "version": CORPUS_VERSION,
+        "sources": _source_manifest(root_path, sources),
+        "policies": index,
+    }).encode("utf-8")
+
+    directory = os.path.dirname(corpus_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f"{corpus_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(CORPUS_MAGIC)
+        f.write(_HEADER_LEN.pack(len(header)))
+        f.write(header)
+        for _, blob in records:
+            f.write(blob)
+    os.replace(tmp_path, corpus_path)
+
+
+class CompiledCorpus:
+    """
+    Read-only, memory-mapped view of a compiled corpus file. Policies are decoded on access.
+    """
+
+    def __init__(self, corpus_path: str = DEFAULT_CORPUS_PATH):
+        self.path = corpus_path
+        self._file = open(corpus_path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Corpus file is empty: {corpus_path}")
+
+        if self._map[:len(CORPUS_MAGIC)] != CORPUS_MAGIC:
+            self.close()
+            raise ValueError(f"Not a compiled C3PA corpus: {corpus_path}")
+
+        start = len(CORPUS_MAGIC)
+        (header_len,) = _HEADER_LEN.unpack_from(self._map, start)
+        start += _HEADER_LEN.size
+        self.header = json.loads(self._map[start:start + header_len].decode("utf-8"))
+        self._data_start = start + header_len
+
+        self.version = self.header.get("version")
+        self.ids = [entry["id"] for entry in self.header["policies"]]
+        self._positions = {entry["id"]: i for i, entry in enumerate(self.header["policies"])}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def is_stale(self, root_path: str, sources: Optional[List[Tuple[str, str, str]]] = None) -> bool:
+        """
+        True if the format version changed or any source file was added, removed or modified.
+        With `sources`, only those policies are checked (and must have been listed when the corpus was compiled;
+        policies compile_corpus skipped as unreadable are not stale).
+        """
+        if self.version != CORPUS_VERSION:
+            return True
+        try:
+            if sources is None:
+                return _source_manifest(root_path, list_c3pa_sources(root_path)) != self.header["sources"]
+
+            stored = self.header["sources"]
+            return any(stored.get(path) != stat for path, stat in _source_manifest(root_path, sources).items())
+        except OSError:
+            return True
+
+    def get(self, policy_id: str) -> Optional[Dict[str, Any]]:
+        position = self._positions.get(policy_id)
+        return None if position is None else self._decode(position)
+
+    def _decode(self, position: int) -> Dict[str, Any]:
+        entry = self.header["policies"][position]
+        start = self._data_start + entry["offset"]
+        record = json.loads(self._map[start:start + entry["length"]].decode("utf-8"))
+        return {
+            "id": entry["id"],
+            "text": record["text"],
+            "ground_truth": [{"label": l, "text": t} for l, t in zip(record["labels"], record["spans"])],
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for position in range(len(self.ids)):
+            yield self._decode(position)
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+
+def open_compiled_corpus(root_path: str, corpus_path: str = DEFAULT_CORPUS_PATH,
+                         sources: Optional[List[Tuple[str, str, str]]] = None) -> CompiledCorpus:
+    """
+    Opens the compiled corpus, (re)building it first if it is missing, unreadable or stale.
+    With `sources`, only those policies need to be fresh (see CompiledCorpus.is_stale).
+    """
+    corpus = None
+    if os.path.exists(corpus_path):
+        try:
+            corpus = CompiledCorpus(corpus_path)
+        except (OSError, ValueError) as e:
+            print(f"Compiled corpus unreadable ({e}), rebuilding...")
+
+    if corpus is not None and corpus.is_stale(root_path, sources):
+        print("Compiled corpus is stale, rebuilding...")
+        corpus.close()
+        corpus = None
+
+    if corpus is None:
+        print(f"Compiling C3PA corpus from {root_path} into {corpus_path}...")
+        compile_corpus(root_path, corpus_path)
+        corpus = CompiledCorpus(corpus_path)
+
+    return corpus
+
+
+def load_compiled_dataset(root_path: str, corpus_path: str = DEFAULT_CORPUS_PATH) -> List[Dict[str, Any]]:
+    """
+    Same result as load_c3pa_dataset(root_path), served from the compiled corpus.
+    """
+    print(f"Loading C3PA data from {root_path} (compiled corpus)...")
+    corpus = open_compiled_corpus(root_path, corpus_path)
+    try:
+        dataset = list(corpus)
+    finally:
+        corpus.close()
+    print(f"Successfully loaded {len(dataset)} policy documents.")
+    return dataset
+
+
+def iter_c3pa_dataset(root_path: str, subsets: Tuple[str, ...] = ('DB', 'WS'), ids: Optional[Iterable[str]] = None,
+                      exclude_ids: Optional[Iterable[str]] = None, head: Optional[int] = None,
+                      limit: Optional[int] = None, corpus_path: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily yields policies ({"id", "text", "ground_truth"}) one at a time.
+
+    All selection happens on the file listing, before any policy is read:
+        subsets:     Which C3PA subsets to list ("DB", "WS").
+        ids:         Only these policy IDs (e.g. "DB_12").
+        exclude_ids: Skip these policy IDs.
+        head:        Only the first `head` listed policies, counted before exclusions
+                     (the semantics of main.TEST_LIMIT).
+        limit:       Stop after yielding `limit` policies.
+
+    With corpus_path, records are decoded from the compiled corpus, which is (re)built first if it is missing
+    or stale for the selected policies. If it cannot be built, the source files are read directly.
+    """
+    sources = list_c3pa_sources(root_path, subsets)
+    if head:
+        sources = sources[:head]
+    if ids is not None:
+        wanted = set(ids)
+        sources = [src for src in sources if src[0] in wanted]
+    if exclude_ids:
+        excluded = set(exclude_ids)
+        sources = [src for src in sources if src[0] not in excluded]
+
+    corpus = None
+    if corpus_path:
+        try:
+            corpus = open_compiled_corpus(root_path, corpus_path, sources)
+        except (OSError, ValueError) as e:
+            print(f"Compiled corpus unavailable ({e}), reading the source files")
+
+    yielded = 0
+    try:
+        for policy_id, csv_path, txt_path in sources:
+            if limit and yielded >= limit:
+                break
+
+            if corpus is not None:
+                policy = corpus.get(policy_id)
+                # Skipped by compile_corpus (no label/text columns or unreadable)
+                if policy is None: continue
+            else:
+                try:
+                    loaded = read_c3pa_policy(csv_path, txt_path)
+                except Exception as e:
+                    print(f"Error processing {os.path.basename(csv_path)}: {e}")
+                    continue
+                if loaded is None: continue
+                policy = {"id": policy_id, "text": loaded[0], "ground_truth": loaded[1]}
+
+            yielded += 1
+            yield policy
+    finally:
+        if corpus is not None:
+            corpus.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    data_root = sys.argv[1] if len(sys.argv) > 1 else "./data"
+    target = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_CORPUS_PATH
+    open_compiled_corpus(data_root, target).close()
+    print(f"Corpus ready: {os.path.abspath(target)}")
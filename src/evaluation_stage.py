@@ -0,0 +1,175 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .ai_evaluator import AIEvaluator
+from .annotator import PrivacyPolicyAnnotator
+from .cache import JudgeCache
+from .evaluator import Evaluator
+from .gt_index import GroundTruthIndex
+from .llm_client import LLMClient
+from .report_build import ReportBuilder
+from .visualizer import report_filename
+
+# Evaluators of the current worker process, built once by _init_worker
+_worker: Dict[str, Any] = {}
+
+# Journal fields describing the inference run (not the scoring), carried over when a pair is re-scored
+INFERENCE_FIELDS = (
+    "duration_sec", "llm_calls", "prompt_tokens", "completion_tokens", "cached_tokens", "llm_latency_sec", "cost_usd",
+    "prompt_tokens_in", "prompt_tokens_out", "prefilter_gt_coverage", "llm_text_ranges",
+)
+
+
+def with_inference_stats(row: Dict[str, Any], journal_row: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    The re-scored row plus the inference stats of its journal row. Everything else in the journal row
+    (old metrics, an error from a failed attempt) is replaced by the new scoring.
+    """
+    if not journal_row or journal_row.get("error"):
+        return row
+    stats = {k: journal_row[k] for k in INFERENCE_FIELDS if k in journal_row}
+    return dict(stats, **row)
+
+
+def stored_prediction_tasks(policies: Iterable[Dict[str, Any]], models: List[str],
+                            journal_rows: Optional[List[Dict[str, Any]]] = None,
+                            annotators: Optional[Dict[str, PrivacyPolicyAnnotator]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    One evaluation task per (policy, model) with stored predictions, without calling any model:
+    the predictions journaled with the row, else the annotator's cached response for the text it was sent
+    (pol['llm_text'] if the pre-filter was on). Pairs with neither are reported and skipped.
+    """
+    journaled = {
+        (row["policy_id"], row["model"]): row["predictions"]
+        for row in journal_rows or [] if row.get("predictions") is not None and not row.get("error")
+    }
+
+    for pol in policies:
+        if not pol.get('ground_truth'):
+            continue
+        for model_name in models:
+            preds = journaled.get((pol['id'], model_name))
+            if preds is None and annotators and model_name in annotators:
+                preds = annotators[model_name].cached_annotations(pol.get('llm_text', pol['text']))
+            if preds is None:
+                print(f"Policy ID: {pol['id']} - No stored predictions for {model_name}, skipping")
+                continue
+            yield {
+                "policy_id": pol['id'],
+                "model": model_name,
+                "text": pol['text'],
+                "ground_truth": pol['ground_truth'],
+                "predictions": preds,
+            }
+
+
+def _init_worker(settings: Dict[str, Any]) -> None:
+    judge_cache = JudgeCache(settings["judge_cache_dir"]) if settings["judge_cache_dir"] else None
+    _worker["strict"] = Evaluator(match_threshold=settings["match_threshold"], backend=settings["backend"])
+    _worker["ai"] = AIEvaluator(
+        LLMClient(settings["judge_model"]),
+        judge_cache=judge_cache,
+        judge_mode="cache",
+        backend=settings["backend"],
+        containment_threshold=settings["containment_threshold"],
+        judge_threshold=settings["judge_threshold"],
+    )
+    # Decides against the manifest as it was when the stage started; the caller records the results
+    _worker["reports"] = ReportBuilder(settings["reports_dir"], force=settings["force_reports"]) if settings["reports_dir"] else None
+
+
+def _evaluate_task(task: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str], Optional[Tuple[str, str, bool]]]:
+    strict_evaluator, ai_evaluator = _worker["strict"], _worker["ai"]
+    ground_truth, preds = task["ground_truth"], task["predictions"]
+    log_lines = [f"   > Evaluating {task['model']}... ({len(preds)} stored preds)"]
+    report = None
+
+    try:
+        gt_index = GroundTruthIndex.from_annotations(ground_truth)
+        unjudged_before = ai_evaluator.judge_stats["unjudged"]
+        strict_metrics = strict_evaluator.compare_annotations(ground_truth, preds, gt_index=gt_index)
+        ai_metrics, ai_decisions, missed_gts, outcomes = ai_evaluator.evaluate_batch(
+            ground_truth, preds, gt_index=gt_index, return_outcomes=True
+        )
+
+        row_data = strict_metrics.copy()
+        row_data.update({
+            "policy_id": task["policy_id"],
+            "model": task["model"],
+            "ai_precision": ai_metrics["precision"],
+            "ai_recall": ai_metrics["recall"],
+            "ai_f1": ai_metrics["f1"],
+            "unjudged_pairs": ai_evaluator.judge_stats["unjudged"] - unjudged_before,
+            "decisions": ai_decisions,
+            "gt_outcomes": outcomes,
+        })
+        log_lines.append(f"     > Strict F1: {strict_metrics['f1']:.2f}")
+        log_lines.append(f"     > AI Stats : P={ai_metrics['precision']} | R={ai_metrics['recall']} | F1={ai_metrics['f1']}")
+
+        if _worker["reports"] is not None:
+            filename = report_filename(_worker["reports"].reports_dir, task["policy_id"], task["model"])
+            fingerprint, rendered = _worker["reports"].render(
+                policy_id=task["policy_id"],
+                full_text=task["text"],
+                human_anns=ground_truth,
+                llm_anns=preds,
+                filename=filename,
+                ai_decisions=ai_decisions,
+                missed_gts=missed_gts
+            )
+            report = (filename, fingerprint, rendered)
+    except Exception as e:
+        log_lines.append(f"   > Evaluating {task['model']}... FAILED: {e}")
+        row_data = {"policy_id": task["policy_id"], "model": task["model"], "error": str(e)}
+
+    return row_data, log_lines, report
+
+
+class EvaluationStage:
+    """
+    Scores stored predictions (strict metrics, containment + cached judge verdicts, changed reports) on a pool of
+    worker processes, with no model in the loop. Each worker builds its evaluators once; tasks are submitted
+    lazily (at most max_pending in flight) and results come back in task order.
+
+    The judge runs in "cache" mode: ambiguous pairs use verdicts from judge_cache_dir, and pairs a new
+    threshold or matching rule makes ambiguous for the first time are rejected and counted in the row's
+    unjudged_pairs (re-run the full benchmark to judge them).
+    """
+
+    def __init__(self, judge_model: str, judge_cache_dir: Optional[str] = None, backend: str = "matrix",
+                 match_threshold: float = 0.3, containment_threshold: float = 0.9, judge_threshold: float = 0.4,
+                 reports_dir: Optional[str] = None, force_reports: bool = False, max_workers: Optional[int] = None,
+                 max_pending: Optional[int] = None):
+        self.settings = {
+            "judge_model": judge_model,
+            "judge_cache_dir": judge_cache_dir,
+            "backend": backend,
+            "match_threshold": match_threshold,
+            "containment_threshold": containment_threshold,
+            "judge_threshold": judge_threshold,
+            "reports_dir": reports_dir,
+            "force_reports": force_reports,
+        }
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers * 4
+
+    def run(self, tasks: Iterable[Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], List[str], Optional[tuple]]]:
+        """
+        Yields (row, log_lines, report) per task, in task order. report is (filename, fingerprint, rendered)
+        for ReportBuilder.record(), or None without reports_dir or on failure.
+        """
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                 initargs=(self.settings,)) as pool:
+            pending = deque()
+            try:
+                for task in tasks:
+                    pending.append(pool.submit(_evaluate_task, task))
+                    if len(pending) >= self.max_pending:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
@@ -1,23 +1,8 @@
 import collections
-import string
-from typing import List, Dict
+from typing import List, Dict, Optional
 
-
-def clean_tokens(text: str) -> List[str]:
-    """
-    Splits text into tokens, removes punctuation and stop words.
-    Returns a LIST (not set) to preserve frequency for F1 counting.
-    """
-    stopwords = {
-        "the", "and", "or", "of", "to", "a", "in", "is", "that", "for",
-        "on", "with", "as", "by", "at", "it", "be", "this", "from", "an",
-        "which", "we", "our", "us", "you", "your", "are", "not", "have",
-        "may", "can", "will", "data", "information", "services", "privacy"
-    }
-    if not text: return []
-    text = text.lower().translate(str.maketrans('', '', string.punctuation))
-    tokens = text.split()
-    return [t for t in tokens if t not in stopwords]
+from .utils import clean_tokens
+from .gt_index import GroundTruthIndex, token_f1_from_counts
 
 
 def compute_token_f1(text_pred: str, text_ref: str) -> float:
@@ -30,50 +15,70 @@ def compute_token_f1(text_pred: str, text_ref: str) -> float:
     if len(pred_toks) == 0 or len(ref_toks) == 0:
         return 0.0
 
-    common = collections.Counter(pred_toks) & collections.Counter(ref_toks)
-    num_same = sum(common.values())
-
-    if num_same == 0:
-        return 0.0
-
-    precision = 1.0 * num_same / len(pred_toks)
-    recall = 1.0 * num_same / len(ref_toks)
-
-    f1 = (2 * precision * recall) / (precision + recall)
-    return f1
+    return token_f1_from_counts(
+        collections.Counter(pred_toks), len(pred_toks),
+        collections.Counter(ref_toks), len(ref_toks)
+    )
 
 
 class Evaluator:
-    def __init__(self, match_threshold: float = 0.3):
+    def __init__(self, match_threshold: float = 0.3, backend: str = "index"):
+        """
+        backend: "index" scores candidates from the GT inverted index one pair at a time,
+                 "matrix" scores all prediction x GT pairs at once with NumPy (same results).
+        """
+        if backend not in ("index", "matrix"):
+            raise ValueError(f"Unknown backend: {backend}")
         self.match_threshold = match_threshold
+        self.backend = backend
 
-    def compare_annotations(self, human_anns: List[Dict], llm_anns: List[Dict]) -> Dict[str, float]:
+    def compare_annotations(self, human_anns: List[Dict], llm_anns: List[Dict],
+                            gt_index: Optional[GroundTruthIndex] = None) -> Dict[str, float]:
+        """
+        gt_index: Optional pre-built index over human_anns, so it can be shared across models.
+        """
         tp = 0
         fp = 0
 
+        if gt_index is None:
+            gt_index = GroundTruthIndex([h['label'] for h in human_anns], [h['text'] for h in human_anns])
+
         # Track which human annotations were matched
         matched_human_indices = set()
 
-        for pred in llm_anns:
+        f1_matrix = None
+        if self.backend == "matrix" and llm_anns:
+            f1_matrix = gt_index.overlap_matrix().token_f1([clean_tokens(p.get("text", "")) for p in llm_anns])
+
+        for p_idx, pred in enumerate(llm_anns):
             label = pred.get("label")
             text_pred = pred.get("text", "")
 
-            candidates = [
-                (i, h) for i, h in enumerate(human_anns)
-                if h['label'].lower() == label.lower()
-            ]
-
             best_score = 0.0
             best_human_text = ""
             best_idx = -1
 
-            for idx, hum in candidates:
-                # Use Token F1
-                score = compute_token_f1(text_pred, hum['text'])
-                if score > best_score:
-                    best_score = score
-                    best_human_text = hum['text']
-                    best_idx = idx
+            if f1_matrix is not None:
+                same_label = gt_index.label_indices(label.lower())
+                if same_label:
+                    scores = f1_matrix[p_idx, same_label]
+                    k = int(scores.argmax())  # First maximum, as in the sequential scan
+                    if scores[k] > 0:
+                        best_score = float(scores[k])
+                        best_idx = same_label[k]
+                        best_human_text = gt_index.texts[best_idx]
+            else:
+                pred_toks = clean_tokens(text_pred)
+                pred_counts = collections.Counter(pred_toks)
+
+                # Only same-label GTs sharing at least one token can score above 0
+                for idx in gt_index.f1_candidates(label.lower(), pred_counts):
+                    # Use Token F1
+                    score = gt_index.token_f1(pred_counts, len(pred_toks), idx)
+                    if score > best_score:
+                        best_score = score
+                        best_human_text = gt_index.texts[idx]
+                        best_idx = idx
 
             # Store metadata
             pred['_match_score'] = best_score
@@ -0,0 +1,165 @@
+import collections
+from typing import Callable, Dict, Iterable, List, Set
+
+from .utils import clean_tokens, normalize_text
+from .token_matrix import TokenOverlapMatrix
+
+
+def token_f1_from_counts(pred_counts: collections.Counter, pred_len: int,
+                         ref_counts: collections.Counter, ref_len: int) -> float:
+    """
+    SQuAD-style Token F1 from pre-computed token Counters (see compute_token_f1).
+    """
+    num_same = sum((pred_counts & ref_counts).values())
+
+    if num_same == 0:
+        return 0.0
+
+    precision = 1.0 * num_same / pred_len
+    recall = 1.0 * num_same / ref_len
+
+    f1 = (2 * precision * recall) / (precision + recall)
+    return f1
+
+
+def containment_score(p_norm: str, p_tokens: Set[str], g_norm: str, g_tokens: List[str]) -> float:
+    """
+    Share of GT tokens found in the prediction, from pre-normalized text (see check_containment).
+    """
+    if not g_norm: return 0.0
+    if g_norm in p_norm: return 1.0  # Exact substring match
+
+    if not g_tokens: return 0.0
+
+    found = sum(1 for t in g_tokens if t in p_tokens)
+    return found / len(g_tokens)
+
+
+class GroundTruthIndex:
+    """
+    Per-policy index over ground truth annotations.
+
+    GT items are grouped by label and tokenized once (clean_tokens for Token F1, normalize_text for
+    containment). Token -> GT inverted indexes let evaluators score only the GTs that share at least
+    one token with a prediction instead of re-scanning every GT.
+    """
+
+    def __init__(self, labels: List[str], texts: List[str]):
+        self.labels = labels
+        self.texts = texts
+
+        # Token F1 view
+        self.f1_tokens = [clean_tokens(t) for t in texts]
+        self.f1_counts = [collections.Counter(toks) for toks in self.f1_tokens]
+        self._f1_postings = self._build_postings(self.f1_tokens)
+
+        # Containment view
+        self.norm_texts = [normalize_text(t) for t in texts]
+        self.norm_tokens = [n.split() for n in self.norm_texts]
+        self.norm_sets = [set(toks) for toks in self.norm_tokens]
+        self._norm_postings = self._build_postings(self.norm_tokens)
+
+        # A normalized string can be a substring of another without sharing a whole token only when
+        # it has at most two tokens (e.g. "data" inside "metadata"), so those are always candidates.
+        self._short_norm = {i for i, toks in enumerate(self.norm_tokens) if 0 < len(toks) <= 2}
+
+        self._by_label: Dict[str, List[int]] = collections.defaultdict(list)
+        self._by_stripped_label: Dict[str, List[int]] = collections.defaultdict(list)
+        for i, label in enumerate(labels):
+            self._by_label[label.lower()].append(i)
+            self._by_stripped_label[label.lower().strip()].append(i)
+
+        self._compatible_cache: Dict[str, Set[int]] = {}
+        self._overlap_matrix = None
+
+    @classmethod
+    def from_annotations(cls, annotations: List[Dict]) -> "GroundTruthIndex":
+        def get_val(item, keys):
+            if not isinstance(item, dict): return str(item)
+            for k in keys:
+                if k in item: return item[k]
+            return ""
+
+        return cls(
+            [get_val(a, ['category', 'label', 'type']) for a in annotations],
+            [get_val(a, ['text', 'span', 'segment']) for a in annotations]
+        )
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @staticmethod
+    def _build_postings(token_lists: List[List[str]]) -> Dict[str, List[int]]:
+        postings = collections.defaultdict(list)
+        for i, toks in enumerate(token_lists):
+            for t in set(toks):
+                postings[t].append(i)
+        return postings
+
+    @staticmethod
+    def _lookup(postings: Dict[str, List[int]], tokens: Iterable[str]) -> Set[int]:
+        hits = set()
+        for t in tokens:
+            ids = postings.get(t)
+            if ids:
+                hits.update(ids)
+        return hits
+
+    def overlap_matrix(self) -> TokenOverlapMatrix:
+        """
+        Vectorized scoring backend over this GT set, built on first use.
+        """
+        if self._overlap_matrix is None:
+            self._overlap_matrix = TokenOverlapMatrix(self.f1_tokens, self.norm_texts, self.norm_tokens)
+        return self._overlap_matrix
+
+    # --- Token F1 (Evaluator) ---
+
+    def label_indices(self, label_lower: str) -> List[int]:
+        """Indices of GTs with exactly this (lowercased) label, ascending."""
+        return self._by_label.get(label_lower, [])
+
+    def f1_candidates(self, label_lower: str, pred_counts: collections.Counter) -> List[int]:
+        """
+        Indices of GTs with exactly this (lowercased) label that share a clean token with the prediction,
+        in ascending order so tie-breaking matches a full scan.
+        """
+        same_label = self._by_label.get(label_lower)
+        if not same_label or not pred_counts:
+            return []
+        hits = self._lookup(self._f1_postings, pred_counts)
+        return [i for i in same_label if i in hits]
+
+    def token_f1(self, pred_counts: collections.Counter, pred_len: int, idx: int) -> float:
+        if pred_len == 0 or not self.f1_tokens[idx]:
+            return 0.0
+        return token_f1_from_counts(pred_counts, pred_len, self.f1_counts[idx], len(self.f1_tokens[idx]))
+
+    # --- Containment (AIEvaluator) ---
+
+    def compatible_indices(self, pred_label: str, is_compatible: Callable[[str, str], bool]) -> Set[int]:
+        """
+        Indices of GTs whose label is_compatible(gt_label, pred_label). Cached per prediction label.
+        """
+        cached = self._compatible_cache.get(pred_label)
+        if cached is not None:
+            return cached
+
+        compatible = set()
+        for stripped, ids in self._by_stripped_label.items():
+            if is_compatible(self.labels[ids[0]], pred_label):
+                compatible.update(ids)
+        self._compatible_cache[pred_label] = compatible
+        return compatible
+
+    def containment_candidates(self, compatible: Set[int], p_tokens: List[str]) -> List[int]:
+        """
+        Indices (ascending) of compatible GTs whose containment scores against the prediction can be non-zero.
+        """
+        if len(p_tokens) <= 2:
+            # Short predictions can be substrings of a GT without sharing a whole token
+            return sorted(compatible)
+
+        hits = self._lookup(self._norm_postings, p_tokens)
+        hits |= self._short_norm
+        return sorted(compatible & hits)
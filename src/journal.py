@@ -0,0 +1,69 @@
+import json
+import os
+import threading
+from typing import Any, Dict, List, Set, Tuple
+
+
+class ResultsJournal:
+    """
+    Append-only JSONL log of benchmark rows, one line per finished (policy, model) pair.
+    Every append is flushed and fsynced, so a crash or Ctrl-C loses at most the row being written.
+    """
+
+    def __init__(self, path: str = "./benchmark_journal.jsonl", resume: bool = False):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if not resume and os.path.exists(path) and os.path.getsize(path) > 0:
+            # Keep the previous run around instead of silently discarding it
+            os.replace(path, f"{path}.prev")
+            print(f"Previous journal moved to '{path}.prev'")
+
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+        if self._file.tell() > 0:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    # Terminate a line cut off by a crash so the next row starts cleanly
+                    self._file.write("\n")
+
+    def append(self, row: Dict[str, Any]) -> None:
+        line = json.dumps(row, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """
+        All journaled rows, one per (policy_id, model). A pair that was re-run keeps its
+        latest row at the position of its first appearance.
+        """
+        latest: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        if not os.path.exists(self.path):
+            return []
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line: continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    # Truncated final line from an interrupted write
+                    continue
+                latest[(row.get("policy_id"), row.get("model"))] = row
+        return list(latest.values())
+
+    def completed_pairs(self) -> Set[Tuple[str, str]]:
+        """
+        (policy_id, model) pairs that finished without an error. Failed pairs are retried on resume.
+        """
+        return {(row["policy_id"], row["model"]) for row in self.rows() if "error" not in row}
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
@@ -1,70 +1,239 @@
 import os
+import asyncio
+import contextvars
 import threading
+import time
 import json
-from collections import deque
-from typing import Optional, Dict, Any, Union, List
-import aisuite as ai
+import weakref
+from contextlib import asynccontextmanager, nullcontext
+from typing import Optional, Dict, Any, Union, List, Tuple, Iterator
+import httpx
+import openai
 # pip install json_repair
 from json_repair import repair_json
 
+from .chunking import estimate_tokens
+from .mock_provider import AsyncMockChatClient, MockChatClient, record_response
+from .rate_limiter import (
+    get_rate_limiter, get_retry_policy, is_retryable, retry_after_seconds, status_code
+)
+from .telemetry import CallRecord, emit_call
+
+
+# Providers whose OpenAI-compatible endpoint accepts {"type": "json_schema"} response formats
+STRUCTURED_OUTPUT_PROVIDERS = {"openai", "gemini"}
+
+# Per-provider caps on in-flight requests, shared by every LLMClient in the process.
+_provider_limits: Dict[str, int] = {}
+_provider_slots: Dict[str, threading.BoundedSemaphore] = {}
+_provider_slots_lock = threading.Lock()
+
+
+def split_model_name(model: str) -> Tuple[str, str]:
+    """
+    Splits "provider:model" into (provider, model_name). Bare names default to OpenAI.
+    """
+    if ":" in model:
+        provider, model_name = model.split(":", 1)
+    else:
+        provider, model_name = "openai", model
+    return provider.lower(), model_name
+
+
+def set_provider_concurrency(limits: Dict[str, int]) -> None:
+    """
+    Caps the number of concurrent requests per provider (e.g. {"gemini": 4}).
+    Providers without an entry are not limited.
+    """
+    with _provider_slots_lock:
+        _provider_limits.clear()
+        _provider_limits.update({p.lower(): n for p, n in limits.items()})
+        _provider_slots.clear()
+
+
+# Async HTTP clients are bound to the event loop that created them, so there is one per loop
+# (DeepEval runs a_generate on a separate loop in each worker thread); close_llm_clients() closes them all.
+_async_http_clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+_async_http_clients_lock = threading.Lock()
+
+# How often a coroutine waiting for a provider slot checks again
+ASYNC_SLOT_POLL_SEC = 0.01
+
+HTTP_POOL_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+HTTP_TIMEOUT = httpx.Timeout(600.0, connect=10.0)
+
+# Per-call HTTP timing, filled in by the pooled clients' event hooks (which run in the caller's task / thread)
+_http_timing: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar("llm_http_timing", default=None)
+
+# One pooled HTTP client for every LLMClient's sync path (httpx.Client is thread-safe)
+_sync_http_client: Optional[httpx.Client] = None
+_sync_http_client_lock = threading.Lock()
+
+
+def _record_ttfb() -> None:
+    # Called once the response headers arrive, before the body is read
+    timing = _http_timing.get()
+    if timing is not None:
+        timing["ttfb"] = time.perf_counter() - timing["start"]
+
+
+async def _on_http_response(response: httpx.Response) -> None:
+    _record_ttfb()
+
+
+def _on_sync_http_response(response: httpx.Response) -> None:
+    _record_ttfb()
+
+
+def _shared_sync_http_client() -> httpx.Client:
+    global _sync_http_client
+    with _sync_http_client_lock:
+        if _sync_http_client is None or _sync_http_client.is_closed:
+            _sync_http_client = httpx.Client(
+                limits=HTTP_POOL_LIMITS,
+                timeout=HTTP_TIMEOUT,
+                event_hooks={"response": [_on_sync_http_response]},
+            )
+        return _sync_http_client
+
+
+def _shared_async_http_client() -> httpx.AsyncClient:
+    """
+    One pooled HTTP client per event loop, shared by every LLMClient's async path.
+    """
+    loop = asyncio.get_running_loop()
+    with _async_http_clients_lock:
+        http_client = _async_http_clients.get(loop)
+        if http_client is None or http_client.is_closed:
+            http_client = httpx.AsyncClient(
+                limits=HTTP_POOL_LIMITS,
+                timeout=HTTP_TIMEOUT,
+                event_hooks={"response": [_on_http_response]},
+            )
+            _async_http_clients[loop] = http_client
+    return http_client
+
+
+@asynccontextmanager
+async def _async_provider_slot(provider: str):
+    """
+    Holds one of the provider's process-wide slots (the same semaphore as the sync path), so the cap
+    holds across threads and event loops. Waits by polling: blocking the loop on the semaphore would
+    stall its other tasks, and a cancelled waiter never ends up owning a slot.
+    """
+    slot = _provider_slot(provider)
+    if isinstance(slot, nullcontext):
+        yield
+        return
+    while not slot.acquire(blocking=False):
+        await asyncio.sleep(ASYNC_SLOT_POLL_SEC)
+    try:
+        yield
+    finally:
+        slot.release()
+
+
+def close_llm_clients() -> None:
+    """
+    Closes the pooled HTTP clients (sync and every event loop's async one). Call once the run is done.
+    """
+    global _sync_http_client
+    with _sync_http_client_lock:
+        if _sync_http_client is not None:
+            _sync_http_client.close()
+            _sync_http_client = None
+
+    with _async_http_clients_lock:
+        clients = list(_async_http_clients.items())
+        _async_http_clients.clear()
+    for loop, http_client in clients:
+        if http_client.is_closed or loop.is_closed():
+            # A closed loop has already dropped its connections
+            continue
+        try:
+            if loop.is_running():
+                asyncio.run_coroutine_threadsafe(http_client.aclose(), loop).result(timeout=10)
+            else:
+                loop.run_until_complete(http_client.aclose())
+        except Exception as e:
+            print(f"Warning: could not close async HTTP client: {e}")
+
+
+def _error_class(e: Exception) -> str:
+    return type(e).__name__
+
+
+def _provider_slot(provider: str):
+    with _provider_slots_lock:
+        slot = _provider_slots.get(provider)
+        if slot is None:
+            limit = _provider_limits.get(provider)
+            if not limit:
+                return nullcontext()
+            slot = threading.BoundedSemaphore(limit)
+            _provider_slots[provider] = slot
+    return slot
+
 
 class LLMClient:
     """
-    Client wrapper for different LLM providers using AiSuite.
+    Client wrapper for different LLM providers, all spoken to through their OpenAI-compatible endpoints.
+    Every call (sync, streaming, async) goes through the native openai client on the shared pools.
     """
 
     def __init__(self, model: str = "openai:gpt-4o", api_key: Optional[str] = None):
-        if ":" in model:
-            provider, model_name = model.split(":", 1)
-        else:
-            provider, model_name = "openai", model
+        provider, model_name = split_model_name(model)
 
         self.model = model
-        self.provider = provider.lower()
+        self.provider = provider
         self.model_name = model_name
         self.api_key = api_key
 
-        self._rate_limit_lock = threading.Lock()
-        self._openrouter_timestamps = deque()
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, openai.AsyncOpenAI]" = weakref.WeakKeyDictionary()
+        self._sync_client: Optional[Union[openai.OpenAI, MockChatClient]] = None
+        self._sync_client_lock = threading.Lock()
 
-        # Provider-specific setup
+        # Cumulative token usage reported by the provider (cached_tokens = prompt tokens served from its prefix cache)
+        self._usage_lock = threading.Lock()
+        self.usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+
+        # Provider-specific setup (self.model is the name reported to DeepEval)
         if self.provider == "gemini":
-            provider_settings = {
-                "openai": {
-                    "api_key": os.getenv("GOOGLE_API_KEY"),
-                    "base_url": "https://generativelanguage.googleapis.com/v1beta/openai/",
-                    "max_retries": 100,
-                }
-            }
             self.model = "openai:" + model_name
-            self.client = ai.Client(provider_settings)
+            self._openai_settings = {
+                "api_key": os.getenv("GOOGLE_API_KEY"),
+                "base_url": "https://generativelanguage.googleapis.com/v1beta/openai/",
+                # Retries are handled by our own loop, paced by the shared provider rate limiter
+                "max_retries": 0,
+            }
 
         elif self.provider == "openrouter":
-            provider_settings = {
-                "openai": {
-                    "api_key": os.getenv("OPENROUTER_API_KEY"),
-                    "base_url": "https://openrouter.ai/api/v1",
-                    "max_retries": 100,
-                }
-            }
             self.model = "openai:" + model_name
-            self.client = ai.Client(provider_settings)
+            self._openai_settings = {
+                "api_key": os.getenv("OPENROUTER_API_KEY"),
+                "base_url": "https://openrouter.ai/api/v1",
+                # Retries are handled by our own loop, paced by the shared provider rate limiter
+                "max_retries": 0,
+            }
 
         elif self.provider == "ollama":
-            provider_settings = {
-                "openai": {
-                    "base_url": "https://f2ki-h100-1.f2.htw-berlin.de:11435/v1",
-                    "max_retries": 100,
-                }
-            }
             self.model = "openai:" + model_name
-            self.client = ai.Client(provider_settings)
+            self._openai_settings = {
+                "base_url": "https://f2ki-h100-1.f2.htw-berlin.de:11435/v1",
+                # Retries are handled by our own loop, paced by the shared provider rate limiter
+                "max_retries": 0,
+            }
+
+        elif self.provider == "mock":
+            # Offline simulation (see src/mock_provider.py); configure with configure_mock()
+            self.model = model_name
+            self._openai_settings = {}
 
         else:
             # Default: OpenAI
-            self.client = ai.Client()
+            self._openai_settings = {"max_retries": 0}
             if api_key:
-                self.client.api_key = api_key
+                self._openai_settings["api_key"] = api_key
 
     def classify(self, system_prompt: str, user_prompt: str, response_format: Optional[Dict[str, Any]] = None) -> str:
         messages = [
@@ -76,27 +245,286 @@ class LLMClient:
     def get_completion(self, messages, response_format: Optional[Dict[str, Any]] = None) -> str:
         return self._call_model(messages, response_format)
 
+    def stream_classify(self, system_prompt: str, user_prompt: str,
+                        response_format: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """
+        Like classify(), but yields the response text incrementally as the model generates it.
+        A failure before the first token yields nothing (like classify() returning ""); a failure
+        mid-stream is raised.
+        """
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+        return self._stream_model(messages, response_format)
+
+    async def aclassify(self, system_prompt: str, user_prompt: str, response_format: Optional[Dict[str, Any]] = None) -> str:
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+        return await self._acall_model(messages, response_format)
+
+    async def aget_completion(self, messages, response_format: Optional[Dict[str, Any]] = None) -> str:
+        return await self._acall_model(messages, response_format)
+
+    @property
+    def model_id(self) -> str:
+        """Provider-qualified model name as passed in (e.g. "gemini:gemini-2.5-flash")."""
+        return f"{self.provider}:{self.model_name}"
+
+    @property
+    def temperature(self) -> float:
+        # OpenAI reasoning models only accept the default temperature
+        return 1.0 if self.provider == "openai" else 0.0
+
+    def _record_usage(self, response, record: CallRecord) -> None:
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        record.prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+        record.completion_tokens = getattr(usage, "completion_tokens", None) or 0
+        record.cached_tokens = getattr(details, "cached_tokens", None) or 0
+        with self._usage_lock:
+            self.usage["calls"] += 1
+            self.usage["prompt_tokens"] += record.prompt_tokens
+            self.usage["completion_tokens"] += record.completion_tokens
+            self.usage["cached_tokens"] += record.cached_tokens
+
+    def usage_stats(self) -> Dict[str, Any]:
+        """
+        Token totals so far, plus the share of prompt tokens the provider served from its cache.
+        """
+        with self._usage_lock:
+            stats = dict(self.usage)
+        stats["cached_share"] = round(stats["cached_tokens"] / stats["prompt_tokens"], 3) if stats["prompt_tokens"] else 0.0
+        return stats
+
+    def _retry_delay(self, e: Exception, attempt: int, limiter) -> Optional[float]:
+        """
+        Back-off before the next attempt, or None if the error is final. A 429 also pauses and slows
+        down every caller of this provider via the shared limiter.
+        """
+        policy = get_retry_policy()
+        will_retry = attempt < policy.max_retries and is_retryable(e)
+        retry_after = retry_after_seconds(e)
+        delay = policy.delay(attempt, retry_after) if will_retry else None
+
+        rate_limited = status_code(e) == 429
+        limiter.record_failure(rate_limited, pause=retry_after if retry_after is not None else (delay or 0.0),
+                               will_retry=will_retry)
+        if will_retry:
+            print(f"LLM retry {attempt + 1}/{policy.max_retries} for {self.model_id} in {delay:.1f}s ({_error_class(e)})")
+        return delay
+
+    def _record_response(self, messages: List[Dict[str, str]], response_format: Optional[Dict[str, Any]],
+                         content: str) -> None:
+        # Live responses can be recorded for offline replay by the mock provider
+        if self.provider != "mock":
+            record_response(self.model_id, messages, response_format, content)
+
+    @staticmethod
+    def _estimate_prompt_tokens(messages: List[Dict[str, str]]) -> int:
+        return sum(estimate_tokens(str(m.get("content", ""))) for m in messages)
+
+    def _get_sync_client(self) -> Union[openai.OpenAI, MockChatClient]:
+        """
+        Native OpenAI-protocol client for this provider on the shared, instrumented connection pool
+        (used by both the plain and the streaming sync path). The mock provider uses its own client.
+        """
+        with self._sync_client_lock:
+            if self._sync_client is None and self.provider == "mock":
+                self._sync_client = MockChatClient()
+            elif self._sync_client is None:
+                settings = dict(self._openai_settings)
+                if not settings.get("api_key"):
+                    settings["api_key"] = os.getenv("OPENAI_API_KEY")
+                self._sync_client = openai.OpenAI(**settings, http_client=_shared_sync_http_client())
+            return self._sync_client
+
     def _call_model(self, messages: List[Dict[str, str]], response_format: Optional[Dict[str, Any]] = None) -> str:
-        if self.provider == "openai":
-            temperature = 1.0
-        else:
-            temperature = 0.0
+        kwargs = {
+            "model": self.model_name,
+            "messages": messages,
+            "temperature": self.temperature,
+        }
+
+        if response_format:
+            kwargs["response_format"] = response_format
+
+        limiter = get_rate_limiter(self.provider)
+        estimated = self._estimate_prompt_tokens(messages)
+        record = CallRecord(provider=self.provider, model=self.model_id, latency_sec=0.0, retries=0)
+        timing = {"start": time.perf_counter(), "ttfb": None}
+        timing_token = _http_timing.set(timing)
+        attempt = 0
+        try:
+            client = self._get_sync_client()
+            while True:
+                record.wait_sec += limiter.acquire(estimated)
+                # Latency covers the last attempt only, excluding limiter, back-off and provider-slot waits
+                timing["start"] = time.perf_counter()
+                try:
+                    with _provider_slot(self.provider):
+                        timing["start"] = time.perf_counter()
+                        response = client.chat.completions.create(**kwargs)
+                    record.latency_sec = time.perf_counter() - timing["start"]
+                    break
+                except Exception as e:
+                    record.latency_sec = time.perf_counter() - timing["start"]
+                    delay = self._retry_delay(e, attempt, limiter)
+                    if delay is None:
+                        raise
+                    attempt += 1
+                    record.retries = attempt
+                    record.wait_sec += delay
+                    time.sleep(delay)
 
+            self._record_usage(response, record)
+            limiter.record_success(estimated, record.prompt_tokens + record.completion_tokens or None)
+            content = response.choices[0].message.content.strip()
+            self._record_response(messages, response_format, content)
+            return content
+        except Exception as e:
+            record.error = _error_class(e)
+            print(f"LLM Error: {e}")
+            return ""
+        finally:
+            _http_timing.reset(timing_token)
+            record.ttfb_sec = timing["ttfb"]
+            emit_call(record)
+
+    def _stream_model(self, messages: List[Dict[str, str]], response_format: Optional[Dict[str, Any]] = None) -> Iterator[str]:
         kwargs = {
-            "model": self.model,
+            "model": self.model_name,
             "messages": messages,
-            "temperature": temperature,
+            "temperature": self.temperature,
+            "stream": True,
+            # Final chunk carries token usage
+            "stream_options": {"include_usage": True},
         }
 
         if response_format:
             kwargs["response_format"] = response_format
 
+        limiter = get_rate_limiter(self.provider)
+        estimated = self._estimate_prompt_tokens(messages)
+        record = CallRecord(provider=self.provider, model=self.model_id, latency_sec=0.0, retries=0)
+        attempt = 0
+        started = False
+        parts = []
         try:
-            response = self.client.chat.completions.create(**kwargs)
-            return response.choices[0].message.content.strip()
+            client = self._get_sync_client()
+            while True:
+                record.wait_sec += limiter.acquire(estimated)
+                t0 = time.perf_counter()
+                try:
+                    with _provider_slot(self.provider):
+                        t0 = time.perf_counter()
+                        for chunk in client.chat.completions.create(**kwargs):
+                            if getattr(chunk, "usage", None) is not None:
+                                self._record_usage(chunk, record)
+                            if not chunk.choices:
+                                continue
+                            delta = chunk.choices[0].delta.content
+                            if delta:
+                                if not started:
+                                    record.ttfb_sec = time.perf_counter() - t0
+                                    started = True
+                                parts.append(delta)
+                                yield delta
+                    record.latency_sec = time.perf_counter() - t0
+                    break
+                except Exception as e:
+                    record.latency_sec = time.perf_counter() - t0
+                    # Output already handed to the caller cannot be taken back, so only retry before it
+                    delay = None if started else self._retry_delay(e, attempt, limiter)
+                    if delay is None:
+                        raise
+                    attempt += 1
+                    record.retries = attempt
+                    record.wait_sec += delay
+                    time.sleep(delay)
+
+            limiter.record_success(estimated, record.prompt_tokens + record.completion_tokens or None)
+            self._record_response(messages, response_format, "".join(parts).strip())
+        except Exception as e:
+            record.error = _error_class(e)
+            print(f"LLM Error: {e}")
+            if started:
+                # A truncated response must not pass for a complete one (e.g. in the inference cache)
+                raise
+        finally:
+            emit_call(record)
+
+    def _get_async_client(self) -> openai.AsyncOpenAI:
+        """
+        Native async OpenAI-protocol client for this provider, using the loop's shared connection pool.
+        """
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None and self.provider == "mock":
+            client = AsyncMockChatClient()
+            self._async_clients[loop] = client
+        elif client is None:
+            settings = dict(self._openai_settings)
+            if not settings.get("api_key"):
+                settings["api_key"] = os.getenv("OPENAI_API_KEY")
+            client = openai.AsyncOpenAI(**settings, http_client=_shared_async_http_client())
+            self._async_clients[loop] = client
+        return client
+
+    async def _acall_model(self, messages: List[Dict[str, str]], response_format: Optional[Dict[str, Any]] = None) -> str:
+        kwargs = {
+            "model": self.model_name,
+            "messages": messages,
+            "temperature": self.temperature,
+        }
+
+        if response_format:
+            kwargs["response_format"] = response_format
+
+        limiter = get_rate_limiter(self.provider)
+        estimated = self._estimate_prompt_tokens(messages)
+        record = CallRecord(provider=self.provider, model=self.model_id, latency_sec=0.0, retries=0)
+        timing = {"start": time.perf_counter(), "ttfb": None}
+        timing_token = _http_timing.set(timing)
+        attempt = 0
+        try:
+            client = self._get_async_client()
+            while True:
+                record.wait_sec += await limiter.aacquire(estimated)
+                timing["start"] = time.perf_counter()
+                try:
+                    async with _async_provider_slot(self.provider):
+                        timing["start"] = time.perf_counter()
+                        response = await client.chat.completions.create(**kwargs)
+                    record.latency_sec = time.perf_counter() - timing["start"]
+                    break
+                except Exception as e:
+                    record.latency_sec = time.perf_counter() - timing["start"]
+                    delay = self._retry_delay(e, attempt, limiter)
+                    if delay is None:
+                        raise
+                    attempt += 1
+                    record.retries = attempt
+                    record.wait_sec += delay
+                    await asyncio.sleep(delay)
+
+            self._record_usage(response, record)
+            limiter.record_success(estimated, record.prompt_tokens + record.completion_tokens or None)
+            content = response.choices[0].message.content.strip()
+            self._record_response(messages, response_format, content)
+            return content
         except Exception as e:
+            record.error = _error_class(e)
             print(f"LLM Error: {e}")
             return ""
+        finally:
+            _http_timing.reset(timing_token)
+            record.ttfb_sec = timing["ttfb"]
+            emit_call(record)
 
     def parse_json(self, json_string: str) -> Union[Dict, List, None]:
         """
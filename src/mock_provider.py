@@ -0,0 +1,380 @@
+"""
+Offline "mock:" provider for LLMClient: deterministic responses without API keys, for load tests,
+profiling and regression runs of the concurrency, caching and evaluation code.
+
+Responses are, in order of preference:
+    - replayed from a JSONL recording (see record_responses()), keyed by the request messages;
+    - synthesized: annotator prompts get spans sampled from the policy's ground truth, batch-judge and
+      GEval prompts get verdicts scored by token containment.
+Latency, jitter, generation speed, server errors and 429s (with Retry-After) are simulated, and the
+returned objects are real openai ChatCompletion / ChatCompletionChunk types, so the retry loop, rate
+limiter, streaming parser and telemetry run exactly as against a live provider.
+"""
+import asyncio
+import collections
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+import openai
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from .chunking import estimate_tokens, segment_offsets
+from .config import LABEL_DESCRIPTIONS
+from .gt_index import containment_score
+from .utils import normalize_text
+
+# Prompt markers of the request types the mock understands
+_DOCUMENT_PATTERN = re.compile(r"### DOCUMENT START\n\n(.*)\n\n### DOCUMENT END", re.DOTALL)
+_BATCH_JUDGE_MARKER = "You are judging whether AI-extracted"
+_GEVAL_STEPS_MARKER = "concise evaluation steps"
+_GEVAL_RESULTS_PATTERN = re.compile(r"Actual Output:\n(.*?) \n\nExpected Output:\n(.*?) \n\n", re.DOTALL)
+
+# Providers serve repeated prompt prefixes from cache in blocks of this many tokens, above a minimum length
+_CACHE_BLOCK_TOKENS = 128
+_CACHE_MIN_TOKENS = 1024
+
+DEFAULT_MOCK_CONFIG = {
+    "latency": 0.2,                 # Seconds before the first token
+    "jitter": 0.1,                  # +/- uniform noise on latency
+    "tokens_per_sec": 500.0,        # Generation speed (None/0 = instant)
+    "error_rate": 0.0,              # Share of requests failing with a 500
+    "rate_limit_rpm": None,         # Requests per minute before the mock answers 429
+    "rate_limit_prob": 0.0,         # Share of requests answered with a spurious 429
+    "retry_after": 1.0,             # Retry-After of spurious 429s (seconds)
+    "recall": 0.8,                  # Share of ground-truth spans the synthetic annotator returns
+    "span_noise": 0.2,              # Share of returned spans cut short (exercises the fuzzy/judge path)
+    "false_positive_rate": 0.1,     # Extra non-GT spans per returned GT span
+    "replay_path": None,            # JSONL recording to replay (unknown requests fall back to synthesis)
+    "replay_model": None,           # Only replay recordings of this model id
+    "dataset_path": "./data",       # Ground truth for synthetic annotations
+    "corpus_path": None,
+    "seed": 0,
+}
+
+_config: Dict[str, Any] = dict(DEFAULT_MOCK_CONFIG)
+_state_lock = threading.Lock()
+_rng = random.Random(0)
+_replay: Optional[Dict[str, str]] = None
+_policies: Optional[Dict[str, List[Dict[str, str]]]] = None    # policy text -> ground truth
+_request_times: collections.deque = collections.deque()
+_seen_prefixes: set = set()
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def configure_mock(**settings) -> None:
+    """
+    Updates the simulation settings (see DEFAULT_MOCK_CONFIG) and resets the simulated server state.
+    """
+    global _replay, _policies, _rng
+    unknown = set(settings) - set(DEFAULT_MOCK_CONFIG)
+    if unknown:
+        raise ValueError(f"Unknown mock settings: {sorted(unknown)}")
+    with _state_lock:
+        _config.clear()
+        _config.update(DEFAULT_MOCK_CONFIG)
+        _config.update(settings)
+        _rng = random.Random(_config["seed"])
+        _replay = None
+        _policies = None
+        _request_times.clear()
+        _seen_prefixes.clear()
+
+
+def request_key(messages: List[Dict[str, Any]], response_format: Optional[Dict[str, Any]] = None) -> str:
+    payload = json.dumps({"messages": messages, "response_format": response_format}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def record_responses(path: Optional[str]) -> None:
+    """
+    Appends every successful response of the live providers to `path` (JSONL), for later replay
+    with configure_mock(replay_path=path). None stops recording.
+    """
+    global _recorder
+    with _recorder_lock:
+        if _recorder is not None:
+            _recorder.close()
+        _recorder = open(path, "a", encoding="utf-8") if path else None
+
+
+def record_response(model: str, messages: List[Dict[str, Any]], response_format: Optional[Dict[str, Any]],
+                    content: str) -> None:
+    if _recorder is None:
+        return
+    line = json.dumps({"key": request_key(messages, response_format), "model": model, "content": content},
+                      ensure_ascii=False)
+    with _recorder_lock:
+        if _recorder is not None:
+            _recorder.write(line + "\n")
+            _recorder.flush()
+
+
+def _load_replay() -> Dict[str, str]:
+    global _replay
+    with _state_lock:
+        if _replay is None:
+            _replay = {}
+            path = _config["replay_path"]
+            if path:
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        for line in f:
+                            if not line.strip(): continue
+                            entry = json.loads(line)
+                            if _config["replay_model"] and entry.get("model") != _config["replay_model"]:
+                                continue
+                            _replay[entry["key"]] = entry["content"]
+                except Exception as e:
+                    print(f"Mock replay error ({path}): {e}")
+        return _replay
+
+
+def _load_policies() -> Dict[str, List[Dict[str, str]]]:
+    global _policies
+    with _state_lock:
+        if _policies is None:
+            from .corpus import iter_c3pa_dataset
+            _policies = {}
+            try:
+                for pol in iter_c3pa_dataset(_config["dataset_path"], corpus_path=_config["corpus_path"]):
+                    _policies[pol['text']] = pol['ground_truth']
+            except Exception as e:
+                print(f"Mock provider could not load ground truth: {e}")
+        return _policies
+
+
+def _ground_truth_for(document: str) -> List[Dict[str, str]]:
+    """
+    Ground-truth spans visible in `document`: all of them for a full policy, otherwise (a chunk or a
+    pre-filtered excerpt) those whose text occurs in it.
+    """
+    policies = _load_policies()
+    if document in policies:
+        return policies[document]
+
+    probe = next((p.strip() for p in document.split("\n") if len(p.strip()) >= 40), document.strip())[:200]
+    doc_norm = normalize_text(document)
+    for text, ground_truth in policies.items():
+        if probe and probe in text:
+            return [gt for gt in ground_truth if normalize_text(gt["text"]) and normalize_text(gt["text"]) in doc_norm]
+    return []
+
+
+def _synthesize_annotations(model: str, document: str, structured: bool) -> str:
+    # Seeded per model and document: reruns are identical, different mock models differ
+    rng = random.Random(f"{_config['seed']}:{model}:{hashlib.sha256(document.encode('utf-8')).hexdigest()}")
+    spans = []
+    for gt in _ground_truth_for(document):
+        if rng.random() >= _config["recall"]:
+            continue
+        text = gt["text"]
+        words = text.split()
+        if len(words) > 6 and rng.random() < _config["span_noise"]:
+            text = " ".join(words[:max(3, int(len(words) * rng.uniform(0.5, 0.9)))])
+        spans.append({"label": gt["label"], "text": text, "reasoning": "Synthesized from ground truth."})
+
+    # False positives: random sentences/lines of the document under a random label
+    lines = [document[s:e].strip() for s, e in segment_offsets(document, 400) if len(document[s:e].split()) >= 8]
+    n_false = sum(1 for _ in spans if rng.random() < _config["false_positive_rate"])
+    for _ in range(n_false if lines else 0):
+        spans.append({
+            "label": rng.choice(list(LABEL_DESCRIPTIONS)),
+            "text": rng.choice(lines),
+            "reasoning": "Synthetic false positive.",
+        })
+    return json.dumps({"annotations": spans} if structured else spans, ensure_ascii=False)
+
+
+def _containment(pred_text: str, gt_text: str) -> float:
+    p_norm = normalize_text(pred_text)
+    g_norm = normalize_text(gt_text)
+    return containment_score(p_norm, set(p_norm.split()), g_norm, g_norm.split())
+
+
+def _synthesize_batch_verdicts(user_prompt: str) -> str:
+    verdicts = []
+    for block in user_prompt.split("### Pair ")[1:]:
+        head, _, rest = block.partition("\n")
+        actual, _, expected = rest.partition("\nExpected Output: ")
+        actual = actual.split("Actual Output: ", 1)[-1]
+        try:
+            pair_id = int(head.strip())
+        except ValueError:
+            continue
+        score = round(10 * _containment(actual, expected.strip()))
+        verdicts.append({"id": pair_id, "score": score, "reasoning": f"Mock verdict: {score}/10 token containment."})
+    return json.dumps({"verdicts": verdicts})
+
+
+def _synthesize_content(model: str, messages: List[Dict[str, Any]], response_format: Optional[Dict[str, Any]]) -> str:
+    system = next((str(m.get("content", "")) for m in messages if m.get("role") == "system"), "")
+    user = next((str(m.get("content", "")) for m in messages if m.get("role") == "user"), "")
+
+    match = _DOCUMENT_PATTERN.search(user)
+    if match:
+        structured = bool(response_format) and response_format.get("type") == "json_schema"
+        return _synthesize_annotations(model, match.group(1), structured)
+    if system.startswith(_BATCH_JUDGE_MARKER):
+        return _synthesize_batch_verdicts(user)
+    if _GEVAL_STEPS_MARKER in user:
+        return json.dumps({"steps": [
+            "Check whether the Actual Output contains the Expected Output.",
+            "Check whether the Actual Output is a list containing the Expected Output as one item.",
+            "Check whether a shorter Actual Output preserves the main meaning of the Expected Output.",
+        ]})
+    match = _GEVAL_RESULTS_PATTERN.search(user)
+    if match:
+        score = round(10 * _containment(match.group(1), match.group(2)))
+        return json.dumps({"reason": "Mock verdict from token containment.", "score": score})
+    return "{}"
+
+
+def _usage(messages: List[Dict[str, Any]], content: str) -> Dict[str, Any]:
+    prompt_tokens = sum(estimate_tokens(str(m.get("content", ""))) for m in messages)
+    # The system prompt is the reusable prefix: a repeat is served from the simulated prompt cache
+    prefix = str(messages[0].get("content", "")) if messages and messages[0].get("role") == "system" else ""
+    prefix_tokens = estimate_tokens(prefix)
+    cached_tokens = 0
+    if prefix and prompt_tokens >= _CACHE_MIN_TOKENS:
+        digest = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        with _state_lock:
+            if digest in _seen_prefixes:
+                cached_tokens = prefix_tokens // _CACHE_BLOCK_TOKENS * _CACHE_BLOCK_TOKENS
+            _seen_prefixes.add(digest)
+    completion_tokens = estimate_tokens(content)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": cached_tokens},
+    }
+
+
+def _status_error(cls, message: str, status: int, headers: Optional[Dict[str, str]] = None):
+    request = httpx.Request("POST", "https://mock.invalid/v1/chat/completions")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return cls(message, response=response, body=None)
+
+
+def _check_failure() -> None:
+    """Raises the simulated 429 / 500 for this request, if any."""
+    now = time.monotonic()
+    with _state_lock:
+        rpm = _config["rate_limit_rpm"]
+        if rpm:
+            while _request_times and now - _request_times[0] >= 60.0:
+                _request_times.popleft()
+            if len(_request_times) >= rpm:
+                retry_after = 60.0 - (now - _request_times[0])
+                raise _status_error(openai.RateLimitError, "Mock rate limit exceeded", 429,
+                                    {"retry-after": f"{retry_after:.3f}"})
+            _request_times.append(now)
+        roll = _rng.random()
+    if roll < _config["rate_limit_prob"]:
+        raise _status_error(openai.RateLimitError, "Mock rate limit (random)", 429,
+                            {"retry-after": str(_config["retry_after"])})
+    if roll < _config["rate_limit_prob"] + _config["error_rate"]:
+        raise _status_error(openai.InternalServerError, "Mock server error", 500)
+
+
+def _prepare(model: str, messages: List[Dict[str, Any]], response_format: Optional[Dict[str, Any]]):
+    """
+    Returns (content, usage, first-token delay, generation time) for one request, or raises its simulated error.
+    """
+    _check_failure()
+    content = _load_replay().get(request_key(messages, response_format))
+    if content is None:
+        content = _synthesize_content(model, messages, response_format)
+    usage = _usage(messages, content)
+    with _state_lock:
+        noise = _rng.uniform(-_config["jitter"], _config["jitter"])
+    first_token = max(0.0, _config["latency"] + noise)
+    speed = _config["tokens_per_sec"]
+    generation = usage["completion_tokens"] / speed if speed else 0.0
+    return content, usage, first_token, generation
+
+
+def _completion(model: str, content: str, usage: Dict[str, Any]) -> ChatCompletion:
+    return ChatCompletion.model_validate({
+        "id": f"mock-{hashlib.md5(content.encode('utf-8')).hexdigest()[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": content}}],
+        "usage": usage,
+    })
+
+
+def _chunk(model: str, delta: Optional[str], finish_reason: Optional[str] = None,
+           usage: Optional[Dict[str, Any]] = None) -> ChatCompletionChunk:
+    choices = [] if usage is not None else [{"index": 0, "finish_reason": finish_reason,
+                                             "delta": {"content": delta} if delta is not None else {}}]
+    return ChatCompletionChunk.model_validate({
+        "id": "mock-stream",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": choices,
+        "usage": usage,
+    })
+
+
+def _pieces(content: str, size: int = 16) -> List[str]:
+    return [content[i:i + size] for i in range(0, len(content), size)] or [""]
+
+
+class _Completions:
+    def create(self, model: str, messages: List[Dict[str, Any]], response_format: Optional[Dict[str, Any]] = None,
+               stream: bool = False, **kwargs):
+        content, usage, first_token, generation = _prepare(model, messages, response_format)
+        if stream:
+            return self._stream(model, content, usage, first_token, generation)
+        time.sleep(first_token + generation)
+        return _completion(model, content, usage)
+
+    @staticmethod
+    def _stream(model: str, content: str, usage: Dict[str, Any], first_token: float,
+                generation: float) -> Iterator[ChatCompletionChunk]:
+        pieces = _pieces(content)
+        time.sleep(first_token)
+        for piece in pieces:
+            yield _chunk(model, piece)
+            time.sleep(generation / len(pieces))
+        yield _chunk(model, None, finish_reason="stop")
+        yield _chunk(model, None, usage=usage)
+
+
+class _AsyncCompletions:
+    async def create(self, model: str, messages: List[Dict[str, Any]], response_format: Optional[Dict[str, Any]] = None,
+                     **kwargs) -> ChatCompletion:
+        content, usage, first_token, generation = _prepare(model, messages, response_format)
+        await asyncio.sleep(first_token + generation)
+        return _completion(model, content, usage)
+
+
+class _Chat:
+    def __init__(self, completions):
+        self.completions = completions
+
+
+class MockChatClient:
+    """Stands in for ai.Client: client.chat.completions.create(model=..., messages=..., stream=...)."""
+
+    def __init__(self):
+        self.chat = _Chat(_Completions())
+
+
+class AsyncMockChatClient:
+    """Stands in for openai.AsyncOpenAI on the async path."""
+
+    def __init__(self):
+        self.chat = _Chat(_AsyncCompletions())
@@ -0,0 +1,257 @@
+import bisect
+import glob
+import os
+import re
+import string
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .config import LABEL_DESCRIPTIONS
+from .chunking import estimate_tokens, segment_offsets
+from .utils import clean_tokens, normalize_text
+
+# Phrases specific to C3PA provisions. Each distinct pattern a passage matches adds keyword_weight to its
+# score, so generic privacy-policy vocabulary ("collect", "share", "cookies") is left to the TF-IDF part.
+KEYWORD_PATTERNS = [
+    r"\b(?:ccpa|cpra)\b|california consumer privacy|cal\.? civ\.? code|\b1798\.\d",
+    r"right to (?:know|request|access|delete|deletion|correct|opt[- ]?out|limit|non[- ]?discrimination|be informed)",
+    r"\bopt[- ]?out\b|do not (?:sell|share)|\bsale of (?:your |their )?personal",
+    r"(?:sell|sold|share|shared|disclos\w*) (?:\w+ ){0,3}personal (?:information|data)",
+    r"categor(?:y|ies) of (?:personal|sensitive|sources|third)",
+    r"sensitive personal (?:information|data)",
+    r"authori[sz]ed (?:agent|representative)",
+    r"verifiable (?:consumer )?request|verify your (?:identity|request)",
+    r"\bdiscriminat",
+    r"toll[- ]free|\b1-?8\d\d\b|@[a-z0-9-]+\.[a-z]{2,}|web ?form|submit (?:a |your )?request",
+    r"(?:last )?(?:updated|revised|modified)(?: on)?:|effective (?:date|as of)|last (?:updated|revised|modified)",
+    r"identifiers|internet (?:or other )?(?:electronic network )?activity|geolocation|biometric|inferences drawn"
+    r"|professional or employment|commercial information|protected classification",
+    r"business (?:or commercial )?purpose|commercial purpose",
+    r"(?:preceding|past|last) (?:12|twelve) months",
+    r"delete (?:your|the|any|their) (?:personal )?(?:information|data)|correct (?:inaccurate|your)",
+]
+
+_PUNCTUATION_TO_SPACE = str.maketrans(string.punctuation, " " * len(string.punctuation))
+
+PASSAGE_SEPARATOR = "\n\n[...]\n\n"
+
+
+def load_crawl_seed_terms(root_path: str) -> List[str]:
+    """
+    Regulation-specific keywords the C3PA crawler matched in the policies
+    (Textmatch_P / Textmatch_S columns of data/Crawl/*.csv, "||"-separated).
+    """
+    terms = set()
+    for csv_path in glob.glob(os.path.join(root_path, "Crawl", "*.csv")):
+        try:
+            df = pd.read_csv(csv_path)
+        except Exception as e:
+            print(f"Error reading crawl keywords from {os.path.basename(csv_path)}: {e}")
+            continue
+        for col in ("Textmatch_P", "Textmatch_S"):
+            if col not in df.columns: continue
+            for cell in df[col].dropna().astype(str):
+                terms.update(t.strip().lower() for t in cell.split("||") if t.strip())
+    return sorted(terms)
+
+
+class RelevanceFilter:
+    """
+    Cheap local pre-filter: keeps only the passages of a policy that can plausibly match a C3PA category.
+
+    Each passage (one line/paragraph, split like the chunker does) is scored as
+        max TF-IDF cosine similarity with any label description
+        + keyword_weight * number of distinct keyword patterns / crawl seed terms it matches
+    (IDF is computed over the passages of the policy itself, so boilerplate repeated across the page
+    is down-weighted), and kept if the score is >= min_score. Kept passages are widened by `context`
+    neighbours on each side, and dropped runs of at most max_gap_tokens between two kept passages are
+    kept too: the items of a category list or table rarely score on their own, but sit between ones that do.
+    `python -m src.prefilter` measures token reduction vs. GT span coverage for other settings.
+    """
+
+    def __init__(self, seed_terms: Optional[Iterable[str]] = None, min_score: float = 0.28,
+                 keyword_weight: float = 0.2, context: int = 1, max_gap_tokens: int = 800,
+                 max_passage_chars: int = 2000):
+        patterns = list(KEYWORD_PATTERNS) + [re.escape(t) for t in (seed_terms or [])]
+        self.keywords = [re.compile(p, re.IGNORECASE) for p in patterns]
+        self.min_score = min_score
+        self.keyword_weight = keyword_weight
+        self.context = context
+        self.max_gap_tokens = max_gap_tokens
+        self.max_passage_chars = max_passage_chars
+
+        label_tokens = [clean_tokens(desc) for desc in LABEL_DESCRIPTIONS.values()]
+        self.vocab: Dict[str, int] = {}
+        for toks in label_tokens:
+            for t in toks:
+                self.vocab.setdefault(t, len(self.vocab))
+        self.label_counts = self._counts(label_tokens)
+
+    def _counts(self, token_lists: List[List[str]]) -> np.ndarray:
+        counts = np.zeros((len(token_lists), len(self.vocab)), dtype=np.float64)
+        for row, toks in enumerate(token_lists):
+            for t in toks:
+                col = self.vocab.get(t)
+                if col is not None:
+                    counts[row, col] += 1
+        return counts
+
+    def _similarity(self, passages: List[str]) -> np.ndarray:
+        """
+        Max TF-IDF cosine similarity of each passage to any label description.
+        """
+        counts = self._counts([clean_tokens(p) for p in passages])
+        doc_freq = (counts > 0).sum(axis=0)
+        idf = np.log((1 + len(passages)) / (1 + doc_freq)) + 1.0
+
+        p_vec = counts * idf
+        l_vec = self.label_counts * idf
+        p_norm = np.linalg.norm(p_vec, axis=1, keepdims=True)
+        l_norm = np.linalg.norm(l_vec, axis=1, keepdims=True)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sims = (p_vec @ l_vec.T) / (p_norm * l_norm.T)
+        sims = np.nan_to_num(sims)
+        return sims.max(axis=1) if sims.size else np.zeros(len(passages))
+
+    def score(self, passages: List[str]) -> np.ndarray:
+        """
+        Relevance score of each passage: TF-IDF similarity plus keyword_weight per distinct keyword hit.
+        """
+        hits = np.array([sum(1 for k in self.keywords if k.search(p)) for p in passages], dtype=np.float64)
+        return self._similarity(passages) + self.keyword_weight * hits
+
+    def select(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Character ranges (start, end) of the kept passages, merged where adjacent.
+        """
+        segments = [(s, e) for s, e in segment_offsets(text, self.max_passage_chars) if text[s:e].strip()]
+        if not segments:
+            return []
+
+        passages = [text[s:e] for s, e in segments]
+        keep = self.score(passages) >= self.min_score
+
+        if self.context:
+            widened = keep.copy()
+            for shift in range(1, self.context + 1):
+                widened[shift:] |= keep[:-shift]
+                widened[:-shift] |= keep[shift:]
+            keep = widened
+
+        if self.max_gap_tokens:
+            tokens = np.array([estimate_tokens(p) for p in passages])
+            kept = np.flatnonzero(keep)
+            for before, after in zip(kept[:-1], kept[1:]):
+                if after - before > 1 and tokens[before + 1:after].sum() <= self.max_gap_tokens:
+                    keep[before + 1:after] = True
+
+        ranges: List[Tuple[int, int]] = []
+        for (start, end), kept in zip(segments, keep):
+            if not kept: continue
+            if ranges and ranges[-1][1] >= start - 1 and not text[ranges[-1][1]:start].strip():
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+        return ranges
+
+    def filter(self, text: str) -> Dict[str, Any]:
+        """
+        Returns:
+            text:       the kept passages joined by PASSAGE_SEPARATOR (what the LLM sees)
+            ranges:     [(start, end)] offsets of each kept passage in the original text, exactly as it
+                        appears in `text` (see to_original_offset)
+            tokens_in / tokens_out: estimated prompt tokens before and after filtering
+        """
+        ranges = []
+        for s, e in self.select(text):
+            # Trim the newlines the passage loses in the filtered text, so offsets map back exactly
+            s += len(text[s:e]) - len(text[s:e].lstrip("\n"))
+            e -= len(text[s:e]) - len(text[s:e].rstrip("\n"))
+            ranges.append((s, e))
+        filtered = PASSAGE_SEPARATOR.join(text[s:e] for s, e in ranges)
+        return {
+            "text": filtered,
+            "ranges": ranges,
+            "tokens_in": estimate_tokens(text),
+            "tokens_out": estimate_tokens(filtered),
+        }
+
+    @staticmethod
+    def to_original_offset(ranges: List[Tuple[int, int]], offset: int) -> Optional[int]:
+        """
+        Maps a character offset in the filtered text to the original text, given filter()'s ranges.
+        None if the offset falls on a PASSAGE_SEPARATOR.
+        """
+        position = 0
+        for start, end in ranges:
+            if offset < position + (end - start):
+                return start + offset - position if offset >= position else None
+            position += (end - start) + len(PASSAGE_SEPARATOR)
+        return None
+
+    @staticmethod
+    def gt_coverage(full_text: str, ranges: List[Tuple[int, int]], ground_truth: List[Dict[str, str]]) -> Optional[float]:
+        """
+        Share of ground-truth spans found in the full text that lie entirely inside one kept range of
+        filter() (1 - coverage is the recall ceiling lost to the pre-filter). A span that runs across a
+        dropped passage is lost. None if no span is locatable.
+        """
+        words = [(m.start(), m.end()) for m in re.finditer(r"\S+", full_text.translate(_PUNCTUATION_TO_SPACE))]
+        # normalize_text(full_text), with the offset of each word in it
+        norm_words = [full_text[start:end].lower() for start, end in words]
+        word_starts, position = [], 0
+        for word in norm_words:
+            word_starts.append(position)
+            position += len(word) + 1
+        full_norm = " ".join(norm_words)
+
+        locatable, kept = 0, 0
+        for gt in ground_truth:
+            # Some GT exports escape line breaks
+            span = normalize_text(gt.get("text", "").replace("\\n", "\n").replace("\\t", "\t"))
+            found = full_norm.find(span) if span else -1
+            if found < 0: continue
+            locatable += 1
+            while found >= 0:
+                start = words[bisect.bisect_right(word_starts, found) - 1][0]
+                end = words[bisect.bisect_right(word_starts, found + len(span) - 1) - 1][1]
+                if any(s <= start and end <= e for s, e in ranges):
+                    kept += 1
+                    break
+                found = full_norm.find(span, found + 1)
+        return kept / locatable if locatable else None
+
+
+if __name__ == "__main__":
+    import argparse
+    from .corpus import iter_c3pa_dataset
+
+    parser = argparse.ArgumentParser(description="Token reduction vs. ground-truth recall of the relevance pre-filter")
+    parser.add_argument("--data", default="./data")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--min-score", type=float, default=0.28)
+    parser.add_argument("--keyword-weight", type=float, default=0.2)
+    parser.add_argument("--context", type=int, default=1)
+    parser.add_argument("--max-gap-tokens", type=int, default=800)
+    parser.add_argument("--no-seeds", action="store_true", help="Do not use the crawl Textmatch keywords")
+    args = parser.parse_args()
+
+    seeds = [] if args.no_seeds else load_crawl_seed_terms(args.data)
+    relevance_filter = RelevanceFilter(seeds, min_score=args.min_score, keyword_weight=args.keyword_weight,
+                                       context=args.context, max_gap_tokens=args.max_gap_tokens)
+
+    tokens_in, tokens_out, coverages = 0, 0, []
+    for pol in iter_c3pa_dataset(args.data, limit=args.limit):
+        result = relevance_filter.filter(pol['text'])
+        tokens_in += result["tokens_in"]
+        tokens_out += result["tokens_out"]
+        coverage = relevance_filter.gt_coverage(pol['text'], result["ranges"], pol['ground_truth'])
+        if coverage is not None:
+            coverages.append(coverage)
+
+    print(f"Policies: {len(coverages)} | seed terms: {len(seeds)}")
+    print(f"Prompt tokens: {tokens_in} -> {tokens_out} ({1 - tokens_out / max(tokens_in, 1):.1%} reduction)")
+    print(f"GT span coverage: mean {np.mean(coverages):.2%}, min {np.min(coverages):.2%} "
+          f"(recall loss {1 - np.mean(coverages):.2%})")
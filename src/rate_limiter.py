@@ -0,0 +1,219 @@
+import asyncio
+import email.utils
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import openai
+
+# Status codes worth retrying: timeouts, conflicts, rate limits and server-side errors
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+class TokenBucket:
+    """
+    Continuous token bucket. reserve() takes the amount immediately (the level may go negative)
+    and returns how long the caller must wait for the debt to be refilled, so concurrent callers
+    are spaced out without holding a lock while they sleep.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = 10.0):
+        self.per_minute = per_minute
+        self.capacity = max(1.0, per_minute * burst_seconds / 60.0)
+        self._level = self.capacity
+        self._updated = time.monotonic()
+
+    def reserve(self, amount: float, now: float, scale: float = 1.0) -> float:
+        rate = self.per_minute * scale / 60.0
+        self._level = min(self.capacity, self._level + (now - self._updated) * rate)
+        self._updated = now
+        self._level -= amount
+        return 0.0 if self._level >= 0 else -self._level / rate
+
+    def adjust(self, amount: float) -> None:
+        """Charge (positive) or refund (negative) tokens after the fact, e.g. once actual usage is known."""
+        self._level = min(self.capacity, self._level - amount)
+
+
+class ProviderRateLimiter:
+    """
+    Requests/min and tokens/min budget for one provider, shared by all clients, threads and event loops.
+
+    Adaptive: a 429 halves the effective rate (down to min_scale) and pauses the whole provider for
+    Retry-After (or the back-off delay); each success then restores a little of the rate.
+    """
+
+    def __init__(self, provider: str, rpm: Optional[float] = None, tpm: Optional[float] = None,
+                 min_scale: float = 0.1, recovery: float = 0.05):
+        self.provider = provider
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.min_scale = min_scale
+        self.recovery = recovery
+
+        self._lock = threading.Lock()
+        self._scale = 1.0
+        self._paused_until = 0.0
+        self._metrics = {"requests": 0, "throttled": 0, "wait_sec": 0.0, "rate_limited": 0, "retries": 0, "errors": 0}
+
+    def _reserve(self, tokens: int) -> float:
+        now = time.monotonic()
+        with self._lock:
+            wait = max(0.0, self._paused_until - now)
+            if self.requests is not None:
+                wait = max(wait, self.requests.reserve(1, now, self._scale))
+            if self.tokens is not None and tokens:
+                wait = max(wait, self.tokens.reserve(tokens, now, self._scale))
+            self._metrics["requests"] += 1
+            if wait > 0:
+                self._metrics["throttled"] += 1
+                self._metrics["wait_sec"] += wait
+            return wait
+
+    def _pause_remaining(self) -> float:
+        with self._lock:
+            return max(0.0, self._paused_until - time.monotonic())
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Blocks until a request of ~`tokens` prompt tokens may be sent. Returns the time waited."""
+        waited = 0.0
+        wait = self._reserve(tokens)
+        while wait > 0:
+            time.sleep(wait)
+            waited += wait
+            # A 429 elsewhere may have paused the provider while we slept
+            wait = self._pause_remaining()
+        return waited
+
+    async def aacquire(self, tokens: int = 0) -> float:
+        waited = 0.0
+        wait = self._reserve(tokens)
+        while wait > 0:
+            await asyncio.sleep(wait)
+            waited += wait
+            wait = self._pause_remaining()
+        return waited
+
+    def record_success(self, estimated_tokens: int = 0, actual_tokens: Optional[int] = None) -> None:
+        with self._lock:
+            if self.tokens is not None and actual_tokens is not None:
+                self.tokens.adjust(actual_tokens - estimated_tokens)
+            self._scale = min(1.0, self._scale + self.recovery)
+
+    def record_failure(self, rate_limited: bool, pause: float, will_retry: bool) -> None:
+        with self._lock:
+            self._metrics["errors"] += 1
+            if will_retry:
+                self._metrics["retries"] += 1
+            if rate_limited:
+                self._metrics["rate_limited"] += 1
+                now = time.monotonic()
+                # 429s from requests already in flight during a pause count as one signal
+                if now >= self._paused_until:
+                    self._scale = max(self.min_scale, self._scale / 2)
+                self._paused_until = max(self._paused_until, now + pause)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._metrics)
+            stats["wait_sec"] = round(stats["wait_sec"], 2)
+            stats["rate_scale"] = round(self._scale, 2)
+        return stats
+
+
+class RetryPolicy:
+    """
+    Exponential back-off with full jitter, capped at max_delay. A server-provided Retry-After is a lower bound
+    that max_delay never truncates: retrying before it only earns another 429.
+    """
+
+    def __init__(self, max_retries: int = 6, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            return max(retry_after, backoff)
+        return backoff
+
+
+def status_code(e: BaseException) -> Optional[int]:
+    return getattr(e, "status_code", None)
+
+
+def is_retryable(e: BaseException) -> bool:
+    if isinstance(e, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    return status_code(e) in RETRYABLE_STATUS
+
+
+def retry_after_seconds(e: BaseException) -> Optional[float]:
+    """Retry-After (seconds or HTTP date) or retry-after-ms from the error response, if any."""
+    response = getattr(e, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+# Process-wide registry, one limiter per provider
+_limits: Dict[str, Dict[str, float]] = {}
+_limiters: Dict[str, ProviderRateLimiter] = {}
+_registry_lock = threading.Lock()
+_retry_policy = RetryPolicy()
+
+
+def set_provider_rate_limits(limits: Dict[str, Dict[str, float]]) -> None:
+    """
+    Sets per-provider budgets, e.g. {"openai": {"rpm": 500, "tpm": 200000}}.
+    Providers without an entry are not throttled (but still pause after a 429).
+    """
+    with _registry_lock:
+        _limits.clear()
+        _limits.update({p.lower(): dict(v) for p, v in limits.items()})
+        _limiters.clear()
+
+
+def set_retry_policy(max_retries: int = 6, base_delay: float = 1.0, max_delay: float = 60.0) -> None:
+    global _retry_policy
+    _retry_policy = RetryPolicy(max_retries, base_delay, max_delay)
+
+
+def get_retry_policy() -> RetryPolicy:
+    return _retry_policy
+
+
+def get_rate_limiter(provider: str) -> ProviderRateLimiter:
+    with _registry_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            limits = _limits.get(provider, {})
+            limiter = ProviderRateLimiter(provider, rpm=limits.get("rpm"), tpm=limits.get("tpm"))
+            _limiters[provider] = limiter
+    return limiter
+
+
+def rate_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    with _registry_lock:
+        limiters = dict(_limiters)
+    return {provider: limiter.metrics() for provider, limiter in limiters.items()}
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .visualizer import (
+    ASSET_CSS, ASSET_JS, INDEX_FILE, VISUALIZER_VERSION, HTMLVisualizer, _BADGES, _write_atomic,
+    COLUMN_BREAK, MISSED_CARD, PAGE_HEAD, PAGE_TAIL, PREDICTION_CARD, REPORT_FOOTER, REPORT_HEADER,
+)
+
+MANIFEST_FILE = "report_manifest.json"
+
+# Everything that shapes a report page besides its data (the shared CSS/JS assets are rewritten separately)
+RENDERER_FINGERPRINT = hashlib.sha256(json.dumps([
+    VISUALIZER_VERSION,
+    [t.template for t in (PAGE_HEAD, PAGE_TAIL, REPORT_HEADER, PREDICTION_CARD, MISSED_CARD)],
+    [COLUMN_BREAK, REPORT_FOOTER],
+    _BADGES,
+]).encode("utf-8")).hexdigest()[:16]
+
+
+def report_fingerprint(policy_id, human_anns, llm_anns, ai_decisions=None, missed_gts=None, metrics=None) -> str:
+    """Content hash of everything generate_report() renders for one page."""
+    payload = json.dumps({
+        "renderer": RENDERER_FINGERPRINT,
+        "policy_id": policy_id,
+        "gt_count": len(human_anns),
+        "predictions": llm_anns,
+        "decisions": ai_decisions,
+        "missed": missed_gts,
+        "metrics": metrics,
+    }, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ReportBuilder:
+    """
+    Incremental report builds. The manifest (MANIFEST_FILE in reports_dir) maps each report file to the
+    content hash it was rendered from; render() skips pages whose hash and file are unchanged, and
+    finish() prunes reports that are no longer part of the results before saving the new manifest.
+
+    Worker processes can each use their own builder for render() and hand the returned fingerprints to
+    the main builder's record(); only the main builder calls finish().
+    """
+
+    def __init__(self, reports_dir: str, visualizer: Optional[HTMLVisualizer] = None, force: bool = False):
+        self.reports_dir = reports_dir
+        self.visualizer = visualizer or HTMLVisualizer()
+        self.force = force
+        self.previous = self._load_manifest()
+        self.current: Dict[str, str] = {}
+        self.stats = {"rendered": 0, "unchanged": 0, "pruned": 0}
+        self._lock = threading.Lock()
+
+    def _load_manifest(self) -> Dict[str, str]:
+        try:
+            with open(os.path.join(self.reports_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+                return json.load(f).get("reports", {})
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"Report manifest unreadable, rebuilding all reports: {e}")
+            return {}
+
+    def render(self, policy_id, full_text, human_anns, llm_anns, filename, ai_decisions=None, missed_gts=None,
+               metrics=None) -> Tuple[str, bool]:
+        """
+        generate_report() unless an identical page exists. Returns (fingerprint, rendered).
+        """
+        fingerprint = report_fingerprint(policy_id, human_anns, llm_anns, ai_decisions, missed_gts, metrics)
+        name = os.path.basename(filename)
+        rendered = self.force or self.previous.get(name) != fingerprint or not os.path.exists(filename)
+        if rendered:
+            self.visualizer.generate_report(policy_id, full_text, human_anns, llm_anns, filename,
+                                            ai_decisions=ai_decisions, missed_gts=missed_gts, metrics=metrics)
+        self.record(filename, fingerprint, rendered)
+        return fingerprint, rendered
+
+    def record(self, filename: str, fingerprint: str, rendered: bool) -> None:
+        with self._lock:
+            self.current[os.path.basename(filename)] = fingerprint
+            self.stats["rendered" if rendered else "unchanged"] += 1
+
+    def prune(self, keep: Iterable[str], dry_run: bool = False) -> int:
+        """
+        Deletes report pages (and leftover temp files) in reports_dir that are not in `keep` (paths or
+        basenames). The index, the shared assets and the manifest are never touched.
+        """
+        keep_names = {os.path.basename(k) for k in keep}
+        protected = {INDEX_FILE, ASSET_CSS, ASSET_JS, MANIFEST_FILE}
+        pruned = 0
+        for name in sorted(os.listdir(self.reports_dir)):
+            orphan = name.endswith(".tmp") or (name.endswith(".html") and name not in keep_names)
+            if name in protected or not orphan:
+                continue
+            path = os.path.join(self.reports_dir, name)
+            if dry_run:
+                print(f"[DRY RUN] Would delete: {path}")
+            else:
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    print(f"Error deleting report {path}: {e}")
+                    continue
+            pruned += 1
+        with self._lock:
+            self.stats["pruned"] += pruned
+        return pruned
+
+    def finish(self, keep: Optional[Iterable[str]] = None, prune: bool = True) -> Dict[str, Any]:
+        """
+        Prunes orphans and saves the manifest. keep: every report that belongs to the results (including
+        ones not rendered in this build, e.g. pairs skipped by --resume); defaults to this build's reports.
+        """
+        keep_names = {os.path.basename(k) for k in keep} if keep is not None else set(self.current)
+        if prune:
+            self.prune(keep_names)
+
+        reports = {}
+        for name in sorted(keep_names):
+            fingerprint = self.current.get(name) or self.previous.get(name)
+            if fingerprint and os.path.exists(os.path.join(self.reports_dir, name)):
+                reports[name] = fingerprint
+
+        manifest = {"renderer": RENDERER_FINGERPRINT, "reports": reports}
+        _write_atomic(os.path.join(self.reports_dir, MANIFEST_FILE), lambda f: json.dump(manifest, f, indent=1))
+        self.previous = reports
+        return dict(self.stats)
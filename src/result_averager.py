@@ -2,6 +2,10 @@ import pandas as pd
 import os
 import sys
 
+from .config import LABEL_DESCRIPTIONS
+from .results_store import ResultsStore
+from .significance import CONFIDENCE, model_intervals, pairwise_tests, shared_policy_rows
+
 try:
     import plotly.express as px
     import plotly.graph_objects as go
@@ -10,16 +14,23 @@ except ImportError:
     print("Error: Plotly is not installed. Please run 'pip install plotly' to generate the HTML report.")
     sys.exit(1)
 
-def generate_average_report(input_csv="benchmark_full_results.csv", output_html="benchmark_average_report.html"):
+def generate_average_report(results_db="benchmark_results.sqlite", output_html="benchmark_average_report.html",
+                            run_id=None):
     """
-    Reads benchmark results, filters out invalid rows (all stats 0.0),
-    averages metrics per model, and generates an HTML report with graphs.
+    Reads the per-pair metrics of a run (default: the latest finished one) from the results store,
+    filters out invalid rows (all stats 0.0), averages metrics per model, and generates an HTML report with graphs.
     """
-    if not os.path.exists(input_csv):
-        print(f"Error: {input_csv} not found.")
+    if not os.path.exists(results_db):
+        print(f"Error: {results_db} not found.")
         return
 
-    df = pd.read_csv(input_csv)
+    store = ResultsStore(results_db)
+    run_id = run_id if run_id is not None else store.latest_run_id()
+    df = store.pair_metrics(run_id)
+    if df.empty:
+        print(f"Error: no results for run {run_id} in {results_db}.")
+        store.close()
+        return
 
     # --- Data Cleaning ---
     # Identify "failed" rows. A row is failed if metrics are all 0.
@@ -35,6 +46,8 @@ def generate_average_report(input_csv="benchmark_full_results.csv", output_html=
         (df['ai_precision'] == 0.0) &
         (df['ai_recall'] == 0.0)
     )
+    # Rows recorded with an explicit error (failed call or unparseable output) are failures too
+    df['is_failed'] |= df['error'].notna()
 
     # Identify policies that have ANY failed row
     failed_policies = df[df['is_failed']]['policy_id'].unique()
@@ -53,8 +66,16 @@ def generate_average_report(input_csv="benchmark_full_results.csv", output_html=
 
     if clean_df.empty:
         print("Error: No data left after filtering.")
+        store.close()
         return
 
+    # Means, CIs and tests over the policies every model has results for (coverage differs after partial runs)
+    total_policies = clean_df['policy_id'].nunique()
+    clean_df = shared_policy_rows(clean_df, ['f1', 'ai_f1'])
+    if clean_df['policy_id'].nunique() < total_policies:
+        print(f"Policies with results for every model: {clean_df['policy_id'].nunique()} of {total_policies} "
+              f"(the others are left out of the leaderboard)")
+
     # --- Aggregation ---
     # Group by model and calculate mean of metrics
     metrics = ['precision', 'recall', 'f1', 'ai_precision', 'ai_recall', 'ai_f1', 'duration_sec']
@@ -62,16 +83,49 @@ def generate_average_report(input_csv="benchmark_full_results.csv", output_html=
     
     # Sort by AI F1
     leaderboard = leaderboard.sort_values('ai_f1', ascending=False)
+    models = leaderboard['model'].tolist()
+
+    # Policy-level bootstrap CIs of the means, and paired permutation tests between models (better model first)
+    intervals = model_intervals(clean_df, ['f1', 'ai_f1'], models)
+    leaderboard = leaderboard.merge(intervals, left_on='model', right_index=True)
+    comparisons = pairwise_tests(clean_df, 'ai_f1', models)
 
     print("\n--- Leaderboard (Averaged) ---")
-    print(leaderboard)
+    print(leaderboard.round(3).to_string(index=False))
+    print(f"({CONFIDENCE:.0%} bootstrap CIs over {intervals['ci_policies'].iloc[0]} policies)")
+    if not comparisons.empty:
+        print("\n--- Paired Permutation Tests (AI F1) ---")
+        print(comparisons.to_string(index=False))
+        print("p_holm < 0.05: difference unlikely to be noise (Holm-corrected over all pairs)")
+
+    # Per-label and per-subset AI metrics, from the stored judge decisions and GT outcomes (same policies)
+    breakdown = store.metric_breakdown(run_id, exclude_policies=failed_policies)
+    store.close()
+    label_f1 = breakdown[breakdown['dimension'] == 'label'].pivot(index='value', columns='model', values='f1')
+    # Taxonomy order first, then any other labels the models produced
+    label_order = [l for l in LABEL_DESCRIPTIONS if l in label_f1.index]
+    label_order += sorted(l for l in label_f1.index if l not in LABEL_DESCRIPTIONS)
+    label_f1 = label_f1.reindex(index=label_order, columns=[m for m in models if m in label_f1.columns]).rename_axis(index='label')
+    subsets = breakdown[breakdown['dimension'] == 'subset'].drop(columns='dimension').rename(columns={'value': 'subset'})
+
+    if not subsets.empty:
+        print("\n--- Per Subset (AI, micro-averaged) ---")
+        print(subsets.to_string(index=False))
+        print("\n--- Per Label AI F1 ---")
+        print(label_f1.to_string())
 
     # --- Visualization ---
     fig = make_subplots(
-        rows=2, cols=2,
-        subplot_titles=("AI F1 vs Strict F1", "AI Precision vs Recall", "Duration (sec)", "Detailed Metrics Table"),
+        rows=4, cols=2,
+        subplot_titles=(f"AI F1 vs Strict F1 ({CONFIDENCE:.0%} bootstrap CI)", "AI Precision vs Recall", "Duration (sec)",
+                        "Detailed Metrics Table", "AI F1 per Label", "AI Metrics per Subset",
+                        "Paired Permutation Tests (AI F1)"),
         specs=[[{"type": "xy"}, {"type": "xy"}],
-               [{"type": "xy"}, {"type": "table"}]]
+               [{"type": "xy"}, {"type": "table"}],
+               [{"type": "xy", "colspan": 2}, None],
+               [{"type": "table"}, {"type": "table"}]],
+        row_heights=[0.2, 0.2, 0.45, 0.15],
+        vertical_spacing=0.06
     )
 
     # 1. AI F1 vs Strict F1 (Bar Chart)
@@ -80,6 +134,8 @@ def generate_average_report(input_csv="benchmark_full_results.csv", output_html=
         y=leaderboard['ai_f1'], 
         name='AI F1',
         marker_color='royalblue',
+        error_y=dict(type='data', array=(leaderboard['ai_f1_high'] - leaderboard['ai_f1']).clip(lower=0),
+                     arrayminus=(leaderboard['ai_f1'] - leaderboard['ai_f1_low']).clip(lower=0)),
         text=leaderboard['ai_f1'].round(3),
         textposition='auto'
     ), row=1, col=1)
@@ -89,6 +145,8 @@ def generate_average_report(input_csv="benchmark_full_results.csv", output_html=
         y=leaderboard['f1'], 
         name='Strict F1',
         marker_color='lightgray',
+        error_y=dict(type='data', array=(leaderboard['f1_high'] - leaderboard['f1']).clip(lower=0),
+                     arrayminus=(leaderboard['f1'] - leaderboard['f1_low']).clip(lower=0)),
         text=leaderboard['f1'].round(3),
         textposition='auto'
     ), row=1, col=1)
@@ -130,10 +188,47 @@ def generate_average_report(input_csv="benchmark_full_results.csv", output_html=
                    align='left')
     ), row=2, col=2)
 
+    # 5. Label x model heatmap (blank: the model never predicted / the GT never contains that label)
+    if not label_f1.empty:
+        fig.add_trace(go.Heatmap(
+            z=label_f1.values,
+            x=label_f1.columns.tolist(),
+            y=label_f1.index.tolist(),
+            zmin=0, zmax=1,
+            colorscale='RdYlGn',
+            text=label_f1.round(2).values,
+            texttemplate='%{text}',
+            colorbar=dict(title='AI F1', len=0.4, y=0.35),
+            showscale=True
+        ), row=3, col=1)
+        fig.update_yaxes(autorange='reversed', row=3, col=1)
+
+    # 6. Subset table
+    if not subsets.empty:
+        fig.add_trace(go.Table(
+            header=dict(values=list(subsets.columns),
+                        fill_color='paleturquoise',
+                        align='left'),
+            cells=dict(values=[subsets[k].tolist() for k in subsets.columns],
+                       fill_color='lavender',
+                       align='left')
+        ), row=4, col=1)
+
+    # 7. Pairwise significance table
+    if not comparisons.empty:
+        fig.add_trace(go.Table(
+            header=dict(values=list(comparisons.columns),
+                        fill_color='paleturquoise',
+                        align='left'),
+            cells=dict(values=[comparisons[k].tolist() for k in comparisons.columns],
+                       fill_color=[['mistyrose' if p < 0.05 else 'lavender' for p in comparisons['p_holm']]],
+                       align='left')
+        ), row=4, col=2)
+
     # Layout updates
     fig.update_layout(
-        title_text=f"Benchmark Results Summary (N={clean_df['policy_id'].nunique()} policies)",
-        height=1000,
+        title_text=f"Benchmark Results Summary (run {run_id}, N={clean_df['policy_id'].nunique()} of {total_policies} policies)",
+        height=2200,
         showlegend=True,
         barmode='group'
     )
@@ -143,4 +238,9 @@ def generate_average_report(input_csv="benchmark_full_results.csv", output_html=
     print(f"\nReport generated: {os.path.abspath(output_html)}")
 
 if __name__ == "__main__":
-    generate_average_report("../benchmark_full_results.csv", "../benchmark_average_report.html")
+    # python -m src.result_averager [results_db] [run_id]
+    generate_average_report(
+        sys.argv[1] if len(sys.argv) > 1 else "benchmark_results.sqlite",
+        "benchmark_average_report.html",
+        run_id=int(sys.argv[2]) if len(sys.argv) > 2 else None
+    )
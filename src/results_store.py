@@ -0,0 +1,334 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from .telemetry import CallRecord
+
+# Per-pair columns of pair_metrics, in table order (row keys outside this list are not stored)
+METRIC_COLUMNS = [
+    "precision", "recall", "f1", "true_positives", "false_positives", "false_negatives",
+    "ai_precision", "ai_recall", "ai_f1", "duration_sec", "unjudged_pairs",
+    "llm_calls", "prompt_tokens", "completion_tokens", "cached_tokens", "llm_latency_sec", "cost_usd",
+    "prompt_tokens_in", "prompt_tokens_out", "prefilter_gt_coverage",
+]
+
+DECISION_COLUMNS = ["status", "match_with", "closest_match", "closest_score", "matched_count", "reasoning"]
+
+TELEMETRY_COLUMNS = [
+    "timestamp", "provider", "model", "policy_id", "stage", "latency_sec", "ttfb_sec",
+    "prompt_tokens", "completion_tokens", "cached_tokens", "retries", "wait_sec", "error",
+]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    mode TEXT NOT NULL,
+    started REAL NOT NULL,
+    finished REAL,
+    config TEXT
+);
+CREATE TABLE IF NOT EXISTS pair_metrics (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    policy_id TEXT NOT NULL,
+    model TEXT NOT NULL,
+    {", ".join(f"{c} REAL" for c in METRIC_COLUMNS)},
+    error TEXT,
+    PRIMARY KEY (run_id, policy_id, model)
+);
+CREATE TABLE IF NOT EXISTS predictions (
+    run_id INTEGER NOT NULL,
+    policy_id TEXT NOT NULL,
+    model TEXT NOT NULL,
+    pred_index INTEGER NOT NULL,
+    label TEXT,
+    text TEXT,
+    reasoning TEXT,
+    PRIMARY KEY (run_id, policy_id, model, pred_index)
+);
+CREATE TABLE IF NOT EXISTS judge_decisions (
+    run_id INTEGER NOT NULL,
+    policy_id TEXT NOT NULL,
+    model TEXT NOT NULL,
+    pred_index INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    match_with TEXT,
+    closest_match TEXT,
+    closest_score REAL,
+    matched_count INTEGER,
+    reasoning TEXT,
+    PRIMARY KEY (run_id, policy_id, model, pred_index)
+);
+CREATE TABLE IF NOT EXISTS gt_outcomes (
+    run_id INTEGER NOT NULL,
+    policy_id TEXT NOT NULL,
+    model TEXT NOT NULL,
+    gt_index INTEGER NOT NULL,
+    label TEXT,
+    found INTEGER NOT NULL,
+    PRIMARY KEY (run_id, policy_id, model, gt_index)
+);
+CREATE TABLE IF NOT EXISTS call_telemetry (
+    run_id INTEGER NOT NULL,
+    timestamp REAL NOT NULL,
+    provider TEXT,
+    model TEXT,
+    policy_id TEXT,
+    stage TEXT,
+    latency_sec REAL,
+    ttfb_sec REAL,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    cached_tokens INTEGER,
+    retries INTEGER,
+    wait_sec REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_pair_metrics_model ON pair_metrics(run_id, model);
+CREATE INDEX IF NOT EXISTS idx_judge_decisions_status ON judge_decisions(run_id, model, status);
+CREATE INDEX IF NOT EXISTS idx_call_telemetry_run ON call_telemetry(run_id, model, stage);
+"""
+
+
+class ResultsStore:
+    """
+    Benchmark results in one SQLite file, normalized into runs, pair_metrics (one row per policy x model),
+    predictions, judge_decisions (one per prediction, same pred_index), gt_outcomes (whether each ground-truth
+    span was found) and call_telemetry.
+
+    A run is written by start_run() -> add_rows() -> finish_run(); the store is also a telemetry sink
+    (emit), buffering call records of the current run. Readers query with the DataFrame helpers below,
+    which default to the latest finished run.
+    """
+
+    TELEMETRY_FLUSH_EVERY = 500
+
+    def __init__(self, path: str = "./benchmark_results.sqlite"):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.run_id: Optional[int] = None
+        self._lock = threading.Lock()
+        self._telemetry: List[tuple] = []
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    # --- Writing ---
+
+    def start_run(self, mode: str, config: Optional[Dict[str, Any]] = None) -> int:
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO runs (mode, started, config) VALUES (?, ?, ?)",
+                (mode, time.time(), json.dumps(config or {}, default=str))
+            )
+            self._conn.commit()
+            self.run_id = cur.lastrowid
+        return self.run_id
+
+    def add_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """
+        Stores result rows (as journaled by main.py) in the current run, together with their
+        "predictions", "decisions" and "gt_outcomes" lists. A pair written again replaces its earlier rows.
+        """
+        if self.run_id is None:
+            raise RuntimeError("ResultsStore.add_rows() called before start_run()")
+
+        metrics, predictions, decisions, outcomes, pairs = [], [], [], [], []
+        for row in rows:
+            key = (self.run_id, row["policy_id"], row["model"])
+            pairs.append(key)
+            metrics.append(key + tuple(row.get(c) for c in METRIC_COLUMNS) + (row.get("error"),))
+            for i, pred in enumerate(row.get("predictions") or []):
+                predictions.append(key + (i, pred.get("label"), pred.get("text"), pred.get("reasoning")))
+            for i, decision in enumerate(row.get("decisions") or []):
+                decisions.append(key + (i,) + tuple(decision.get(c) for c in DECISION_COLUMNS))
+            for i, outcome in enumerate(row.get("gt_outcomes") or []):
+                outcomes.append(key + (i, outcome.get("label"), int(bool(outcome.get("found")))))
+
+        with self._lock:
+            with self._conn:
+                for table in ("pair_metrics", "predictions", "judge_decisions", "gt_outcomes"):
+                    self._conn.executemany(
+                        f"DELETE FROM {table} WHERE run_id = ? AND policy_id = ? AND model = ?", pairs
+                    )
+                self._conn.executemany(
+                    f"INSERT INTO pair_metrics VALUES ({', '.join('?' * (len(METRIC_COLUMNS) + 4))})", metrics
+                )
+                self._conn.executemany("INSERT INTO predictions VALUES (?, ?, ?, ?, ?, ?, ?)", predictions)
+                self._conn.executemany("INSERT INTO judge_decisions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", decisions)
+                self._conn.executemany("INSERT INTO gt_outcomes VALUES (?, ?, ?, ?, ?, ?)", outcomes)
+
+    def import_csv(self, csv_path: str) -> int:
+        """
+        Stores a flat results CSV (the pre-store format, or a RESULTS_CSV export) as a finished run of
+        mode "import". Returns its run_id.
+        """
+        df = pd.read_csv(csv_path)
+        rows = [
+            {k: v for k, v in row.items() if not pd.isna(v)}
+            for row in df.to_dict("records")
+        ]
+        self.start_run("import", {"source": os.path.abspath(csv_path)})
+        self.add_rows(rows)
+        self.finish_run()
+        return self.run_id
+
+    def emit(self, record: CallRecord) -> None:
+        """Telemetry sink: buffers the call for the current run (dropped if no run was started)."""
+        if self.run_id is None:
+            return
+        values = asdict(record)
+        with self._lock:
+            self._telemetry.append((self.run_id,) + tuple(values[c] for c in TELEMETRY_COLUMNS))
+            if len(self._telemetry) >= self.TELEMETRY_FLUSH_EVERY:
+                self._flush_telemetry()
+
+    def _flush_telemetry(self) -> None:
+        if not self._telemetry:
+            return
+        with self._conn:
+            self._conn.executemany(
+                f"INSERT INTO call_telemetry VALUES ({', '.join('?' * (len(TELEMETRY_COLUMNS) + 1))})",
+                self._telemetry
+            )
+        self._telemetry = []
+
+    def finish_run(self) -> None:
+        with self._lock:
+            self._flush_telemetry()
+            self._conn.execute("UPDATE runs SET finished = ? WHERE run_id = ?", (time.time(), self.run_id))
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_telemetry()
+            self._conn.close()
+
+    # --- Reading ---
+
+    def latest_run_id(self, finished: bool = True) -> Optional[int]:
+        query = "SELECT MAX(run_id) FROM runs" + (" WHERE finished IS NOT NULL" if finished else "")
+        with self._lock:
+            return self._conn.execute(query).fetchone()[0]
+
+    def query(self, sql: str, params: Iterable[Any] = ()) -> pd.DataFrame:
+        with self._lock:
+            return pd.read_sql_query(sql, self._conn, params=list(params))
+
+    def _table(self, table: str, run_id: Optional[int], model: Optional[str] = None,
+               policy_id: Optional[str] = None) -> pd.DataFrame:
+        run_id = run_id if run_id is not None else self.latest_run_id()
+        sql, params = f"SELECT * FROM {table} WHERE run_id = ?", [run_id]
+        if model is not None:
+            sql, params = sql + " AND model = ?", params + [model]
+        if policy_id is not None:
+            sql, params = sql + " AND policy_id = ?", params + [policy_id]
+        return self.query(sql, params)
+
+    def runs(self) -> pd.DataFrame:
+        return self.query("SELECT * FROM runs ORDER BY run_id")
+
+    def pair_metrics(self, run_id: Optional[int] = None, model: Optional[str] = None) -> pd.DataFrame:
+        return self._table("pair_metrics", run_id, model)
+
+    def predictions(self, run_id: Optional[int] = None, model: Optional[str] = None,
+                    policy_id: Optional[str] = None) -> pd.DataFrame:
+        """Predictions joined with their judge decision (status, match, reasoning)."""
+        run_id = run_id if run_id is not None else self.latest_run_id()
+        sql = (
+            "SELECT p.*, d.status, d.match_with, d.closest_match, d.closest_score, d.matched_count,"
+            " d.reasoning AS judge_reasoning"
+            " FROM predictions p LEFT JOIN judge_decisions d USING (run_id, policy_id, model, pred_index)"
+            " WHERE p.run_id = ?"
+        )
+        params = [run_id]
+        if model is not None:
+            sql, params = sql + " AND p.model = ?", params + [model]
+        if policy_id is not None:
+            sql, params = sql + " AND p.policy_id = ?", params + [policy_id]
+        return self.query(sql + " ORDER BY p.policy_id, p.model, p.pred_index", params)
+
+    def judge_decisions(self, run_id: Optional[int] = None, model: Optional[str] = None,
+                        policy_id: Optional[str] = None) -> pd.DataFrame:
+        return self._table("judge_decisions", run_id, model, policy_id)
+
+    def call_telemetry(self, run_id: Optional[int] = None, model: Optional[str] = None) -> pd.DataFrame:
+        return self._table("call_telemetry", run_id, model)
+
+    def metric_breakdown(self, run_id: Optional[int] = None, exclude_policies: Iterable[str] = ()) -> pd.DataFrame:
+        """
+        AI-judged precision/recall/F1 per model and label, and per model and subset (the policy ID prefix,
+        "DB" / "WS"), micro-averaged over all stored decisions and ground-truth outcomes of the run.
+        Columns: model, dimension ("label" / "subset"), value, predictions, correct, gt, found, precision,
+        recall, f1. Precision uses the predicted label, recall the ground-truth label.
+        """
+        run_id = run_id if run_id is not None else self.latest_run_id()
+        # One row per prediction (is_gt = 0, hit = judged correct) and per GT span (is_gt = 1, hit = found)
+        df = self.query(
+            "SELECT p.model, p.policy_id, p.label, d.status != 'WRONG' AS hit, 0 AS is_gt"
+            " FROM predictions p JOIN judge_decisions d USING (run_id, policy_id, model, pred_index)"
+            " WHERE p.run_id = ?"
+            " UNION ALL"
+            " SELECT model, policy_id, label, found AS hit, 1 AS is_gt FROM gt_outcomes WHERE run_id = ?",
+            [run_id, run_id]
+        )
+        df = df[~df["policy_id"].isin(list(exclude_policies))]
+
+        is_gt = df["is_gt"].astype(bool)
+        hit = df["hit"].fillna(0).astype(bool)
+        counts = pd.DataFrame({
+            "model": df["model"],
+            "predictions": ~is_gt,
+            "correct": ~is_gt & hit,
+            "gt": is_gt,
+            "found": is_gt & hit,
+        }).astype({"predictions": int, "correct": int, "gt": int, "found": int})
+
+        # Both breakdowns in one groupby: every row appears once per dimension
+        long = pd.concat([
+            counts.assign(dimension="label", value=df["label"].fillna("")),
+            counts.assign(dimension="subset", value=df["policy_id"].str.split("_", n=1).str[0]),
+        ], ignore_index=True)
+        out = long.groupby(["model", "dimension", "value"], sort=True)[["predictions", "correct", "gt", "found"]].sum()
+
+        precision = out["correct"] / out["predictions"].where(out["predictions"] > 0)
+        recall = out["found"] / out["gt"].where(out["gt"] > 0)
+        total = precision + recall
+        out["precision"] = precision.round(3)
+        out["recall"] = recall.round(3)
+        # NaN where either side is undefined (no predictions / no GT with that label), 0 if both are 0
+        out["f1"] = (2 * precision * recall / total.where(total > 0)).where(total != 0, 0.0).round(3)
+        return out.reset_index()
+
+    def leaderboard(self, run_id: Optional[int] = None) -> pd.DataFrame:
+        """Mean metrics per model over the pairs without an error, best AI F1 first."""
+        run_id = run_id if run_id is not None else self.latest_run_id()
+        return self.query(
+            "SELECT model, COUNT(*) AS policies, AVG(f1) AS f1, AVG(ai_precision) AS ai_precision,"
+            " AVG(ai_recall) AS ai_recall, AVG(ai_f1) AS ai_f1, AVG(duration_sec) AS duration_sec,"
+            " SUM(cost_usd) AS cost_usd"
+            " FROM pair_metrics WHERE run_id = ? AND error IS NULL GROUP BY model ORDER BY ai_f1 DESC",
+            [run_id]
+        )
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python -m src.results_store [db_path] [results.csv ...]: import CSVs, then list runs and the latest leaderboard
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "./benchmark_results.sqlite"
+    store = ResultsStore(db_path)
+    for csv_path in sys.argv[2:]:
+        print(f"Imported {csv_path} as run {store.import_csv(csv_path)}")
+    print(store.runs().to_string(index=False))
+    print(store.leaderboard().to_string(index=False))
+    store.close()
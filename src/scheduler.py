@@ -0,0 +1,37 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Tuple
+
+
+class BenchmarkScheduler:
+    """
+    Runs benchmark jobs on a shared worker pool.
+    Jobs execute concurrently, but results are yielded in submission order so that
+    CSV rows and console output stay deterministic.
+
+    The job iterable is consumed lazily: at most max_pending jobs are queued or running at a time,
+    so a generator of jobs keeps memory flat however many policies are scheduled.
+    """
+
+    def __init__(self, max_workers: int = 8, max_pending: int = None):
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max_pending or self.max_workers * 4
+
+    def run(self, jobs: Iterable[Tuple[Callable[..., Any], tuple]]) -> Iterator[Any]:
+        """
+        jobs: Iterable of (function, args) tuples.
+        Yields each job's return value in the order the jobs were given.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bench") as pool:
+            pending = deque()
+            try:
+                for fn, args in jobs:
+                    pending.append(pool.submit(fn, *args))
+                    if len(pending) >= self.max_pending:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                # Stop queued jobs if the consumer bails out early (e.g. Ctrl-C)
+                for future in pending:
+                    future.cancel()
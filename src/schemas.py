@@ -0,0 +1,122 @@
+import copy
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from json_repair import repair_json
+from pydantic import BaseModel, ConfigDict, ValidationError
+
+
+class SpanAnnotation(BaseModel):
+    """One extracted provision."""
+    model_config = ConfigDict(extra="ignore", coerce_numbers_to_str=True)
+
+    label: str
+    text: str
+    reasoning: str = ""
+
+
+class AnnotationList(BaseModel):
+    """Root object for structured output (JSON schema response formats require an object at the root)."""
+    annotations: List[SpanAnnotation]
+
+
+def _strict_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Inlines $defs and makes every object closed with all properties required, as strict
+    structured-output modes expect.
+    """
+    defs = schema.pop("$defs", {})
+
+    def resolve(node):
+        if isinstance(node, dict):
+            if "$ref" in node:
+                return resolve(copy.deepcopy(defs[node["$ref"].split("/")[-1]]))
+            node = {k: resolve(v) for k, v in node.items() if k not in ("title", "default")}
+            if node.get("type") == "object":
+                node["additionalProperties"] = False
+                node["required"] = list(node.get("properties", {}))
+            return node
+        if isinstance(node, list):
+            return [resolve(v) for v in node]
+        return node
+
+    return resolve(schema)
+
+
+ANNOTATION_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "annotation_list",
+        "strict": True,
+        "schema": _strict_schema(AnnotationList.model_json_schema()),
+    },
+}
+
+
+def _extract_json_text(response_text: str) -> str:
+    match = re.search(r"```(?:json)?\s*(.*?)```", response_text, re.DOTALL)
+    return match.group(1).strip() if match else response_text.strip()
+
+
+def _as_items(data: Any) -> Optional[list]:
+    """Accepts [...], {"annotations": [...]} (or any single list field) and a bare span object."""
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        if "annotations" in data and isinstance(data["annotations"], list):
+            return data["annotations"]
+        if "label" in data or "text" in data:
+            return [data]
+        lists = [v for v in data.values() if isinstance(v, list)]
+        if len(lists) == 1:
+            return lists[0]
+        if not data:
+            return []
+    return None
+
+
+def validate_spans(items: list) -> Tuple[List[Dict[str, str]], int]:
+    """Returns the items that match SpanAnnotation (as plain dicts) and the number dropped."""
+    spans, invalid = [], 0
+    for item in items:
+        try:
+            spans.append(SpanAnnotation.model_validate(item).model_dump())
+        except ValidationError:
+            invalid += 1
+    return spans, invalid
+
+
+def parse_annotations(response_text: str) -> Dict[str, Any]:
+    """
+    Parses an annotator response. Plain json.loads first; json_repair only if that fails.
+
+    Returns {"spans": [...], "invalid": n, "repaired": bool, "error": None | str}. error is set when the
+    response holds no usable JSON at all; items that fail validation are dropped and counted.
+    """
+    result = {"spans": [], "invalid": 0, "repaired": False, "error": None}
+    if not response_text or not response_text.strip():
+        result["error"] = "empty response"
+        return result
+
+    cleaned = _extract_json_text(response_text)
+    try:
+        data = json.loads(cleaned)
+    except json.JSONDecodeError:
+        try:
+            data = repair_json(cleaned, return_objects=True)
+            result["repaired"] = True
+        except Exception as e:
+            data = None
+            result["error"] = f"unrepairable JSON: {e}"
+
+    items = _as_items(data)
+    if items is None:
+        result["repaired"] = False
+        result["error"] = result["error"] or f"no annotation list in response: {response_text[:100]!r}"
+        return result
+
+    result["spans"], result["invalid"] = validate_spans(items)
+    if items and not result["spans"]:
+        result["error"] = f"none of {len(items)} items match the span schema"
+    return result
@@ -0,0 +1,115 @@
+import itertools
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+N_RESAMPLES = 10_000
+CONFIDENCE = 0.95
+
+
+def policy_matrix(df: pd.DataFrame, metrics: Sequence[str], models: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Per-pair results as one row per policy and (metric, model) columns, keeping only policies that every
+    model has a value for (the resampling unit is the policy, shared by all models).
+    """
+    matrix = df.pivot_table(index="policy_id", columns="model", values=list(metrics), aggfunc="mean")
+    if models is not None:
+        matrix = matrix.reindex(columns=pd.MultiIndex.from_product([list(metrics), list(models)]))
+    return matrix.dropna()
+
+
+def shared_policy_rows(df: pd.DataFrame, metrics: Sequence[str]) -> pd.DataFrame:
+    """
+    The rows of the policies every model has `metrics` for, so means, CIs and tests all describe the
+    same policies. Falls back to all rows if the models share no policy.
+    """
+    shared = policy_matrix(df, metrics).index
+    return df[df["policy_id"].isin(shared)] if len(shared) else df
+
+
+def bootstrap_ci(values: np.ndarray, n_resamples: int = N_RESAMPLES, confidence: float = CONFIDENCE,
+                 seed: int = 0) -> np.ndarray:
+    """
+    Percentile bootstrap CIs of the column means of `values` (policies x columns), resampling policies.
+    All columns share the same resamples; each resample is a row of multinomial counts, so the means of
+    all resamples are one (resamples x policies) @ (policies x columns) product.
+    Returns a (2, columns) array of lower and upper bounds.
+    """
+    n = values.shape[0]
+    rng = np.random.default_rng(seed)
+    counts = rng.multinomial(n, np.full(n, 1.0 / n), size=n_resamples)
+    means = counts @ values / n
+    alpha = (1 - confidence) / 2
+    return np.quantile(means, [alpha, 1 - alpha], axis=0)
+
+
+def paired_permutation_test(differences: np.ndarray, n_resamples: int = N_RESAMPLES, seed: int = 0) -> np.ndarray:
+    """
+    Two-sided paired permutation (sign-flip) tests of mean(differences) == 0, one per column of
+    `differences` (policies x comparisons). Swapping the two models of a policy flips the sign of its
+    difference; all comparisons share the same random sign matrix. Returns one p-value per column.
+    """
+    n = differences.shape[0]
+    rng = np.random.default_rng(seed)
+    signs = rng.choice(np.array([-1.0, 1.0]), size=(n_resamples, n))
+    null = np.abs(signs @ differences / n)
+    observed = np.abs(differences.mean(axis=0))
+    # The +1 counts the observed assignment itself, so p is never 0
+    return ((null >= observed - 1e-12).sum(axis=0) + 1) / (n_resamples + 1)
+
+
+def holm_adjust(p_values: np.ndarray) -> np.ndarray:
+    """Holm-Bonferroni adjusted p-values (family-wise error over all comparisons)."""
+    m = len(p_values)
+    order = np.argsort(p_values)
+    adjusted = np.maximum.accumulate(np.minimum(p_values[order] * (m - np.arange(m)), 1.0))
+    result = np.empty(m)
+    result[order] = adjusted
+    return result
+
+
+def model_intervals(df: pd.DataFrame, metrics: Sequence[str], models: Sequence[str],
+                    n_resamples: int = N_RESAMPLES, confidence: float = CONFIDENCE, seed: int = 0) -> pd.DataFrame:
+    """
+    Bootstrap CIs of the per-model means of `metrics`: one row per model with <metric>_low / <metric>_high
+    columns, plus the number of policies resampled.
+    """
+    matrix = policy_matrix(df, metrics, models)
+    if len(matrix) < 2:
+        result = pd.DataFrame(np.nan, index=pd.Index(list(models), name="model"),
+                              columns=[f"{m}_{side}" for m in metrics for side in ("low", "high")])
+        result["ci_policies"] = len(matrix)
+        return result
+    bounds = bootstrap_ci(matrix.to_numpy(dtype=float), n_resamples, confidence, seed)
+    low = pd.Series(bounds[0], index=matrix.columns).unstack(0).round(3)
+    high = pd.Series(bounds[1], index=matrix.columns).unstack(0).round(3)
+    result = pd.concat([low.add_suffix("_low"), high.add_suffix("_high")], axis=1)
+    result = result[[f"{m}_{side}" for m in metrics for side in ("low", "high")]].reindex(list(models))
+    result.index.name = "model"
+    result["ci_policies"] = len(matrix)
+    return result
+
+
+def pairwise_tests(df: pd.DataFrame, metric: str, models: Sequence[str], n_resamples: int = N_RESAMPLES,
+                   seed: int = 0) -> pd.DataFrame:
+    """
+    Paired permutation tests of `metric` between every two models (model_a listed first in `models`),
+    over the policies all models have results for. Columns: model_a, model_b, mean_diff (a - b),
+    p_value and p_holm (Holm-adjusted over all pairs).
+    """
+    columns = ["model_a", "model_b", "mean_diff", "p_value", "p_holm"]
+    matrix = policy_matrix(df, [metric], models)[metric]
+    pairs: List[tuple] = list(itertools.combinations(models, 2))
+    if not pairs or matrix.empty:
+        return pd.DataFrame(columns=columns)
+
+    differences = np.column_stack([matrix[a].to_numpy(dtype=float) - matrix[b].to_numpy(dtype=float) for a, b in pairs])
+    p_values = paired_permutation_test(differences, n_resamples, seed)
+    return pd.DataFrame({
+        "model_a": [a for a, _ in pairs],
+        "model_b": [b for _, b in pairs],
+        "mean_diff": differences.mean(axis=0).round(3),
+        "p_value": p_values.round(4),
+        "p_holm": holm_adjust(p_values).round(4),
+    }, columns=columns)
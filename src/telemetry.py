@@ -0,0 +1,147 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# Run-level tags attached to every call made in the current context (thread / task)
+_policy_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("telemetry_policy_id", default=None)
+_stage: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("telemetry_stage", default=None)
+
+
+@contextmanager
+def telemetry_context(policy_id: Optional[str] = None, stage: Optional[str] = None):
+    """
+    Tags LLM calls made inside the block, e.g. with telemetry_context(policy_id="DB_5", stage="annotate").
+    Worker threads start with an empty context: submit via contextvars.copy_context().run to keep the tags.
+    """
+    tokens = []
+    if policy_id is not None:
+        tokens.append((_policy_id, _policy_id.set(policy_id)))
+    if stage is not None:
+        tokens.append((_stage, _stage.set(stage)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+@dataclass
+class CallRecord:
+    """One LLM request as seen by LLMClient."""
+    provider: str
+    model: str
+    latency_sec: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    ttfb_sec: Optional[float] = None       # Time to response headers / first streamed chunk, where measurable
+    retries: Optional[int] = None          # Extra attempts after retryable errors, where measurable
+    wait_sec: float = 0.0                  # Time spent in the rate limiter and back-off
+    error: Optional[str] = None            # Exception class name of a failed call
+    policy_id: Optional[str] = None
+    stage: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+
+
+class JsonlTelemetrySink:
+    """Appends every CallRecord as one JSON line."""
+
+    def __init__(self, path: str = "./.cache/telemetry.jsonl"):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def emit(self, record: CallRecord) -> None:
+        line = json.dumps(asdict(record), ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class TelemetryAggregator:
+    """
+    In-memory totals per (model, policy_id, stage), with cost from a pricing table:
+        pricing = {"openai:gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60}}  # USD per 1M tokens
+    Cached prompt tokens are billed at cached_input (falling back to input); unknown models cost 0.
+    """
+
+    FIELDS = ("calls", "errors", "prompt_tokens", "completion_tokens", "cached_tokens", "latency_sec", "cost_usd")
+
+    def __init__(self, pricing: Optional[Dict[str, Dict[str, float]]] = None):
+        self.pricing = pricing or {}
+        self._lock = threading.Lock()
+        self._totals: Dict[Tuple[str, Optional[str], Optional[str]], Dict[str, float]] = {}
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int) -> float:
+        price = self.pricing.get(model)
+        if not price:
+            return 0.0
+        uncached = max(prompt_tokens - cached_tokens, 0)
+        return (
+            uncached * price.get("input", 0.0)
+            + cached_tokens * price.get("cached_input", price.get("input", 0.0))
+            + completion_tokens * price.get("output", 0.0)
+        ) / 1_000_000
+
+    def emit(self, record: CallRecord) -> None:
+        key = (record.model, record.policy_id, record.stage)
+        cost = self.cost(record.model, record.prompt_tokens, record.completion_tokens, record.cached_tokens)
+        with self._lock:
+            totals = self._totals.setdefault(key, dict.fromkeys(self.FIELDS, 0))
+            totals["calls"] += 1
+            totals["errors"] += 1 if record.error else 0
+            totals["prompt_tokens"] += record.prompt_tokens
+            totals["completion_tokens"] += record.completion_tokens
+            totals["cached_tokens"] += record.cached_tokens
+            totals["latency_sec"] += record.latency_sec
+            totals["cost_usd"] += cost
+
+    def totals(self, model: Optional[str] = None, policy_id: Optional[str] = None,
+               stage: Optional[str] = None) -> Dict[str, float]:
+        """Sums over all keys matching the given filters (None = any)."""
+        result = dict.fromkeys(self.FIELDS, 0)
+        with self._lock:
+            for (m, p, s), totals in self._totals.items():
+                if model is not None and m != model: continue
+                if policy_id is not None and p != policy_id: continue
+                if stage is not None and s != stage: continue
+                for k in self.FIELDS:
+                    result[k] += totals[k]
+        return result
+
+
+# Process-wide sinks, fed by every LLMClient
+_sinks: List[Any] = []
+_sinks_lock = threading.Lock()
+
+
+def set_telemetry_sinks(sinks: List[Any]) -> None:
+    """Replaces the registered sinks. A sink is any object with emit(CallRecord)."""
+    with _sinks_lock:
+        _sinks[:] = list(sinks)
+
+
+def emit_call(record: CallRecord) -> None:
+    if record.policy_id is None:
+        record.policy_id = _policy_id.get()
+    if record.stage is None:
+        record.stage = _stage.get()
+    with _sinks_lock:
+        sinks = list(_sinks)
+    for sink in sinks:
+        try:
+            sink.emit(record)
+        except Exception as e:
+            print(f"Telemetry sink error: {e}")
@@ -0,0 +1,131 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+class TokenOverlapMatrix:
+    """
+    Vectorized token-overlap scoring for one policy.
+
+    Ground truth items are encoded once as bag-of-token count vectors over the policy's GT vocabulary
+    (one vocabulary per tokenizer: clean_tokens for Token F1, normalize_text for containment).
+    A batch of predictions is encoded over the same vocabulary, and the full prediction x GT score
+    matrices are computed with a few matrix products. Prediction tokens that never occur in the GT
+    cannot overlap, so they only count towards the prediction length.
+
+    Results are bit-for-bit identical to compute_token_f1 / check_containment.
+    """
+
+    def __init__(self, f1_tokens: List[List[str]], norm_texts: List[str], norm_tokens: List[List[str]]):
+        self.f1_vocab, self.f1_counts = self._encode_reference(f1_tokens)
+        self.f1_lengths = np.array([len(t) for t in f1_tokens], dtype=np.float64)
+
+        self.norm_vocab, self.norm_counts = self._encode_reference(norm_tokens)
+        self.norm_lengths = np.array([len(t) for t in norm_tokens], dtype=np.float64)
+        self.norm_present = (self.norm_counts > 0).astype(np.float64)
+        self.norm_texts = norm_texts
+        self.norm_char_lengths = np.array([len(t) for t in norm_texts])
+
+    @staticmethod
+    def _encode_reference(token_lists: List[List[str]]) -> Tuple[Dict[str, int], np.ndarray]:
+        vocab: Dict[str, int] = {}
+        for toks in token_lists:
+            for t in toks:
+                if t not in vocab:
+                    vocab[t] = len(vocab)
+
+        counts = np.zeros((len(token_lists), len(vocab)), dtype=np.int32)
+        for row, toks in enumerate(token_lists):
+            for t in toks:
+                counts[row, vocab[t]] += 1
+        return vocab, counts
+
+    @staticmethod
+    def _encode(token_lists: List[List[str]], vocab: Dict[str, int]) -> np.ndarray:
+        counts = np.zeros((len(token_lists), len(vocab)), dtype=np.int32)
+        for row, toks in enumerate(token_lists):
+            for t in toks:
+                col = vocab.get(t)
+                if col is not None:
+                    counts[row, col] += 1
+        return counts
+
+    @staticmethod
+    def _min_overlap(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """
+        sum_t min(a[i, t], b[j, t]) for all (i, j), using min(x, y) = sum_k [x >= k] * [y >= k].
+        """
+        overlap = np.zeros((a.shape[0], b.shape[0]), dtype=np.float64)
+        if a.size == 0 or b.size == 0:
+            return overlap
+
+        a_max = a.max(axis=0)
+        b_max = b.max(axis=0)
+        levels = min(int(a_max.max()), int(b_max.max()))
+        for k in range(1, levels + 1):
+            # Only tokens repeated at least k times on both sides contribute to level k
+            cols = np.nonzero((a_max >= k) & (b_max >= k))[0]
+            if cols.size == 0:
+                break
+            a_k = (a[:, cols] >= k).astype(np.float64)
+            b_k = (b[:, cols] >= k).astype(np.float64)
+            overlap += a_k @ b_k.T
+        return overlap
+
+    def token_f1(self, pred_tokens: List[List[str]]) -> np.ndarray:
+        """
+        (P x G) matrix of SQuAD-style Token F1 between predictions and GT items.
+        """
+        pred_counts = self._encode(pred_tokens, self.f1_vocab)
+        pred_lengths = np.array([len(t) for t in pred_tokens], dtype=np.float64)
+
+        num_same = self._min_overlap(pred_counts, self.f1_counts)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            precision = 1.0 * num_same / pred_lengths[:, None]
+            recall = 1.0 * num_same / self.f1_lengths[None, :]
+            f1 = (2 * precision * recall) / (precision + recall)
+        return np.where(num_same > 0, f1, 0.0)
+
+    def containment(self, pred_norms: List[str], pred_tokens: List[List[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns two (P x G) matrices:
+            recall: share of GT tokens found in the prediction (check_containment(pred, gt))
+            precision: share of prediction tokens found in the GT (check_containment(gt, pred))
+        """
+        pred_counts = self._encode(pred_tokens, self.norm_vocab)
+        pred_present = (pred_counts > 0).astype(np.float64)
+        pred_lengths = np.array([len(t) for t in pred_tokens], dtype=np.float64)
+
+        gt_found_in_pred = pred_present @ self.norm_counts.T.astype(np.float64)
+        pred_found_in_gt = pred_counts.astype(np.float64) @ self.norm_present.T
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            recall = np.where(self.norm_lengths[None, :] > 0, gt_found_in_pred / self.norm_lengths[None, :], 0.0)
+            precision = np.where(pred_lengths[:, None] > 0, pred_found_in_gt / pred_lengths[:, None], 0.0)
+
+        # Exact substring matches score 1.0. A substring shares all but its two edge tokens,
+        # so only pairs within two tokens of full overlap need the string check.
+        pred_char_lengths = np.array([len(p) for p in pred_norms])
+
+        maybe_gt_in_pred = (
+            (recall < 1.0)
+            & (self.norm_lengths[None, :] > 0)
+            & (gt_found_in_pred >= self.norm_lengths[None, :] - 2)
+            & (self.norm_char_lengths[None, :] <= pred_char_lengths[:, None])
+        )
+        for i, j in zip(*np.nonzero(maybe_gt_in_pred)):
+            if self.norm_texts[j] in pred_norms[i]:
+                recall[i, j] = 1.0
+
+        maybe_pred_in_gt = (
+            (precision < 1.0)
+            & (pred_lengths[:, None] > 0)
+            & (pred_found_in_gt >= pred_lengths[:, None] - 2)
+            & (pred_char_lengths[:, None] <= self.norm_char_lengths[None, :])
+        )
+        for i, j in zip(*np.nonzero(maybe_pred_in_gt)):
+            if pred_norms[i] in self.norm_texts[j]:
+                precision[i, j] = 1.0
+
+        return recall, precision
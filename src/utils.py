@@ -1,37 +1,125 @@
 import os
 import json
-import re
+import string
 import pandas as pd
-from typing import List, Dict, Any
-
-
-def parse_llm_json(response_text: str) -> List[Dict[str, Any]]:
-    try:
-        # Improved regex to catch JSON between markdown blocks or raw
-        match = re.search(r"```json\s*(.*?)```", response_text, re.DOTALL)
-        if match:
-            cleaned_text = match.group(1).strip()
-        else:
-            cleaned_text = response_text.strip()
-
-        data = json.loads(cleaned_text)
-        if isinstance(data, list):
-            return data
-        elif isinstance(data, dict):
-            return [data]
-        else:
-            return []
-    except json.JSONDecodeError:
-        print(f"DEBUG: JSON Parse Error. Response excerpt: {response_text[:100]}...")
-        return []
-
-
-def load_c3pa_dataset(root_path: str) -> List[Dict[str, Any]]:
-    dataset = []
-    subsets = ['DB', 'WS']
-
-    print(f"Loading C3PA data from {root_path}...")
-
+from typing import List, Dict, Any, Optional, Tuple
+
+
+STOPWORDS = frozenset({
+    "the", "and", "or", "of", "to", "a", "in", "is", "that", "for",
+    "on", "with", "as", "by", "at", "it", "be", "this", "from", "an",
+    "which", "we", "our", "us", "you", "your", "are", "not", "have",
+    "may", "can", "will", "data", "information", "services", "privacy"
+})
+
+_STRIP_PUNCTUATION = str.maketrans('', '', string.punctuation)
+_PUNCTUATION_TO_SPACE = str.maketrans(string.punctuation, ' ' * len(string.punctuation))
+
+
+def clean_tokens(text: str) -> List[str]:
+    """
+    Splits text into tokens, removes punctuation and stop words.
+    Returns a LIST (not set) to preserve frequency for F1 counting.
+    """
+    if not text: return []
+    text = text.lower().translate(_STRIP_PUNCTUATION)
+    tokens = text.split()
+    return [t for t in tokens if t not in STOPWORDS]
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalizes text for comparison: lowercases, removes punctuation, reduces whitespace.
+    Returns a clean string.
+    """
+    if not text: return ""
+    # Remove punctuation
+    text = text.translate(_PUNCTUATION_TO_SPACE).lower()
+    # Remove extra whitespace
+    return " ".join(text.split())
+
+
+class StreamingJSONArrayParser:
+    """
+    Incrementally extracts the objects of the first JSON array in a streamed LLM response, e.g.
+    '[{...}, {...}]', '```json\n[...]```' or '{"annotations": [{...}]}'. Each object is returned by
+    feed() as soon as its closing brace arrives. Only the unconsumed tail of the stream is kept
+    (the object being read), so long responses are scanned in linear time.
+    """
+
+    FENCE = "```json"
+
+    def __init__(self):
+        self._text = ""             # Unconsumed tail of the stream
+        self._pos = 0               # Tail offset where scanning resumes
+        self._stack = []            # Open containers: "[" or "{"
+        self._in_string = False
+        self._escape = False
+        self._element_depth = None  # Stack depth of the first array's elements
+        self._start = None          # Tail offset of the element object being read
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        text = self._text + chunk
+        if self._element_depth is None:
+            # Skip prose before a markdown fence, so that its brackets are not mistaken for the array
+            fence = text.find(self.FENCE, max(0, self._pos - len(self.FENCE) + 1))
+            if fence != -1:
+                self._stack = []
+                self._in_string = self._escape = False
+                self._pos = max(self._pos, fence + len(self.FENCE))
+
+        items = []
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch == "[":
+                self._stack.append("[")
+                if self._element_depth is None:
+                    self._element_depth = len(self._stack)
+            elif ch == "{":
+                self._stack.append("{")
+                if self._element_depth is not None and len(self._stack) == self._element_depth + 1:
+                    self._start = i
+            elif ch in "]}":
+                if not self._stack: continue
+                self._stack.pop()
+                if ch == "}" and self._start is not None and len(self._stack) == self._element_depth:
+                    try:
+                        obj = json.loads(text[self._start:i + 1])
+                        if isinstance(obj, dict):
+                            items.append(obj)
+                    except json.JSONDecodeError:
+                        pass
+                    self._start = None
+
+        # Drop everything consumed: keep the object being read, or (before the array starts) enough
+        # characters to recognize a fence split across chunks
+        cut = self._start if self._start is not None else len(text)
+        if self._element_depth is None:
+            cut = min(cut, max(0, len(text) - len(self.FENCE) + 1))
+        self._text = text[cut:]
+        self._pos = len(text) - cut
+        if self._start is not None:
+            self._start -= cut
+        return items
+
+
+def list_c3pa_sources(root_path: str, subsets: Tuple[str, ...] = ('DB', 'WS')) -> List[Tuple[str, str, str]]:
+    """
+    Lists (policy_id, csv_path, txt_path) for every annotated policy that has a text file,
+    without reading any file contents.
+    """
+    sources = []
     for subset in subsets:
         anno_dir = os.path.join(root_path, "Annotations", subset)
         text_dir = os.path.join(root_path, "Texts", subset)
@@ -47,42 +135,61 @@ def load_c3pa_dataset(root_path: str) -> List[Dict[str, Any]]:
 
             if not os.path.exists(txt_path): continue
 
-            try:
-                with open(txt_path, 'r', encoding='utf-8') as f:
-                    full_text = f.read()
+            sources.append((f"{subset}_{file_id}", csv_path, txt_path))
+    return sources
+
 
-                df = pd.read_csv(csv_path)
-                df.columns = [c.lower() for c in df.columns]
+def read_c3pa_policy(csv_path: str, txt_path: str) -> Optional[Tuple[str, List[Dict[str, str]]]]:
+    """
+    Reads one policy's text and the ground truth of its most complete annotator.
+    Returns (full_text, ground_truth), or None if the CSV has no label/text columns.
+    """
+    with open(txt_path, 'r', encoding='utf-8') as f:
+        full_text = f.read()
 
-                annotator_col = next((c for c in df.columns if 'ranumb' in c), None)
-                text_col = next((c for c in df.columns if 'text' in c or 'segment' in c), None)
-                label_col = next((c for c in df.columns if 'category' in c or 'label' in c), None)
+    df = pd.read_csv(csv_path)
+    df.columns = [c.lower() for c in df.columns]
 
-                if annotator_col and text_col:
+    annotator_col = next((c for c in df.columns if 'ranumb' in c), None)
+    text_col = next((c for c in df.columns if 'text' in c or 'segment' in c), None)
+    label_col = next((c for c in df.columns if 'category' in c or 'label' in c), None)
 
-                    df['text_len'] = df[text_col].astype(str).str.len()
-                    completeness = df.groupby(annotator_col)['text_len'].sum()
+    if annotator_col and text_col:
 
-                    best_annotator = completeness.idxmax()
-                    df = df[df[annotator_col] == best_annotator]
+        df['text_len'] = df[text_col].astype(str).str.len()
+        completeness = df.groupby(annotator_col)['text_len'].sum()
 
-                if not label_col or not text_col: continue
+        best_annotator = completeness.idxmax()
+        df = df[df[annotator_col] == best_annotator]
+
+    if not label_col or not text_col: return None
+
+    ground_truth = [
+        {"label": str(label).strip(), "text": str(text).strip()}
+        for label, text in zip(df[label_col].tolist(), df[text_col].tolist())
+    ]
+    return full_text, ground_truth
+
+
+def load_c3pa_dataset(root_path: str) -> List[Dict[str, Any]]:
+    dataset = []
+
+    print(f"Loading C3PA data from {root_path}...")
 
-                ground_truth = []
-                for _, row in df.iterrows():
-                    ground_truth.append({
-                        "label": str(row[label_col]).strip(),
-                        "text": str(row[text_col]).strip()
-                    })
+    for policy_id, csv_path, txt_path in list_c3pa_sources(root_path):
+        try:
+            policy = read_c3pa_policy(csv_path, txt_path)
+            if policy is None: continue
 
-                dataset.append({
-                    "id": f"{subset}_{file_id}",
-                    "text": full_text,
-                    "ground_truth": ground_truth
-                })
+            full_text, ground_truth = policy
+            dataset.append({
+                "id": policy_id,
+                "text": full_text,
+                "ground_truth": ground_truth
+            })
 
-            except Exception as e:
-                print(f"Error processing {filename}: {e}")
+        except Exception as e:
+            print(f"Error processing {os.path.basename(csv_path)}: {e}")
 
     print(f"Successfully loaded {len(dataset)} policy documents.")
-    return dataset
\ No newline at end of file
+    return dataset
@@ -1,49 +1,251 @@
 import os
 import html
+import threading
+from string import Template
+from typing import Any, Dict, List
+
+# Bump when the markup or the assets change, so existing reports can be told apart from current ones
+VISUALIZER_VERSION = "2"
+
+ASSET_CSS = "report.css"
+ASSET_JS = "report.js"
+INDEX_FILE = "index.html"
+
+REPORT_CSS = """
+body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; padding: 20px; background-color: #f9f9f9; }
+h1 { color: #333; border-bottom: 2px solid #ddd; padding-bottom: 10px; }
+h2 { color: #555; margin-top: 30px; }
+a { color: #007bff; text-decoration: none; }
+.badge { padding: 4px 8px; border-radius: 4px; font-weight: bold; margin-right: 8px; font-size: 0.85em; display: inline-block; min-width: 80px; text-align: center; }
+
+/* Status Colors */
+.strict { background-color: #d4edda; color: #155724; border: 1px solid #c3e6cb; }
+.substring { background-color: #e2e3e5; color: #383d41; border: 1px solid #d6d8db; }
+.ai-match { background-color: #cce5ff; color: #004085; border: 1px solid #b8daff; }
+.wrong { background-color: #f8d7da; color: #721c24; border: 1px solid #f5c6cb; }
+.missed { background-color: #fff3cd; color: #856404; border: 1px solid #ffeeba; }
+.judge-badge { background-color: #6f42c1; color: white; border: 1px solid #59359a; }
+
+.card-strict { border-left: 5px solid #28a745; }
+.card-substring { border-left: 5px solid #6c757d; }
+.card-ai-match { border-left: 5px solid #007bff; }
+.card-wrong { border-left: 5px solid #dc3545; }
+.card-missed { border-left: 5px solid #ffeeba; }
+
+.container { display: flex; gap: 20px; }
+.column { flex: 1; background: white; padding: 15px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }
+
+.card { margin-bottom: 15px; padding: 12px; border: 1px solid #eee; border-radius: 6px; background-color: #fff; }
+.card:hover { box-shadow: 0 2px 8px rgba(0,0,0,0.05); }
+
+.label-tag { font-weight: bold; color: #444; display: block; margin-bottom: 6px; }
+.text-content { font-family: 'Consolas', 'Monaco', monospace; font-size: 0.9em; color: #333; white-space: pre-wrap; }
+
+.match-info { margin-top: 8px; padding-top: 8px; border-top: 1px dashed #eee; font-size: 0.85em; color: #666; }
+.reasoning { margin-top: 5px; font-style: italic; color: #555; background: #f8f9fa; padding: 5px; border-radius: 4px; }
+.closest-match { margin-top: 5px; font-size: 0.85em; color: #999; border-top: 1px dotted #eee; padding-top: 5px; }
+
+.stats-box { background: #fff; padding: 15px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); display: flex; gap: 20px; }
+.stat-item { text-align: center; }
+.stat-item.separated { border-left: 1px solid #eee; padding-left: 20px; }
+.stat-value { font-size: 1.5em; font-weight: bold; color: #007bff; }
+.stat-label { font-size: 0.9em; color: #666; }
+
+.filters { margin-bottom: 15px; }
+.filters button { margin-right: 6px; padding: 4px 10px; border: 1px solid #ccc; border-radius: 4px; background: #fff; cursor: pointer; }
+.filters button.active { background: #007bff; color: #fff; border-color: #007bff; }
+.filters input { padding: 4px 8px; border: 1px solid #ccc; border-radius: 4px; min-width: 250px; }
+
+table.index { border-collapse: collapse; background: #fff; box-shadow: 0 2px 4px rgba(0,0,0,0.1); width: 100%; }
+table.index th, table.index td { padding: 6px 10px; border-bottom: 1px solid #eee; text-align: left; }
+table.index th { cursor: pointer; background: #f1f3f5; user-select: none; }
+table.index td.num { text-align: right; font-variant-numeric: tabular-nums; }
+table.index tr.failed td { color: #dc3545; }
+"""
+
+REPORT_JS = """
+// Status filter buttons on report pages
+document.querySelectorAll('.filters button[data-status]').forEach(function (button) {
+  button.addEventListener('click', function () {
+    var status = button.dataset.status;
+    document.querySelectorAll('.filters button[data-status]').forEach(function (b) { b.classList.toggle('active', b === button); });
+    document.querySelectorAll('.card[data-status]').forEach(function (card) {
+      card.style.display = (status === 'all' || card.dataset.status === status) ? '' : 'none';
+    });
+  });
+});
+
+// Text filter and click-to-sort on the index table
+var search = document.getElementById('index-search');
+if (search) {
+  search.addEventListener('input', function () {
+    var query = search.value.toLowerCase();
+    document.querySelectorAll('table.index tbody tr').forEach(function (row) {
+      row.style.display = row.textContent.toLowerCase().indexOf(query) >= 0 ? '' : 'none';
+    });
+  });
+}
+document.querySelectorAll('table.index th').forEach(function (th, column) {
+  th.addEventListener('click', function () {
+    var body = th.closest('table').querySelector('tbody');
+    var descending = th.dataset.sort !== 'desc';
+    th.dataset.sort = descending ? 'desc' : 'asc';
+    var rows = Array.prototype.slice.call(body.rows);
+    rows.sort(function (a, b) {
+      var x = a.cells[column].dataset.value || a.cells[column].textContent;
+      var y = b.cells[column].dataset.value || b.cells[column].textContent;
+      var nx = parseFloat(x), ny = parseFloat(y);
+      var cmp = (isNaN(nx) || isNaN(ny)) ? x.localeCompare(y) : nx - ny;
+      return descending ? -cmp : cmp;
+    });
+    rows.forEach(function (row) { body.appendChild(row); });
+  });
+});
+"""
+
+# Templates are parsed once; each card is substituted and written straight to the open file
+PAGE_HEAD = Template("""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>$title</title>
+<meta name="generator" content="FullPPClassification visualizer $version">
+<link rel="stylesheet" href="$css"></head><body>
+""")
+PAGE_TAIL = Template("""<script src="$js"></script>
+</body></html>
+""")
+
+REPORT_HEADER = Template("""<p><a href="$index">&larr; All reports</a></p>
+<h1>Policy Report: $policy_id</h1>
+<div class="stats-box">
+    <div class="stat-item"><div class="stat-value">$precision</div><div class="stat-label">Precision</div></div>
+    <div class="stat-item"><div class="stat-value">$recall</div><div class="stat-label">Recall</div></div>
+    <div class="stat-item"><div class="stat-value">$f1</div><div class="stat-label">F1 Score</div></div>
+    <div class="stat-item separated"><div class="stat-value">$correct</div><div class="stat-label">Correct Preds</div></div>
+    <div class="stat-item"><div class="stat-value">$wrong</div><div class="stat-label">Wrong</div></div>
+    <div class="stat-item"><div class="stat-value">$missed</div><div class="stat-label">Missed GT</div></div>
+</div>
+<div class="filters">
+    <button data-status="all" class="active">All</button><button data-status="strict">Exact / Includes</button><button data-status="substring">Substring</button><button data-status="ai-match">AI Judge</button><button data-status="wrong">Wrong</button>
+</div>
+<div class="container">
+<div class="column"><h2>LLM Predictions (What AI Found)</h2>
+""")
+
+PREDICTION_CARD = Template("""<div class="card card-$badge_class" data-status="$badge_class">
+    <div><span class="badge $badge_class">$badge_text</span>$judge_badge<span class="label-tag">$label</span></div>
+    <div class="text-content">$text</div>$extra
+</div>
+""")
+
+MISSED_CARD = Template("""<div class="card card-missed">
+    <div><span class="badge missed">MISSED</span><span class="label-tag">$label</span></div>
+    <div class="text-content">$text</div>
+</div>
+""")
+
+COLUMN_BREAK = """</div>
+<div class="column"><h2>Missed Ground Truth (What AI Missed)</h2>
+"""
+REPORT_FOOTER = """</div>
+</div>
+"""
+
+INDEX_HEADER = Template("""<h1>Benchmark Reports</h1>
+<div class="stats-box">
+    <div class="stat-item"><div class="stat-value">$pairs</div><div class="stat-label">Reports</div></div>
+    <div class="stat-item"><div class="stat-value">$policies</div><div class="stat-label">Policies</div></div>
+    <div class="stat-item"><div class="stat-value">$models</div><div class="stat-label">Models</div></div>
+    <div class="stat-item"><div class="stat-value">$failed</div><div class="stat-label">Failed</div></div>
+</div>
+<h2>Models (mean over policies)</h2>
+<table class="index"><thead><tr><th>Model</th><th>Policies</th><th>Strict F1</th><th>AI Precision</th><th>AI Recall</th><th>AI F1</th></tr></thead><tbody>
+""")
+INDEX_MODEL_ROW = Template("""<tr><td>$model</td><td class="num">$count</td><td class="num">$f1</td><td class="num">$ai_precision</td><td class="num">$ai_recall</td><td class="num">$ai_f1</td></tr>
+""")
+INDEX_PAIRS_HEADER = """</tbody></table>
+<h2>Policy &times; Model</h2>
+<div class="filters"><input id="index-search" type="search" placeholder="Filter by policy or model..."></div>
+<table class="index"><thead><tr><th>Policy</th><th>Model</th><th>Strict F1</th><th>AI Precision</th><th>AI Recall</th><th>AI F1</th></tr></thead><tbody>
+"""
+INDEX_PAIR_ROW = Template("""<tr class="$row_class"><td data-value="$policy_sort"><a href="$href">$policy_id</a></td><td>$model</td><td class="num">$f1</td><td class="num">$ai_precision</td><td class="num">$ai_recall</td><td class="num">$ai_f1</td></tr>
+""")
+INDEX_FOOTER = """</tbody></table>
+"""
+
+# status substring -> (badge css class, badge text), first match wins
+_BADGES = [
+    ("CORRECT_STRICT", "strict", "EXACT"),
+    ("CORRECT_CONTAINMENT", "strict", "INCLUDES"),
+    ("CORRECT_SUBSTRING", "substring", "SUBSTR"),
+    ("CORRECT_AI", "ai-match", "AI JUDGE"),
+]
+
+
+def report_filename(reports_dir: str, policy_id: str, model_name: str) -> str:
+    # Sanitize the model name for the filesystem
+    safe_name = model_name.replace(":", "_").replace("/", "_")
+    return os.path.join(reports_dir, f"{policy_id}_{safe_name}.html")
+
+
+def _write_atomic(path: str, write) -> None:
+    """Calls write(file) on a temporary file next to `path` and moves it into place when complete."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _fmt(value) -> str:
+    try:
+        return f"{float(value):.2f}"
+    except (TypeError, ValueError):
+        return "-"
+
+
+def _policy_sort_key(policy_id: str) -> str:
+    # "DB_5" sorts before "DB_12"
+    prefix, _, number = str(policy_id).partition("_")
+    return f"{prefix}_{number.zfill(6)}" if number.isdigit() else str(policy_id)
 
 
 class HTMLVisualizer:
+    """
+    Renders one HTML page per (policy, model) plus an index page. Pages are streamed card by card to the
+    file and share one stylesheet and script (ASSET_CSS / ASSET_JS, written next to them), so memory use
+    does not grow with the report size. Safe to use from several threads and processes at once.
+    """
+
     def __init__(self):
-        self.css = """
-        <style>
-            body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; padding: 20px; background-color: #f9f9f9; }
-            h1 { color: #333; border-bottom: 2px solid #ddd; padding-bottom: 10px; }
-            h2 { color: #555; margin-top: 30px; }
-            .badge { padding: 4px 8px; border-radius: 4px; font-weight: bold; margin-right: 8px; font-size: 0.85em; display: inline-block; min-width: 80px; text-align: center; }
-
-            /* Status Colors */
-            .strict { background-color: #d4edda; color: #155724; border: 1px solid #c3e6cb; }
-            .substring { background-color: #e2e3e5; color: #383d41; border: 1px solid #d6d8db; }
-            .ai-match { background-color: #cce5ff; color: #004085; border: 1px solid #b8daff; }
-            .wrong { background-color: #f8d7da; color: #721c24; border: 1px solid #f5c6cb; }
-            .missed { background-color: #fff3cd; color: #856404; border: 1px solid #ffeeba; }
-            .judge-badge { background-color: #6f42c1; color: white; border: 1px solid #59359a; }
-
-            .container { display: flex; gap: 20px; }
-            .column { flex: 1; background: white; padding: 15px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }
-
-            .card { margin-bottom: 15px; padding: 12px; border: 1px solid #eee; border-radius: 6px; background-color: #fff; }
-            .card:hover { box-shadow: 0 2px 8px rgba(0,0,0,0.05); }
-
-            .label-tag { font-weight: bold; color: #444; display: block; margin-bottom: 6px; }
-            .text-content { font-family: 'Consolas', 'Monaco', monospace; font-size: 0.9em; color: #333; white-space: pre-wrap; }
-
-            .match-info { margin-top: 8px; padding-top: 8px; border-top: 1px dashed #eee; font-size: 0.85em; color: #666; }
-            .reasoning { margin-top: 5px; font-style: italic; color: #555; background: #f8f9fa; padding: 5px; border-radius: 4px; }
-            .closest-match { margin-top: 5px; font-size: 0.85em; color: #999; border-top: 1px dotted #eee; padding-top: 5px; }
-
-            .stats-box { background: #fff; padding: 15px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); display: flex; gap: 20px; }
-            .stat-item { text-align: center; }
-            .stat-value { font-size: 1.5em; font-weight: bold; color: #007bff; }
-            .stat-label { font-size: 0.9em; color: #666; }
-        </style>
-        """
+        self._assets_lock = threading.Lock()
+        self._asset_dirs = set()
+
+    def write_assets(self, reports_dir: str) -> None:
+        """Writes the shared stylesheet and script into reports_dir (once per directory and instance)."""
+        reports_dir = os.path.abspath(reports_dir)
+        with self._assets_lock:
+            if reports_dir in self._asset_dirs:
+                return
+            for name, content in ((ASSET_CSS, REPORT_CSS), (ASSET_JS, REPORT_JS)):
+                path = os.path.join(reports_dir, name)
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        if f.read() == content:
+                            continue
+                except OSError:
+                    pass
+                _write_atomic(path, lambda f, content=content: f.write(content))
+            self._asset_dirs.add(reports_dir)
 
     def generate_report(self, policy_id, full_text, human_anns, llm_anns, filename, ai_decisions=None, missed_gts=None,
                         metrics=None):
         """
         metrics: Optional dict containing pre-calculated {'precision', 'recall', 'f1'} from AIEvaluator.
         """
+        self.write_assets(os.path.dirname(filename) or ".")
 
         # 1. Calculate visual counts (Cards displayed)
         total_preds = len(ai_decisions) if ai_decisions else len(llm_anns)
@@ -66,118 +268,110 @@ class HTMLVisualizer:
             recall = tp_visual_count / total_gt if total_gt > 0 else 0
             f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
 
-        content = [f"<!DOCTYPE html><html><head>{self.css}</head><body>"]
-        content.append(f"<h1>Policy Report: {policy_id}</h1>")
-
-        # Stats Header
-        content.append(f"""
-        <div class="stats-box">
-            <div class="stat-item"><div class="stat-value">{precision:.2f}</div><div class="stat-label">Precision</div></div>
-            <div class="stat-item"><div class="stat-value">{recall:.2f}</div><div class="stat-label">Recall</div></div>
-            <div class="stat-item"><div class="stat-value">{f1:.2f}</div><div class="stat-label">F1 Score</div></div>
-            <div class="stat-item" style="border-left: 1px solid #eee; padding-left: 20px;">
-                <div class="stat-value">{tp_visual_count}</div><div class="stat-label">Correct Preds</div>
-            </div>
-            <div class="stat-item"><div class="stat-value">{fp_visual_count}</div><div class="stat-label">Wrong</div></div>
-            <div class="stat-item"><div class="stat-value">{fn_visual_count}</div><div class="stat-label">Missed GT</div></div>
-        </div>
-        """)
-
-        content.append('<div class="container">')
-
-        # --- COLUMN 1: LLM PREDICTIONS ---
-        content.append('<div class="column"><h2>LLM Predictions (What AI Found)</h2>')
-
-        if ai_decisions:
-            for item in ai_decisions:
-                status = item.get('status', 'WRONG')
-
-                # Logic to determine badge color/text
-                if "CORRECT_STRICT" in status:
-                    badge_class = "strict"
-                    badge_text = "EXACT"
-                elif "CORRECT_CONTAINMENT" in status:
-                    badge_class = "strict"
-                    badge_text = "INCLUDES"
-                elif "CORRECT_SUBSTRING" in status:
-                    badge_class = "substring"
-                    badge_text = "SUBSTR"
-                elif "CORRECT_AI" in status:
-                    badge_class = "ai-match"
-                    badge_text = "AI JUDGE"
-                else:
-                    badge_class = "wrong"
-                    badge_text = "WRONG"
-
-                # Check specifically if reasoning exists to show the badge
-                judge_badge = ""
-                if item.get('reasoning'):
-                    judge_badge = '<span class="badge judge-badge">LLM-Judge</span>'
-
-                match_html = ""
-                if item.get('match_with'):
-                    match_html = f"<div class='match-info'><b>Matched GT:</b> {html.escape(item['match_with'])}</div>"
-
-                geval_html = ""
-                if item.get("reasoning"):
-                    # Only show reasoning if it's an AI match
-                    geval_html = f"<div class='reasoning'><b>DeepEval:</b> {html.escape(item['reasoning'])}</div>"
-
-                closest_html = ""
-                if status == "WRONG" and item.get('closest_match'):
-                    closest_html = f"<div class='closest-match'><b>Closest GT (F1={item.get('closest_score', 0):.2f}):</b> {html.escape(item['closest_match'])}</div>"
-
-                content.append(f"""
-                <div class="card" style="border-left: 5px solid {self._get_color(badge_class)}">
-                    <div>
-                        <span class="badge {badge_class}">{badge_text}</span>
-                        {judge_badge}
-                        <span class="label-tag">{html.escape(item['label'])}</span>
-                    </div>
-                    <div class="text-content">{html.escape(item['text'])}</div>
-                    {match_html}
-                    {geval_html}
-                    {closest_html}
-                </div>
-                """)
-        else:
-            content.append("<p>No prediction data available.</p>")
-
-        content.append('</div>')  # End Column 1
-
-        # --- COLUMN 2: MISSED GROUND TRUTH ---
-        content.append('<div class="column"><h2>Missed Ground Truth (What AI Missed)</h2>')
-
-        if missed_gts:
-            for gt in missed_gts:
-                label = gt.get('label') or gt.get('category') or 'Unknown'
-                text = gt.get('text') or gt.get('span') or ''
-
-                content.append(f"""
-                <div class="card" style="border-left: 5px solid #ffeeba">
-                    <div>
-                        <span class="badge missed">MISSED</span>
-                        <span class="label-tag">{html.escape(label)}</span>
-                    </div>
-                    <div class="text-content">{html.escape(text)}</div>
-                </div>
-                """)
-        elif not missed_gts:
-            content.append("<p>All ground truth items were successfully found!</p>")
-
-        content.append('</div>')  # End Column 2
-        content.append('</div>')  # End Container
-        content.append("</body></html>")
-
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write("\n".join(content))
-
-    def _get_color(self, css_class):
-        colors = {
-            "strict": "#28a745",
-            "substring": "#6c757d",
-            "ai-match": "#007bff",
-            "wrong": "#dc3545",
-            "missed": "#ffc107"
-        }
-        return colors.get(css_class, "#ccc")
\ No newline at end of file
+        def write(f):
+            f.write(PAGE_HEAD.substitute(title=html.escape(f"Policy Report: {policy_id}"), version=VISUALIZER_VERSION,
+                                         css=ASSET_CSS))
+            f.write(REPORT_HEADER.substitute(
+                index=INDEX_FILE, policy_id=html.escape(str(policy_id)),
+                precision=f"{precision:.2f}", recall=f"{recall:.2f}", f1=f"{f1:.2f}",
+                correct=tp_visual_count, wrong=fp_visual_count, missed=fn_visual_count,
+            ))
+
+            # --- COLUMN 1: LLM PREDICTIONS ---
+            if ai_decisions:
+                for item in ai_decisions:
+                    f.write(self._prediction_card(item))
+            else:
+                f.write("<p>No prediction data available.</p>\n")
+
+            # --- COLUMN 2: MISSED GROUND TRUTH ---
+            f.write(COLUMN_BREAK)
+            if missed_gts:
+                for gt in missed_gts:
+                    label = gt.get('label') or gt.get('category') or 'Unknown'
+                    text = gt.get('text') or gt.get('span') or ''
+                    f.write(MISSED_CARD.substitute(label=html.escape(label), text=html.escape(text)))
+            else:
+                f.write("<p>All ground truth items were successfully found!</p>\n")
+
+            f.write(REPORT_FOOTER)
+            f.write(PAGE_TAIL.substitute(js=ASSET_JS))
+
+        _write_atomic(filename, write)
+
+    @staticmethod
+    def _prediction_card(item: Dict[str, Any]) -> str:
+        status = item.get('status', 'WRONG')
+        badge_class, badge_text = "wrong", "WRONG"
+        for marker, css_class, text in _BADGES:
+            if marker in status:
+                badge_class, badge_text = css_class, text
+                break
+
+        # Check specifically if reasoning exists to show the badge
+        judge_badge = '<span class="badge judge-badge">LLM-Judge</span>' if item.get('reasoning') else ""
+
+        extra = []
+        if item.get('match_with'):
+            extra.append(f"<div class='match-info'><b>Matched GT:</b> {html.escape(item['match_with'])}</div>")
+        if item.get("reasoning"):
+            # Only show reasoning if it's an AI match
+            extra.append(f"<div class='reasoning'><b>DeepEval:</b> {html.escape(item['reasoning'])}</div>")
+        if status == "WRONG" and item.get('closest_match'):
+            extra.append(f"<div class='closest-match'><b>Closest GT (F1={item.get('closest_score', 0):.2f}):</b> "
+                         f"{html.escape(item['closest_match'])}</div>")
+
+        return PREDICTION_CARD.substitute(
+            badge_class=badge_class, badge_text=badge_text, judge_badge=judge_badge,
+            label=html.escape(str(item['label'])), text=html.escape(str(item['text'])),
+            extra="\n    " + "\n    ".join(extra) if extra else "",
+        )
+
+    def write_index(self, reports_dir: str, rows: List[Dict[str, Any]]) -> str:
+        """
+        Writes INDEX_FILE into reports_dir: per-model means and one linked, sortable row per (policy, model).
+        rows are benchmark result rows (policy_id, model, f1, ai_precision, ai_recall, ai_f1[, error]),
+        linked to the report_filename() of each pair. Returns the index path.
+        """
+        self.write_assets(reports_dir)
+        rows = sorted(rows, key=lambda r: (_policy_sort_key(r["policy_id"]), r["model"]))
+        metric_keys = ("f1", "ai_precision", "ai_recall", "ai_f1")
+
+        per_model: Dict[str, Dict[str, float]] = {}
+        for row in rows:
+            if row.get("error") or row.get("ai_f1") is None: continue
+            totals = per_model.setdefault(row["model"], dict.fromkeys(("count",) + metric_keys, 0.0))
+            totals["count"] += 1
+            for key in metric_keys:
+                totals[key] += float(row.get(key) or 0.0)
+
+        def write(f):
+            f.write(PAGE_HEAD.substitute(title="Benchmark Reports", version=VISUALIZER_VERSION, css=ASSET_CSS))
+            f.write(INDEX_HEADER.substitute(
+                pairs=len(rows),
+                policies=len({r["policy_id"] for r in rows}),
+                models=len({r["model"] for r in rows}),
+                failed=sum(1 for r in rows if r.get("error")),
+            ))
+            for model, totals in sorted(per_model.items(), key=lambda kv: -kv[1]["ai_f1"] / kv[1]["count"]):
+                f.write(INDEX_MODEL_ROW.substitute(
+                    model=html.escape(model), count=int(totals["count"]),
+                    **{key: _fmt(totals[key] / totals["count"]) for key in metric_keys}
+                ))
+            f.write(INDEX_PAIRS_HEADER)
+            for row in rows:
+                href = os.path.relpath(report_filename(reports_dir, row["policy_id"], row["model"]), reports_dir)
+                f.write(INDEX_PAIR_ROW.substitute(
+                    row_class="failed" if row.get("error") else "",
+                    policy_sort=html.escape(_policy_sort_key(row["policy_id"])),
+                    href=html.escape(href.replace(os.sep, "/")),
+                    policy_id=html.escape(str(row["policy_id"])),
+                    model=html.escape(str(row["model"])),
+                    **{key: _fmt(row.get(key)) for key in metric_keys}
+                ))
+            f.write(INDEX_FOOTER)
+            f.write(PAGE_TAIL.substitute(js=ASSET_JS))
+
+        path = os.path.join(reports_dir, INDEX_FILE)
+        _write_atomic(path, write)
+        return path
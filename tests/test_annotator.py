@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from src.annotator import AnnotationParseError, PrivacyPolicyAnnotator
+from src.cache import InferenceCache
+from src.schemas import parse_annotations
+
+POLICY = "Last updated: 1 May 2024. You may delete your personal information."
+SPANS = [
+    {"label": "Updated Privacy Policy", "text": "Last updated: 1 May 2024", "reasoning": "Date."},
+    {"label": "Description of Right to Delete", "text": "You may delete your personal information", "reasoning": "Right."},
+]
+
+
+class ScriptedClient:
+    """Stands in for LLMClient: replies with the given responses in order, recording every call."""
+
+    provider = "mock"
+    model_id = "mock:scripted"
+    temperature = 0.0
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def _next(self):
+        self.calls += 1
+        return self.responses.pop(0)
+
+    def classify(self, system_prompt, user_prompt, response_format=None):
+        return self._next()
+
+    def get_completion(self, messages, response_format=None):
+        return self._next()
+
+    def stream_classify(self, system_prompt, user_prompt, response_format=None):
+        response = self._next()
+        return iter([response[i:i + 7] for i in range(0, len(response), 7)])
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = InferenceCache(str(tmp_path / "inference.sqlite"))
+    yield cache
+    cache.close()
+
+
+def _annotator(cache, *responses):
+    annotator = PrivacyPolicyAnnotator("mock:scripted", cache=cache)
+    annotator.client = ScriptedClient(*responses)
+    return annotator
+
+
+def test_complete_stream_is_cached_and_replayed(cache):
+    annotator = _annotator(cache, json.dumps(SPANS))
+    assert list(annotator.annotate_stream(POLICY)) == SPANS
+    assert cache.writes == 1
+
+    assert list(annotator.annotate_stream(POLICY)) == SPANS
+    assert annotator.client.calls == 1
+
+
+def test_truncated_stream_is_not_cached(cache):
+    # Cut off in the middle of the second object (e.g. the output token limit)
+    truncated = json.dumps(SPANS)[:-40]
+    annotator = _annotator(cache, truncated)
+    assert list(annotator.annotate_stream(POLICY)) == SPANS[:1]
+    assert cache.writes == 0
+
+
+
+def test_parse_accepts_wrapped_and_repairable_responses():
+    wrapped = parse_annotations("```json\n" + json.dumps({"annotations": SPANS}) + "\n```")
+    assert wrapped["spans"] == SPANS and not wrapped["repaired"]
+
+    repaired = parse_annotations(json.dumps(SPANS)[:-1] + ",]")
+    assert repaired["spans"] == SPANS and repaired["repaired"] and repaired["error"] is None
+
+
+def test_parse_drops_items_that_fail_the_schema():
+    parsed = parse_annotations(json.dumps(SPANS + [{"label": "Collected PI"}, "stray"]))
+    assert parsed["spans"] == SPANS and parsed["invalid"] == 2 and parsed["error"] is None
+
+
+def test_unusable_response_is_reasked_once(cache):
+    annotator = _annotator(cache, "Sorry, I cannot help with that.", json.dumps(SPANS))
+    assert annotator.annotate(POLICY) == SPANS
+    assert annotator.client.calls == 2
+    assert annotator.parse_stats["reasked"] == 1 and annotator.parse_stats["failed"] == 0
+    # The usable re-asked response is what a rerun replays
+    assert annotator.annotate(POLICY) == SPANS and annotator.client.calls == 2
+
+
+def test_failed_reask_raises_and_caches_nothing(cache):
+    annotator = _annotator(cache, "Sorry.", json.dumps([{"label": "Collected PI"}]))
+    with pytest.raises(AnnotationParseError, match="match the span schema"):
+        annotator.annotate(POLICY)
+    assert annotator.parse_stats["failed"] == 1 and cache.writes == 0
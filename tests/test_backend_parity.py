@@ -0,0 +1,30 @@
+import os
+import random
+
+import pytest
+
+from benchmarks.backend_parity import check_policy
+from benchmarks.synthetic import synthetic_predictions
+from src.corpus import iter_c3pa_dataset
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+# A fixed mix of short and long policies from both subsets
+POLICY_IDS = ["DB_5", "DB_12", "DB_40", "WS_2", "WS_17"]
+
+
+def load_policies():
+    if not os.path.isdir(DATA_PATH):
+        return []
+    return [p for p in iter_c3pa_dataset(DATA_PATH, ids=POLICY_IDS) if p['ground_truth']]
+
+
+@pytest.mark.parametrize("policy", load_policies(), ids=lambda p: p['id'])
+def test_matrix_backend_matches_reference(policy):
+    rng = random.Random(0)
+    preds = synthetic_predictions(policy['ground_truth'], rng)
+    assert check_policy(policy['ground_truth'], preds) == []
+
+
+def test_policies_found():
+    assert len(load_policies()) >= 3
@@ -0,0 +1,55 @@
+import json
+
+from src.ai_evaluator import AIEvaluator
+from src.cache import JudgeCache
+from src.llm_client import LLMClient
+
+PAIRS = [(f"prediction {i}", f"ground truth {i}", "Collected PI") for i in range(4)]
+
+
+def _evaluator(tmp_path, *responses, batch_size=20):
+    client = LLMClient("mock:judge")
+    replies = list(responses)
+    client.classify = lambda *args, **kwargs: replies.pop(0)
+    return AIEvaluator(client, judge_cache=JudgeCache(str(tmp_path)), judge_mode="batch", batch_size=batch_size)
+
+
+def test_verdicts_are_matched_by_id_and_scaled(tmp_path):
+    evaluator = _evaluator(tmp_path, json.dumps({"verdicts": [
+        {"id": 2, "score": 9, "reasoning": "Same provision."},
+        {"id": "0", "score": 3, "reasoning": "Different."},
+        {"id": 1, "score": 14},
+        {"id": 3, "score": "n/a"},
+    ]}))
+    verdicts = evaluator._batch_judge(PAIRS)
+
+    assert verdicts[PAIRS[2]] == (True, 0.9, "Same provision.")
+    assert verdicts[PAIRS[0]] == (False, 0.3, "Different.")
+    assert verdicts[PAIRS[1]][:2] == (True, 1.0)   # clamped to [0, 1]
+    assert verdicts[PAIRS[3]][:2] == (False, 0.0)  # unparseable score
+    assert evaluator.judge_stats["judge_calls"] == 1 and evaluator.judge_stats["pairs_judged"] == 4
+
+
+def test_bare_list_and_stray_items_are_accepted(tmp_path):
+    evaluator = _evaluator(tmp_path, '```json\n[{"id": 0, "score": 8}, "noise", {"id": "x"}, {"id": 1, "score": 2},]\n```')
+    verdicts = evaluator._batch_judge(PAIRS[:2])
+    assert verdicts[PAIRS[0]][:2] == (True, 0.8) and verdicts[PAIRS[1]][:2] == (False, 0.2)
+
+
+def test_missing_verdicts_are_errors_and_rejudged(tmp_path):
+    evaluator = _evaluator(
+        tmp_path,
+        json.dumps({"verdicts": [{"id": 0, "score": 10}]}),
+        "",
+        json.dumps({"verdicts": [{"id": 0, "score": 7}]}),
+        batch_size=2,
+    )
+    verdicts = evaluator._batch_judge(PAIRS)
+    assert verdicts[PAIRS[0]][:2] == (True, 1.0)
+    assert all(verdicts[pair][2].startswith("Error") for pair in PAIRS[1:])
+    assert evaluator.judge_cache.writes == 1
+
+    # Only the pairs without a stored verdict are sent again
+    verdicts = evaluator._batch_judge(PAIRS[:2])
+    assert verdicts[PAIRS[0]][:2] == (True, 1.0) and verdicts[PAIRS[1]][:2] == (True, 0.7)
+    assert evaluator.judge_stats["judge_calls"] == 3
@@ -0,0 +1,76 @@
+import os
+
+from src.chunking import estimate_tokens, merge_chunk_annotations, split_into_chunks
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def paragraphs(n, words=30):
+    return "\n".join(" ".join(f"p{i}w{j}" for j in range(words)) + "." for i in range(n)) + "\n"
+
+
+def chunk(text, start, end, index=0):
+    return {"index": index, "start": start, "end": end, "text": text[start:end]}
+
+
+def test_chunks_respect_token_budget_including_overlap():
+    with open(os.path.join(DATA_PATH, "Texts", "WS", "2.txt"), encoding="utf-8") as f:
+        text = f.read()
+    for max_tokens in (300, 500, 1000):
+        chunks = split_into_chunks(text, max_tokens=max_tokens, overlap_tokens=200)
+        assert max(estimate_tokens(c["text"]) for c in chunks) <= max_tokens
+
+
+def test_chunks_cover_text_and_overlap():
+    text = paragraphs(40)
+    chunks = split_into_chunks(text, max_tokens=200, overlap_tokens=60)
+    assert len(chunks) > 1
+    assert chunks[0]["start"] == 0 and chunks[-1]["end"] == len(text)
+    for prev, nxt in zip(chunks, chunks[1:]):
+        assert nxt["start"] < prev["end"]  # consecutive chunks share text
+        assert nxt["end"] > prev["end"]    # and every chunk makes progress
+    assert all(c["text"] == text[c["start"]:c["end"]] for c in chunks)
+
+
+def test_seam_duplicate_is_merged():
+    text = "Intro text here. We collect your email address. Outro text follows."
+    seam_start = text.index("We")
+    seam_end = text.index(" Outro")
+    chunks = [chunk(text, 0, seam_end), chunk(text, seam_start, len(text), 1)]
+    span = {"label": "Collected", "text": "We collect your email address."}
+    merged = merge_chunk_annotations(chunks, [[dict(span)], [dict(span)]])
+    assert merged == [span]
+
+
+def test_repeats_outside_the_seam_are_kept():
+    sentence = "You may delete your data."
+    text = " ".join([sentence, "Filler one.", "Filler two.", sentence, "Filler three.", "Filler four.", sentence])
+    a = text.index("Filler two.")
+    b = text.index("Filler four.")
+    chunks = [chunk(text, 0, a + len("Filler two.")), chunk(text, a, b + len("Filler four."), 1), chunk(text, b, len(text), 2)]
+    span = {"label": "Delete", "text": sentence}
+    merged = merge_chunk_annotations(chunks, [[dict(span)], [dict(span)], [dict(span)]])
+    # Each occurrence is a separate provision: none of them lies in a shared range
+    assert len(merged) == 3
+
+
+def test_repeats_within_a_chunk_are_kept():
+    text = "Right to delete. Right to delete. More text."
+    chunks = [chunk(text, 0, 33), chunk(text, 17, len(text), 1)]
+    span = {"label": "Delete", "text": "Right to delete."}
+    merged = merge_chunk_annotations(chunks, [[dict(span), dict(span)], [dict(span)]])
+    # The second occurrence is seen by both chunks and merged once; the first is kept
+    assert len(merged) == 2
+
+
+def test_longer_span_replaces_every_truncated_piece():
+    text = "Start. We collect names, emails and phone numbers from you. End."
+    seam_start = text.index("We")
+    seam_end = text.index(" numbers")
+    chunks = [chunk(text, 0, seam_end), chunk(text, seam_start, len(text), 1)]
+    full = {"label": "Collected", "text": "We collect names, emails and phone numbers from you."}
+    # Chunk 0 ends mid-sentence and the model split the cut provision in two
+    pieces = [{"label": "Collected", "text": "We collect names,"}, {"label": "Collected", "text": "emails and phone"}]
+    other = {"label": "Other", "text": "Start."}
+    merged = merge_chunk_annotations(chunks, [[pieces[0], other, pieces[1]], [full]])
+    assert merged == [full, other]
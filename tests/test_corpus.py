@@ -0,0 +1,55 @@
+import os
+
+import pandas as pd
+
+from src.corpus import CompiledCorpus, iter_c3pa_dataset
+
+
+def _write_policy(root, subset, file_id, text, spans, label_column="Category"):
+    for folder in ("Annotations", "Texts"):
+        os.makedirs(root / folder / subset, exist_ok=True)
+    (root / "Texts" / subset / f"{file_id}.txt").write_text(text, encoding="utf-8")
+    pd.DataFrame({label_column: [label for label, _ in spans], "Text": [span for _, span in spans]}).to_csv(
+        root / "Annotations" / subset / f"{file_id}.csv", index=False)
+
+
+def _dataset(tmp_path):
+    root = tmp_path / "data"
+    _write_policy(root, "DB", "1", "Last updated: 2023. We never sell data.", [("Updated Privacy Policy", "Last updated: 2023")])
+    _write_policy(root, "WS", "2", "You may delete your data.", [("Description of Right to Delete", "delete your data")])
+    return root
+
+
+def test_missing_corpus_is_compiled(tmp_path):
+    root, corpus_path = _dataset(tmp_path), tmp_path / "corpus.bin"
+    policies = list(iter_c3pa_dataset(str(root), corpus_path=str(corpus_path)))
+
+    assert [p["id"] for p in policies] == ["DB_1", "WS_2"]
+    corpus = CompiledCorpus(str(corpus_path))
+    assert corpus.ids == ["DB_1", "WS_2"]
+    corpus.close()
+
+
+def test_edited_source_rebuilds_corpus(tmp_path):
+    root, corpus_path = _dataset(tmp_path), tmp_path / "corpus.bin"
+    list(iter_c3pa_dataset(str(root), corpus_path=str(corpus_path)))
+
+    _write_policy(root, "WS", "2", "You may delete or correct your data.", [("Description of Right to Correct Information", "correct your data")])
+    [policy] = iter_c3pa_dataset(str(root), ids=["WS_2"], corpus_path=str(corpus_path))
+    assert policy["text"] == "You may delete or correct your data."
+
+    corpus = CompiledCorpus(str(corpus_path))
+    assert not corpus.is_stale(str(root))
+    assert corpus.get("WS_2")["ground_truth"] == [{"label": "Description of Right to Correct Information", "text": "correct your data"}]
+    corpus.close()
+
+
+def test_skipped_policy_does_not_trigger_rebuilds(tmp_path):
+    root, corpus_path = _dataset(tmp_path), tmp_path / "corpus.bin"
+    # No label column: compile_corpus leaves the policy out
+    _write_policy(root, "DB", "3", "Unlabeled.", [("x", "Unlabeled.")], label_column="Notes")
+    assert [p["id"] for p in iter_c3pa_dataset(str(root), corpus_path=str(corpus_path))] == ["DB_1", "WS_2"]
+
+    compiled_at = os.stat(corpus_path).st_mtime_ns
+    assert [p["id"] for p in iter_c3pa_dataset(str(root), corpus_path=str(corpus_path))] == ["DB_1", "WS_2"]
+    assert os.stat(corpus_path).st_mtime_ns == compiled_at
@@ -0,0 +1,44 @@
+from src.evaluation_stage import EvaluationStage, stored_prediction_tasks, with_inference_stats
+
+TEXT = "We collect your email address. We never sell personal information to third parties."
+GROUND_TRUTH = [
+    {"label": "Collected PI", "text": "your email address"},
+    {"label": "Description of Right to Opt-out of sale of PI", "text": "We never sell personal information"},
+]
+PREDICTIONS = [{"label": "Collected PI", "text": "your email address"}]
+
+
+class CachedAnnotator:
+    """Stands in for PrivacyPolicyAnnotator.cached_annotations (the fallback for pairs without journaled predictions)."""
+
+    def cached_annotations(self, text):
+        return PREDICTIONS
+
+
+def _rescore(tmp_path, journal_rows, annotators=None):
+    policies = [{"id": "P1", "text": TEXT, "ground_truth": GROUND_TRUTH}]
+    tasks = list(stored_prediction_tasks(policies, ["mock:m"], journal_rows, annotators))
+    stage = EvaluationStage("mock:judge", judge_cache_dir=str(tmp_path / "judge"), max_workers=1)
+    by_pair = {(row["policy_id"], row["model"]): row for row in journal_rows}
+    return [with_inference_stats(row, by_pair.get((row["policy_id"], row["model"]))) for row, _, _ in stage.run(tasks)]
+
+
+def test_rescored_row_drops_stale_error(tmp_path):
+    # The pair's last run failed, but the annotator's response is in the inference cache
+    journal_rows = [{"policy_id": "P1", "model": "mock:m", "error": "Timeout"}]
+    [row] = _rescore(tmp_path, journal_rows, {"mock:m": CachedAnnotator()})
+    assert "error" not in row
+    assert row["ai_recall"] == 0.5
+
+
+def test_rescored_row_keeps_only_inference_stats(tmp_path):
+    journal_rows = [{"policy_id": "P1", "model": "mock:m", "predictions": PREDICTIONS, "duration_sec": 3.0,
+                     "cost_usd": 0.01, "ai_f1": 0.0, "unjudged_pairs": 7}]
+    [row] = _rescore(tmp_path, journal_rows)
+    assert row["duration_sec"] == 3.0 and row["cost_usd"] == 0.01
+    assert row["ai_f1"] > 0 and row["unjudged_pairs"] == 0
+
+
+def test_error_rows_provide_no_predictions(tmp_path):
+    journal_rows = [{"policy_id": "P1", "model": "mock:m", "predictions": PREDICTIONS, "error": "boom"}]
+    assert _rescore(tmp_path, journal_rows) == []
@@ -0,0 +1,64 @@
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+from src import cache as cache_module
+from src.cache import InferenceCache
+
+RESPONSE = "x" * 400  # 400 bytes: two fit under the 1000-byte cap used below, three do not
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Strictly increasing timestamps, so access order is unambiguous
+    ticks = itertools.count(1)
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(time=lambda: float(next(ticks))))
+
+
+def test_key_depends_on_every_input():
+    key = InferenceCache.make_key("m", "prompt", "text", 0.0)
+    assert key == InferenceCache.make_key("m", "prompt", "text", 0.0)
+    assert len({key,
+                InferenceCache.make_key("m2", "prompt", "text", 0.0),
+                InferenceCache.make_key("m", "prompt2", "text", 0.0),
+                InferenceCache.make_key("m", "prompt", "text2", 0.0),
+                InferenceCache.make_key("m", "prompt", "text", 0.7)}) == 5
+
+
+def test_evicts_least_recently_used_entry(tmp_path, clock):
+    cache = InferenceCache(str(tmp_path / "inf.sqlite"), max_size_mb=1000 / (1024 * 1024))
+    cache.put("a", "m", RESPONSE)
+    cache.put("b", "m", RESPONSE)
+    assert cache.get("a") == RESPONSE  # "b" is now the least recently used
+
+    cache.put("c", "m", RESPONSE)
+    assert cache.get("b") is None
+    assert cache.get("a") == RESPONSE and cache.get("c") == RESPONSE
+    assert cache.stats()["evictions"] == 1
+    assert cache.size_bytes() == 800
+    cache.close()
+
+
+def test_refresh_misses_and_overwrites(tmp_path):
+    path = str(tmp_path / "inf.sqlite")
+    cache = InferenceCache(path)
+    cache.put("k", "m", "old")
+    cache.close()
+
+    refreshing = InferenceCache(path, refresh=True)
+    assert refreshing.get("k") is None
+    refreshing.put("k", "m", "new")
+    assert refreshing.stats()["misses"] == 1 and refreshing.stats()["writes"] == 1
+    refreshing.close()
+
+    cache = InferenceCache(path)
+    assert cache.get("k") == "new"
+    cache.close()
+
+
+def test_failed_calls_are_not_cached(tmp_path):
+    cache = InferenceCache(str(tmp_path / "inf.sqlite"))
+    cache.put("k", "m", "")
+    assert cache.get("k") is None and cache.stats()["writes"] == 0
+    cache.close()
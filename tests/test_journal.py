@@ -0,0 +1,47 @@
+import json
+
+from src.journal import ResultsJournal
+
+
+def _journal(tmp_path, rows, resume=False):
+    journal = ResultsJournal(str(tmp_path / "journal.jsonl"), resume=resume)
+    for row in rows:
+        journal.append(row)
+    return journal
+
+
+def test_fresh_run_moves_previous_journal_aside(tmp_path):
+    _journal(tmp_path, [{"policy_id": "P1", "model": "m", "f1": 0.5}]).close()
+
+    journal = ResultsJournal(str(tmp_path / "journal.jsonl"))
+    assert journal.rows() == []
+    journal.close()
+    with open(tmp_path / "journal.jsonl.prev", encoding="utf-8") as f:
+        assert json.loads(f.readline())["policy_id"] == "P1"
+
+
+def test_resume_skips_only_pairs_that_finished(tmp_path):
+    _journal(tmp_path, [
+        {"policy_id": "P1", "model": "m", "f1": 0.5},
+        {"policy_id": "P2", "model": "m", "error": "Timeout"},
+    ]).close()
+
+    journal = ResultsJournal(str(tmp_path / "journal.jsonl"), resume=True)
+    assert journal.completed_pairs() == {("P1", "m")}
+    assert not (tmp_path / "journal.jsonl.prev").exists()
+
+    # The retried pair's latest row replaces its error row, in its original position
+    journal.append({"policy_id": "P2", "model": "m", "f1": 0.7})
+    assert journal.completed_pairs() == {("P1", "m"), ("P2", "m")}
+    assert [row.get("f1") for row in journal.rows()] == [0.5, 0.7]
+    journal.close()
+
+
+def test_resume_after_a_line_cut_off_mid_write(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    path.write_text('{"policy_id": "P1", "model": "m", "f1": 0.5}\n{"policy_id": "P2", "mo', encoding="utf-8")
+
+    journal = ResultsJournal(str(path), resume=True)
+    journal.append({"policy_id": "P3", "model": "m", "f1": 0.9})
+    assert [row["policy_id"] for row in journal.rows()] == ["P1", "P3"]
+    journal.close()
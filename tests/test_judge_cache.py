@@ -0,0 +1,79 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.ai_evaluator import AIEvaluator
+from src.cache import JudgeCache
+from src.llm_client import LLMClient
+from src.mock_provider import configure_mock
+
+PAIRS = [(f"we collect your email address {i}", f"your email address {i}", "Collected PI") for i in range(12)]
+
+
+@pytest.fixture
+def mock_server():
+    configure_mock(latency=0.05, jitter=0.0, tokens_per_sec=None)
+    yield
+    configure_mock()
+
+
+def test_claim_makes_waiters_reuse_the_owners_verdict(tmp_path):
+    cache = JudgeCache(str(tmp_path))
+    assert cache.claim("k") is None
+    event = cache.claim("k")
+    assert event is not None and not event.is_set()
+
+    cache.put("k", {"is_match": True, "score": 0.9, "reasoning": ""})
+    assert event.is_set()
+    assert cache.get("k")["score"] == 0.9
+    assert cache.claim("k") is None  # no longer in flight
+
+
+def test_release_lets_a_waiter_take_over(tmp_path):
+    cache = JudgeCache(str(tmp_path))
+    cache.claim("k")
+    event = cache.claim("k")
+    cache.release("k")
+    assert event.is_set() and cache.get("k") is None
+    assert cache.claim("k") is None
+
+
+def test_concurrent_batch_judges_call_once_per_pair(tmp_path, mock_server):
+    client = LLMClient("mock:judge")
+    calls = []
+    classify = client.classify
+
+    def counting_classify(*args, **kwargs):
+        calls.append(1)
+        return classify(*args, **kwargs)
+
+    client.classify = counting_classify
+    cache = JudgeCache(str(tmp_path))
+    evaluator = AIEvaluator(client, judge_cache=cache, judge_mode="batch", batch_size=4)
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(lambda _: evaluator._batch_judge(PAIRS), range(6)))
+
+    assert len(calls) == 3
+    stats = cache.stats()
+    assert stats["writes"] == len(PAIRS)
+    assert stats["hits"] + stats["misses"] >= 6 * len(PAIRS)
+    assert all(set(verdicts) == set(PAIRS) for verdicts in results)
+    assert all(verdicts == results[0] for verdicts in results)
+
+
+def test_counters_are_exact_under_contention(tmp_path):
+    cache = JudgeCache(str(tmp_path))
+    cache.put("k", {"is_match": True, "score": 1.0, "reasoning": ""})
+
+    def lookups():
+        for _ in range(200):
+            cache.get("k")
+            cache.get("missing")
+
+    threads = [threading.Thread(target=lookups) for _ in range(8)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    stats = cache.stats()
+    assert stats["hits"] == stats["misses"] == 1600
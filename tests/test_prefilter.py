@@ -0,0 +1,48 @@
+from src.prefilter import PASSAGE_SEPARATOR, RelevanceFilter
+
+RIGHTS = "Under the CCPA you have the right to delete personal information and the right to opt-out of its sale."
+FILLER = [
+    "Our offices are closed on public holidays.",
+    "The weather in our area is usually mild.",
+    "Our team enjoys hiking on weekends.",
+    "We sponsor a local football club.",
+]
+
+
+def _kept(relevance_filter, text):
+    return [text[s:e].strip() for s, e in relevance_filter.select(text)]
+
+
+def test_generic_passages_are_dropped():
+    relevance_filter = RelevanceFilter(context=0, max_gap_tokens=0)
+    text = "\n".join(FILLER + [RIGHTS])
+    assert _kept(relevance_filter, text) == [RIGHTS]
+
+
+def test_short_gap_between_relevant_passages_is_kept():
+    text = "\n".join([RIGHTS, "Name, email address.", RIGHTS] + FILLER)
+    kept = _kept(RelevanceFilter(context=0, max_gap_tokens=50), text)
+    assert kept == ["\n".join([RIGHTS, "Name, email address.", RIGHTS])]
+    assert len(_kept(RelevanceFilter(context=0, max_gap_tokens=0), text)) == 2
+
+
+def test_filtered_offsets_map_back_to_original():
+    text = "\n".join(FILLER[:2] + [RIGHTS] + FILLER[2:] + [RIGHTS])
+    filtered = RelevanceFilter(context=0, max_gap_tokens=0).filter(text)
+    assert filtered["text"] == PASSAGE_SEPARATOR.join([RIGHTS, RIGHTS])
+    offset = filtered["text"].rindex("CCPA")
+    assert text[RelevanceFilter.to_original_offset(filtered["ranges"], offset):].startswith("CCPA")
+
+
+def test_gt_coverage_is_checked_per_span_against_kept_ranges():
+    text = "\n".join([RIGHTS, FILLER[0], RIGHTS])
+    kept = RelevanceFilter(context=0, max_gap_tokens=0).filter(text)["ranges"]
+    ground_truth = [
+        {"label": "Description of Right to Delete", "text": "the right to delete personal information"},
+        # Runs across the dropped filler line: its text is not in what the model sees
+        {"label": "Others", "text": f"{RIGHTS} {FILLER[0]}"},
+        {"label": "Others", "text": "not in this policy"},
+    ]
+    assert RelevanceFilter.gt_coverage(text, kept, ground_truth) == 0.5
+    assert RelevanceFilter.gt_coverage(text, [(0, len(text))], ground_truth) == 1.0
+    assert RelevanceFilter.gt_coverage(text, kept, ground_truth[2:]) is None
@@ -0,0 +1,74 @@
+import random
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.rate_limiter import ProviderRateLimiter, RetryPolicy, TokenBucket, retry_after_seconds
+
+
+def test_token_bucket_spends_burst_then_spaces_requests():
+    bucket = TokenBucket(per_minute=60, burst_seconds=5)  # 1/s, 5 in the bucket
+    t0 = time.monotonic()
+    waits = [bucket.reserve(1, now=t0) for _ in range(7)]
+    assert waits[:5] == [0.0] * 5
+    assert waits[5] == pytest.approx(1.0) and waits[6] == pytest.approx(2.0)
+    # Refill at 1/s: after 3 s the debt of 2 is repaid and one token is free
+    assert bucket.reserve(1, now=t0 + 3.0) == 0.0
+
+
+def test_token_bucket_scale_slows_refill():
+    bucket = TokenBucket(per_minute=60, burst_seconds=1)
+    t0 = time.monotonic()
+    bucket.reserve(1, now=t0)
+    assert bucket.reserve(1, now=t0, scale=0.5) == pytest.approx(2.0)
+
+
+def test_token_bucket_adjust_refunds_overestimates():
+    bucket = TokenBucket(per_minute=600, burst_seconds=1)  # capacity 10
+    t0 = time.monotonic()
+    assert bucket.reserve(10, now=t0) == 0.0
+    bucket.adjust(-4)  # actual usage was 6
+    assert bucket.reserve(4, now=t0) == 0.0
+    assert bucket.reserve(1, now=t0) > 0
+
+
+def test_rate_limit_halves_scale_once_per_pause_and_recovers():
+    limiter = ProviderRateLimiter("mock", rpm=600, min_scale=0.1, recovery=0.25)
+    limiter.record_failure(rate_limited=True, pause=0.2, will_retry=True)
+    # A second 429 from a request already in flight during the pause is the same signal
+    limiter.record_failure(rate_limited=True, pause=0.2, will_retry=True)
+    metrics = limiter.metrics()
+    assert metrics["rate_scale"] == 0.5
+    assert metrics["rate_limited"] == 2 and metrics["retries"] == 2
+
+    limiter.record_success()
+    assert limiter.metrics()["rate_scale"] == 0.75
+
+
+def test_rate_limit_pause_blocks_acquire():
+    limiter = ProviderRateLimiter("mock")
+    limiter.record_failure(rate_limited=True, pause=0.2, will_retry=True)
+    start = time.monotonic()
+    waited = limiter.acquire()
+    assert waited >= 0.15 and time.monotonic() - start >= 0.15
+    assert limiter.metrics()["throttled"] == 1
+
+
+def test_retry_after_is_not_truncated_by_max_delay():
+    random.seed(0)
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+    assert policy.delay(attempt=0, retry_after=30.0) == 30.0
+    assert all(policy.delay(attempt=10) <= 5.0 for _ in range(50))
+    # Retry-After is a lower bound on the jittered back-off
+    assert all(policy.delay(attempt=3, retry_after=2.0) >= 2.0 for _ in range(50))
+
+
+def test_retry_after_seconds_reads_headers():
+    def error(headers):
+        return SimpleNamespace(response=SimpleNamespace(headers=headers))
+
+    assert retry_after_seconds(error({"retry-after-ms": "1500"})) == 1.5
+    assert retry_after_seconds(error({"retry-after": "7"})) == 7.0
+    assert retry_after_seconds(error({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+    assert retry_after_seconds(error({})) is None
@@ -0,0 +1,53 @@
+import json
+import os
+
+from src.report_build import MANIFEST_FILE, ReportBuilder
+
+TEXT = "We collect your email address."
+HUMAN = [{"label": "Collected PI", "text": "your email address"}]
+PREDICTIONS = [{"label": "Collected PI", "text": "your email address", "reasoning": ""}]
+
+
+def _build(reports_dir, pages, keep=None):
+    builder = ReportBuilder(str(reports_dir))
+    rendered = {}
+    for policy_id, predictions in pages.items():
+        filename = os.path.join(str(reports_dir), f"{policy_id}.html")
+        _, rendered[policy_id] = builder.render(policy_id, TEXT, HUMAN, predictions, filename)
+    stats = builder.finish(keep)
+    return rendered, stats
+
+
+def test_rebuild_renders_only_changed_pages(tmp_path):
+    rendered, _ = _build(tmp_path, {"P1": PREDICTIONS, "P2": PREDICTIONS})
+    assert rendered == {"P1": True, "P2": True}
+
+    rendered, stats = _build(tmp_path, {"P1": PREDICTIONS, "P2": []})
+    assert rendered == {"P1": False, "P2": True}
+    assert stats["unchanged"] == 1 and stats["rendered"] == 1
+
+
+def test_missing_page_is_rendered_again(tmp_path):
+    _build(tmp_path, {"P1": PREDICTIONS})
+    os.remove(tmp_path / "P1.html")
+    rendered, _ = _build(tmp_path, {"P1": PREDICTIONS})
+    assert rendered == {"P1": True}
+
+
+def test_finish_prunes_orphans_but_keeps_skipped_pages(tmp_path):
+    _build(tmp_path, {"P1": PREDICTIONS, "P2": PREDICTIONS, "P3": PREDICTIONS})
+    (tmp_path / "P9.html.tmp").write_text("partial", encoding="utf-8")
+
+    # P2 was not rendered this time (e.g. skipped by --resume) but still belongs to the results
+    _, stats = _build(tmp_path, {"P1": PREDICTIONS}, keep=["P1.html", "P2.html"])
+    assert stats["pruned"] == 2
+    assert sorted(n for n in os.listdir(tmp_path) if n.startswith("P")) == ["P1.html", "P2.html"]
+    with open(tmp_path / MANIFEST_FILE, encoding="utf-8") as f:
+        assert sorted(json.load(f)["reports"]) == ["P1.html", "P2.html"]
+
+
+def test_unreadable_manifest_rebuilds_everything(tmp_path):
+    _build(tmp_path, {"P1": PREDICTIONS})
+    (tmp_path / MANIFEST_FILE).write_text("{not json", encoding="utf-8")
+    rendered, _ = _build(tmp_path, {"P1": PREDICTIONS})
+    assert rendered == {"P1": True}
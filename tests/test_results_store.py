@@ -0,0 +1,88 @@
+import pandas as pd
+import pytest
+
+from src.results_store import ResultsStore
+
+ROWS = [
+    {
+        "policy_id": "DB_1", "model": "mock:a", "f1": 0.5, "ai_f1": 0.8, "cost_usd": 0.01,
+        "predictions": [{"label": "Collected PI", "text": "email"}, {"label": "Collected PI", "text": "cookies"}],
+        "decisions": [{"status": "CORRECT"}, {"status": "WRONG"}],
+        "gt_outcomes": [{"label": "Collected PI", "found": True}, {"label": "Right to Delete", "found": False}],
+    },
+    {
+        "policy_id": "WS_1", "model": "mock:a", "f1": 0.7, "ai_f1": 0.6, "cost_usd": 0.02,
+        "predictions": [{"label": "Right to Delete", "text": "delete"}],
+        "decisions": [{"status": "PARTIAL"}],
+        "gt_outcomes": [{"label": "Right to Delete", "found": True}],
+    },
+    {"policy_id": "DB_1", "model": "mock:b", "f1": 0.9, "ai_f1": 0.9, "cost_usd": 0.03},
+    {"policy_id": "WS_1", "model": "mock:b", "error": "Timeout"},
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultsStore(str(tmp_path / "results.sqlite"))
+    store.start_run("full")
+    store.add_rows(ROWS)
+    store.finish_run()
+    yield store
+    store.close()
+
+
+def _breakdown_row(breakdown, dimension, value):
+    rows = breakdown[(breakdown["model"] == "mock:a") & (breakdown["dimension"] == dimension)
+                     & (breakdown["value"] == value)]
+    assert len(rows) == 1
+    return rows.iloc[0]
+
+
+def test_metric_breakdown_by_label_and_subset(store):
+    breakdown = store.metric_breakdown()
+
+    collected = _breakdown_row(breakdown, "label", "Collected PI")
+    assert (collected["predictions"], collected["correct"], collected["gt"], collected["found"]) == (2, 1, 1, 1)
+    assert collected["precision"] == 0.5 and collected["recall"] == 1.0 and collected["f1"] == 0.667
+
+    delete = _breakdown_row(breakdown, "label", "Right to Delete")
+    assert (delete["predictions"], delete["correct"], delete["gt"], delete["found"]) == (1, 1, 2, 1)
+
+    subset = _breakdown_row(breakdown, "subset", "WS")
+    assert subset["precision"] == 1.0 and subset["recall"] == 1.0
+
+    without_ws = store.metric_breakdown(exclude_policies=["WS_1"])
+    assert "WS" not in set(without_ws["value"])
+
+
+def test_leaderboard_skips_error_rows(store):
+    board = store.leaderboard()
+    assert list(board["model"]) == ["mock:b", "mock:a"]
+    b = board.set_index("model").loc["mock:b"]
+    assert b["policies"] == 1 and b["ai_f1"] == 0.9
+    assert board.set_index("model").loc["mock:a", "cost_usd"] == pytest.approx(0.03)
+
+
+def test_rewritten_pair_replaces_its_rows(store):
+    store.start_run("full")
+    store.add_rows(ROWS[:1])
+    store.add_rows([dict(ROWS[0], predictions=ROWS[0]["predictions"][:1], decisions=ROWS[0]["decisions"][:1])])
+    store.finish_run()
+    assert len(store.predictions()) == 1 and len(store.pair_metrics()) == 1
+
+
+def test_import_csv_stores_a_finished_run(store, tmp_path):
+    csv_path = tmp_path / "results.csv"
+    pd.DataFrame([
+        {"policy_id": "DB_2", "model": "mock:c", "f1": 0.4, "ai_f1": 0.5, "error": None},
+        {"policy_id": "DB_3", "model": "mock:c", "f1": None, "ai_f1": None, "error": "Timeout"},
+    ]).to_csv(csv_path, index=False)
+
+    run_id = store.import_csv(str(csv_path))
+    assert store.latest_run_id() == run_id
+    runs = store.runs().set_index("run_id")
+    assert runs.loc[run_id, "mode"] == "import" and runs.loc[run_id, "finished"] > 0
+    metrics = store.pair_metrics(run_id).set_index("policy_id")
+    assert metrics.loc["DB_2", "ai_f1"] == 0.5 and pd.isna(metrics.loc["DB_2", "error"])
+    assert metrics.loc["DB_3", "error"] == "Timeout"
+    assert list(store.leaderboard(run_id)["policies"]) == [1]
@@ -0,0 +1,29 @@
+import pandas as pd
+
+from src.significance import model_intervals, shared_policy_rows
+
+
+def _uneven_results() -> pd.DataFrame:
+    # Model "b" only finished the easy policies; model "a" also has the hard ones
+    rows = [{"policy_id": f"p{i}", "model": "a", "ai_f1": 0.9 if i < 10 else 0.1} for i in range(20)]
+    rows += [{"policy_id": f"p{i}", "model": "b", "ai_f1": 0.8} for i in range(10)]
+    return pd.DataFrame(rows)
+
+
+def test_shared_policy_rows_keeps_policies_every_model_has():
+    shared = shared_policy_rows(_uneven_results(), ["ai_f1"])
+    assert shared["policy_id"].nunique() == 10
+    assert set(shared.groupby("policy_id")["model"].nunique()) == {2}
+
+
+def test_shared_policy_rows_falls_back_without_common_policy():
+    df = pd.DataFrame([{"policy_id": "p0", "model": "a", "ai_f1": 1.0},
+                       {"policy_id": "p1", "model": "b", "ai_f1": 0.5}])
+    assert len(shared_policy_rows(df, ["ai_f1"])) == 2
+
+
+def test_shared_means_lie_within_their_intervals():
+    shared = shared_policy_rows(_uneven_results(), ["ai_f1"])
+    means = shared.groupby("model")["ai_f1"].mean()
+    intervals = model_intervals(shared, ["ai_f1"], ["a", "b"])
+    assert ((intervals["ai_f1_low"] <= means + 1e-9) & (means - 1e-9 <= intervals["ai_f1_high"])).all()
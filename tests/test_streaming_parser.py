@@ -0,0 +1,77 @@
+import json
+
+from src.utils import StreamingJSONArrayParser
+
+SPANS = [
+    {"label": "Right to Delete", "text": "You may ask us to delete your data.", "reasoning": "Deletion right."},
+    {"label": "Others", "text": "Braces {like this} and [brackets] and a \"quote\" \\ backslash", "reasoning": "}]"},
+    {"label": "Collected", "text": "Names, emails.", "reasoning": "List of PI types."},
+]
+
+
+def feed_all(chunks):
+    parser = StreamingJSONArrayParser()
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    return items, parser
+
+
+def split_every(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_bare_array():
+    items, _ = feed_all([json.dumps(SPANS)])
+    assert items == SPANS
+
+
+def test_fenced_input_ignores_brackets_in_preceding_prose():
+    response = "Here are the results [see below] {ok}:\n```json\n" + json.dumps(SPANS, indent=2) + "\n```\nDone."
+    for size in (1, 3, 7, len(response)):
+        items, _ = feed_all(split_every(response, size))
+        assert items == SPANS
+
+
+def test_wrapped_object_input():
+    response = json.dumps({"annotations": SPANS, "note": "[not an element]"})
+    items, _ = feed_all(split_every(response, 5))
+    assert items == SPANS
+
+
+def test_braces_and_quotes_inside_strings():
+    items, _ = feed_all([json.dumps(SPANS[1:2])])
+    assert items == SPANS[1:2]
+
+
+def test_objects_split_across_chunk_boundaries_are_emitted_once_complete():
+    response = json.dumps(SPANS)
+    first_end = response.index("}") + 1
+    parser = StreamingJSONArrayParser()
+    assert parser.feed(response[:first_end - 1]) == []
+    assert parser.feed(response[first_end - 1:first_end]) == SPANS[:1]
+    assert parser.feed(response[first_end:]) == SPANS[1:]
+
+
+def test_every_split_point():
+    response = json.dumps(SPANS)
+    for cut in range(len(response) + 1):
+        items, _ = feed_all([response[:cut], response[cut:]])
+        assert items == SPANS
+
+
+def test_consumed_text_is_not_kept():
+    spans = [dict(SPANS[0], text=f"Span number {i}") for i in range(500)]
+    parser = StreamingJSONArrayParser()
+    items = []
+    longest_tail = 0
+    for chunk in split_every(json.dumps(spans), 40):
+        items.extend(parser.feed(chunk))
+        longest_tail = max(longest_tail, len(parser._text))
+    assert items == spans
+    assert longest_tail < 2 * len(json.dumps(spans[0])) + 40
+
+
+def test_invalid_object_is_skipped():
+    items, _ = feed_all(['[{"label": "A", "text": "x"}, {"label": oops}, {"label": "B", "text": "y"}]'])
+    assert items == [{"label": "A", "text": "x"}, {"label": "B", "text": "y"}]